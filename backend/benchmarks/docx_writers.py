@@ -0,0 +1,110 @@
+"""
+Benchmark DOCX writers on a large generated document
+
+Writes the same content with the streaming writer and with python-docx,
+each in a fresh process, and reports time and peak memory (peak RSS;
+on Windows, which has no resource module, the peak of Python allocations
+traced by tracemalloc, which misses lxml's own memory and slows runs down).
+
+Usage:
+    python benchmarks/docx_writers.py [--paragraphs 20000]
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# Run from the backend directory
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+WRITERS = ("streaming", "python-docx")
+
+
+def generate_documents(paragraphs: int):
+    """Chapters of headings, paragraphs and list items, like a long book"""
+    from core.document_model import BlockDocument, BlockType
+
+    document = BlockDocument()
+    for index in range(paragraphs):
+        if index % 200 == 0:
+            document.add(BlockType.HEADING, f"Chapter {index // 200 + 1}", 1)
+        if index % 20 == 19:
+            document.add(BlockType.LIST_ITEM, f"List item {index}", 1)
+        else:
+            document.add(BlockType.PARAGRAPH, f"Paragraph {index}: the quick brown fox jumps over the lazy dog, again and again.")
+        if index % 1000 == 999:
+            yield document
+            document = BlockDocument()
+    if len(document):
+        yield document
+
+
+def run_writer(writer: str, paragraphs: int, output_dir: str):
+    """Generate a document with one writer (runs in a child process)"""
+    from loguru import logger
+
+    from config import settings
+    from core.document_generator import document_generator
+
+    logger.remove()
+    settings.docx_writer = writer
+    if resource is None:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    output_path = document_generator.generate_docx(
+        generate_documents(paragraphs),
+        title="Benchmark",
+        output_filename=f"benchmark_{writer}.docx",
+        output_dir=output_dir
+    )
+    elapsed = time.perf_counter() - start
+
+    if resource is None:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    else:
+        # ru_maxrss is in KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_mb = peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    print(f"{elapsed} {peak_mb} {output_path.stat().st_size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DOCX writers")
+    parser.add_argument("--paragraphs", type=int, default=20000, help="Paragraphs in the generated document")
+    parser.add_argument("--writer", choices=WRITERS, help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.writer:
+        run_writer(args.writer, args.paragraphs, args.output_dir)
+        return
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        results = {}
+        for writer in WRITERS:
+            result = subprocess.run(
+                [sys.executable, __file__, "--paragraphs", str(args.paragraphs), "--writer", writer, "--output-dir", output_dir],
+                cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+            )
+            elapsed, peak_mb, size = result.stdout.split()
+            results[writer] = (float(elapsed), float(peak_mb), int(size))
+
+    baseline_time = results["python-docx"][0]
+    print(f"{args.paragraphs} paragraphs")
+    for writer, (elapsed, peak_mb, size) in results.items():
+        print(f"  {writer:<12} {elapsed:8.2f}s  peak {peak_mb:7.1f}MB  {size / 1024 / 1024:6.1f}MB file  {baseline_time / elapsed:5.2f}x vs python-docx")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark HTML text extraction backends on an EPUB file
+
+Compares extraction speed of each backend and checks that they produce
+the same text, ignoring whitespace (line breaks legitimately differ:
+lxml breaks at block elements, bs4 follows the document source).
+
+Usage:
+    python benchmarks/epub_text_backends.py book.epub [--repeat 3]
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Run from the backend directory
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+
+from core.epub_processor import EPUBProcessor
+from core.html_text import TEXT_BACKENDS
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def run_backend(name: str, epub_file: Path, repeat: int) -> tuple[float, list[str]]:
+    """
+    Extract all chapters with a backend
+
+    Returns:
+        (best time in seconds, chapter texts)
+    """
+    processor = EPUBProcessor(text_backend=name)
+    best = float("inf")
+    chapters = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chapters = [chapter.to_text() for chapter in processor.iter_chapters(epub_file)]
+        best = min(best, time.perf_counter() - start)
+    return best, chapters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EPUB HTML text extraction backends")
+    parser.add_argument("epub_file", type=Path, help="EPUB file to extract")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend, best time is reported")
+    args = parser.parse_args()
+
+    logger.remove()
+
+    results = {name: run_backend(name, args.epub_file, args.repeat) for name in TEXT_BACKENDS}
+    baseline_name = "bs4"
+    baseline_time, baseline_chapters = results[baseline_name]
+
+    print(f"{args.epub_file.name}: {len(baseline_chapters)} chapters, best of {args.repeat} runs")
+    for name, (elapsed, chapters) in results.items():
+        characters = sum(len(chapter) for chapter in chapters)
+        speedup = baseline_time / elapsed if elapsed else float("inf")
+        print(f"  {name:<6} {elapsed * 1000:9.1f}ms  {characters:>10} chars  {speedup:5.2f}x vs {baseline_name}")
+
+    # Output equivalence, ignoring whitespace
+    for name, (_, chapters) in results.items():
+        if name == baseline_name:
+            continue
+
+        mismatches = [
+            index for index, (expected, actual) in enumerate(zip(baseline_chapters, chapters))
+            if _WHITESPACE.sub("", expected) != _WHITESPACE.sub("", actual)
+        ]
+        if len(chapters) != len(baseline_chapters):
+            print(f"  {name}: chapter count differs ({len(chapters)} vs {len(baseline_chapters)})")
+        if mismatches:
+            print(f"  {name}: text differs from {baseline_name} in chapters {mismatches[:20]}")
+        elif len(chapters) == len(baseline_chapters):
+            print(f"  {name}: text identical to {baseline_name} (ignoring whitespace)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 import os
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -27,6 +27,15 @@ class Settings(BaseSettings):
     minio_bucket: str = Field(default="to-docx", description="MinIO bucket name")
     minio_secure: bool = Field(default=False, description="Use HTTPS for MinIO")
     minio_cdn_endpoint: Optional[str] = Field(default=None, description="CDN endpoint for public URLs (optional)")
+    minio_bucket_cache_ttl: int = Field(default=3600, description="Seconds to trust a verified bucket before re-checking it")
+    minio_audio_retention_hours: int = Field(default=24, description="Delete uploaded audio after this many hours (0 = keep)")
+    minio_sweep_interval: int = Field(default=600, description="Seconds between background sweeps of old audio (0 = disabled)")
+    minio_delete_batch_size: int = Field(default=1000, description="Objects per bulk delete request (max 1000)")
+    minio_multipart_threshold: int = Field(default=64 * 1024 * 1024, description="Use parallel multipart upload above this size in bytes (64MB)")
+    minio_part_size: int = Field(default=16 * 1024 * 1024, description="Multipart upload part size in bytes (16MB, min 5MB)")
+    minio_parallel_uploads: int = Field(default=4, description="Max concurrent part uploads per object")
+    minio_part_retries: int = Field(default=3, description="Upload attempts per part before giving up")
+    minio_presigned_upload_expiry: int = Field(default=6 * 3600, description="Seconds presigned client upload URLs stay valid (6 hours)")
 
     # Aliyun DashScope Configuration
     dashscope_api_key: str = Field(default="", description="Aliyun DashScope API Key")
@@ -36,6 +45,12 @@ class Settings(BaseSettings):
     max_upload_size: int = Field(default=500 * 1024 * 1024, description="Max upload size in bytes (500MB)")
     temp_dir: Path = Field(default_factory=lambda: Path.cwd() / "temp", description="Temporary directory")
     output_dir: Path = Field(default_factory=lambda: Path.home() / "Documents" / "ToDocx", description="Output directory")
+    upload_buffer_size: int = Field(default=1024 * 1024, description="Bytes of an upload buffered in memory before writing to disk (1MB)")
+    upload_expire_hours: int = Field(default=24, description="Hours after which untouched uploads are deleted")
+
+    # Downloads
+    download_chunk_size: int = Field(default=1024 * 1024, description="Bytes read per chunk when streaming downloads and ZIP bundles (1MB)")
+    download_bundle_max_files: int = Field(default=1000, description="Max files in one ZIP bundle download")
 
     # Supported File Extensions
     supported_audio_formats: list[str] = Field(
@@ -47,6 +62,57 @@ class Settings(BaseSettings):
     supported_ebook_formats: list[str] = Field(
         default_factory=lambda: [".epub"]
     )
+    supported_text_formats: list[str] = Field(
+        default_factory=lambda: [".txt", ".md", ".markdown"]
+    )
+    supported_pdf_formats: list[str] = Field(
+        default_factory=lambda: [".pdf"]
+    )
+
+    # EPUB Processing
+    epub_text_backend: Literal["lxml", "bs4"] = Field(default="lxml", description="HTML text extraction backend for EPUB chapters")
+    epub_cache_max_entries: int = Field(default=32, description="Max parsed EPUB packages kept in memory")
+    epub_cache_max_bytes: int = Field(default=16 * 1024 * 1024, description="Approximate memory cap of the parsed EPUB cache (16MB)")
+    epub_parse_workers: int = Field(default=1, description="Processes for parsing EPUB chapters (1 = in-process, 0 = one per CPU core)")
+    epub_parallel_min_bytes: int = Field(default=4 * 1024 * 1024, description="Parse in parallel only when chapters exceed this many bytes (4MB)")
+    epub_images: bool = Field(default=True, description="Embed EPUB images in DOCX output")
+    epub_image_max_dpi: int = Field(default=150, description="Downscale images above this resolution at their display size")
+    epub_image_jpeg_quality: int = Field(default=85, description="JPEG quality of downscaled images")
+    epub_image_workers: int = Field(default=0, description="Threads for downscaling images (0 = one per CPU core)")
+    epub_image_memory_limit: int = Field(default=64 * 1024 * 1024, description="Max undecoded image bytes read ahead of the DOCX writer (64MB)")
+
+    # DOCX Output
+    docx_writer: Literal["streaming", "python-docx"] = Field(default="streaming", description="DOCX writer: streaming (flat memory) or python-docx (builds the whole document in memory)")
+    docx_template: Optional[Path] = Field(default=None, description="Default .docx/.dotx template for styles and page setup (python-docx default if empty)")
+    output_fanout_buffer: int = Field(default=8, description="Extracted chunks queued per format when generating several output formats at once")
+
+    # Volume Output
+    volume_max_chars: int = Field(default=2_000_000, description="Max characters per volume when splitting output by size")
+    volume_workers: int = Field(default=0, description="Processes for generating volumes (1 = in-process, 0 = one per CPU core)")
+
+    # Text Processing
+    text_encoding_sample_bytes: int = Field(default=64 * 1024, description="Bytes read to detect the encoding of text files")
+    text_chunk_chars: int = Field(default=256 * 1024, description="Characters per streamed chunk of text files")
+
+    # PDF Processing
+    pdf_parse_workers: int = Field(default=0, description="Processes for extracting PDF pages (1 = in-process, 0 = one per CPU core)")
+    pdf_parallel_min_pages: int = Field(default=64, description="Extract in parallel only for PDFs with at least this many pages")
+
+    # Health Checks
+    health_probe_interval: int = Field(default=30, description="Seconds between background dependency probes")
+    health_min_free_bytes: int = Field(default=500 * 1024 * 1024, description="Not ready when temp_dir or output_dir has less free space (500MB)")
+    health_max_active_jobs: int = Field(default=0, description="Health reports degraded when this many conversions are in progress (0 = one per CPU core, at least 2)")
+
+    # Logging
+    log_json: bool = Field(default=False, description="Write logs as JSON lines (one object per record, with job/request IDs)")
+    log_debug_rate_limit: int = Field(default=10, description="DEBUG messages per second from one log statement; extra ones are dropped and counted (0 = unlimited)")
+
+    # License
+    license_cache_ttl: int = Field(default=60, description="Seconds the verified activation code is cached (activation and deactivation clear it)")
+
+    # Quota
+    quota_reservation_timeout: int = Field(default=1800, description="Seconds a quota reservation outlives the media duration before it expires (crashed jobs)")
+    quota_unknown_duration: int = Field(default=3600, gt=0, description="Seconds of media to reserve quota for when the duration can't be probed (billed by the actual duration afterwards)")
 
     # FFmpeg Configuration
     ffmpeg_path: Optional[str] = None  # Auto-detect if None
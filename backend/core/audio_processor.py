@@ -1,6 +1,7 @@
 """Audio Processor - Extract text from audio files"""
 import subprocess
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -9,7 +10,12 @@ import requests
 from loguru import logger
 
 from config import settings
-from core.minio_uploader import minio_uploader
+from core.minio_uploader import AUDIO_FOLDER, get_minio_uploader
+
+
+def _is_url(source: str | Path) -> bool:
+    """Whether a media source is a URL (ffmpeg streams it) rather than a local file"""
+    return isinstance(source, str) and source.startswith(("http://", "https://"))
 
 
 class AudioProcessor:
@@ -38,14 +44,14 @@ class AudioProcessor:
         """
         return os.environ.get("DASHSCOPE_API_KEY") or settings.dashscope_api_key
 
-    def compress_audio(self, audio_file: Path, target_bitrate: str = "64k") -> Optional[Path]:
+    def compress_audio(self, audio_file: str | Path, target_bitrate: str = "64k") -> Optional[Path]:
         """
         压缩音频文件
 
         注意：paraformer-mtl-v1模型支持16kHz及以上采样率
 
         Args:
-            audio_file: 原始音频文件路径
+            audio_file: 原始音频文件路径或 URL
             target_bitrate: 目标比特率，默认64k
 
         Returns:
@@ -55,7 +61,7 @@ class AudioProcessor:
             compressed_dir = settings.temp_dir / "compressed"
             compressed_dir.mkdir(exist_ok=True)
 
-            compressed_file = compressed_dir / f"{audio_file.stem}_compressed.mp3"
+            compressed_file = compressed_dir / f"{Path(audio_file).stem}_compressed.mp3"
 
             cmd = [
                 "ffmpeg",
@@ -84,9 +90,12 @@ class AudioProcessor:
                 logger.error("Compressed audio file not created")
                 return None
 
-            original_size = audio_file.stat().st_size
             compressed_size = compressed_file.stat().st_size
-            logger.info(f"Audio compressed: {original_size / 1024 / 1024:.2f}MB -> {compressed_size / 1024 / 1024:.2f}MB")
+            if _is_url(audio_file):
+                logger.info(f"Audio compressed: {compressed_size / 1024 / 1024:.2f}MB")
+            else:
+                original_size = Path(audio_file).stat().st_size
+                logger.info(f"Audio compressed: {original_size / 1024 / 1024:.2f}MB -> {compressed_size / 1024 / 1024:.2f}MB")
 
             return compressed_file
 
@@ -94,12 +103,12 @@ class AudioProcessor:
             logger.exception(f"Error compressing audio: {e}")
             return None
 
-    def get_audio_duration(self, audio_file: Path) -> Optional[float]:
+    def get_audio_duration(self, audio_file: str | Path) -> Optional[float]:
         """
         获取音频文件的时长
 
         Args:
-            audio_file: 音频文件路径
+            audio_file: 音频文件路径或 URL（ffprobe 只读取文件头）
 
         Returns:
             音频时长（秒），失败返回None
@@ -141,14 +150,14 @@ class AudioProcessor:
         Extract audio from video file
 
         Args:
-            video_file: Video file path
+            video_file: Video file path, or URL streamed by ffmpeg
 
         Returns:
             Audio file path if successful, None otherwise
         """
         try:
             video_path = Path(video_file)
-            if not video_path.exists():
+            if not _is_url(video_file) and not video_path.exists():
                 logger.error(f"Video file not found: {video_path}")
                 return None
 
@@ -164,7 +173,7 @@ class AudioProcessor:
             cmd = [
                 "ffmpeg",
                 "-y",  # Overwrite output file
-                "-i", str(video_path),
+                "-i", str(video_file),
                 "-vn",  # 不处理视频
                 "-acodec", "libmp3lame",  # 使用MP3编码
                 "-b:a", "128k",  # 音频比特率128k（平衡质量和大小）
@@ -209,29 +218,54 @@ class AudioProcessor:
             转录文本，失败返回None
         """
         try:
-            # 从激活码解密的环境变量或配置文件获取API密钥
-            api_key = self._get_api_key()
-            if not api_key:
+            if not self._get_api_key():
                 logger.error("DashScope API key not configured. Please activate the software first.")
                 return None
 
-            # 更新 dashscope API 密钥
-            dashscope.api_key = api_key
-
             # DashScope only supports public URL, upload to MinIO first
             # Upload and get object name
             timestamp = int(audio_path.stat().st_mtime)
             object_name = f"{timestamp}_{audio_path.name}"
-            audio_url = minio_uploader.upload_file(
+            audio_url = get_minio_uploader().upload_file(
                 audio_path,
                 object_name=object_name,
-                folder="audios"
+                folder=AUDIO_FOLDER
             )
 
             if not audio_url:
                 logger.error("Failed to upload audio to MinIO")
                 return None
 
+        except Exception as e:
+            logger.exception(f"Error transcribing single audio file: {e}")
+            return None
+
+        try:
+            return self._transcribe_url(audio_url)
+        finally:
+            # DashScope has fetched the audio, let the sweeper delete it
+            get_minio_uploader().release_object(audio_url, audio_path.stat().st_size)
+
+    def _transcribe_url(self, audio_url: str) -> Optional[str]:
+        """
+        转录 MinIO 中的音频（内部方法）
+
+        Args:
+            audio_url: 音频对象的公开 URL
+
+        Returns:
+            转录文本，失败返回None
+        """
+        try:
+            # 从激活码解密的环境变量或配置文件获取API密钥
+            api_key = self._get_api_key()
+            if not api_key:
+                logger.error("DashScope API key not configured. Please activate the software first.")
+                return None
+
+            # 更新 dashscope API 密钥
+            dashscope.api_key = api_key
+
             # Test URL accessibility
             try:
                 import requests
@@ -368,7 +402,7 @@ class AudioProcessor:
             return text
 
         except Exception as e:
-            logger.exception(f"Error transcribing single audio file: {e}")
+            logger.exception(f"Error transcribing audio URL: {e}")
             return None
 
     def transcribe_audio(self, audio_file: str | Path) -> Optional[tuple[str, float]]:
@@ -470,6 +504,66 @@ class AudioProcessor:
             logger.exception(f"Error transcribing audio: {e}")
             return None
 
+    def transcribe_object(self, object_name: str, duration: Optional[float] = None) -> Optional[tuple[str, float]]:
+        """
+        转录客户端直传到 MinIO 的音频/视频对象
+
+        对象在 API 限制内的音频直接把 URL 交给 DashScope，后端不读取文件内容。
+        只有需要转码时（视频提取音轨，或超过 2GB/12 小时需要压缩）才由 ffmpeg
+        从 MinIO 流式读取，转码后的音频再上传。
+
+        Args:
+            object_name: MinIO 对象名（create_presigned_upload 返回）
+            duration: 已探测的时长（秒），None 时用 ffprobe 读取对象文件头
+
+        Returns:
+            (转录文本, 音频时长秒数) 元组，失败返回None
+        """
+        uploader = get_minio_uploader()
+        size = uploader.get_object_size(object_name)
+        if size is None:
+            logger.error(f"Object not found: {object_name}")
+            return None
+
+        object_url = uploader.get_object_url(object_name)
+        try:
+            if duration is None:
+                duration = self.get_audio_duration(object_url)
+            logger.info(f"Object size: {size / 1024 / 1024:.2f}MB, duration: {(duration or 0) / 60:.2f} minutes")
+
+            is_video = Path(object_name).suffix.lower() in settings.supported_video_formats
+            if not is_video and size <= self.MAX_FILE_SIZE and not (duration and duration > self.MAX_DURATION):
+                logger.info("Object is within limits, transcribing it in place")
+                text = self._transcribe_url(object_url)
+                return (text, duration) if text else None
+
+            # 需要转码：ffmpeg 直接读取对象 URL，不落盘原文件
+            if is_video:
+                logger.info("Extracting audio track from uploaded video...")
+                audio_file = self.extract_audio_from_video(object_url)
+            else:
+                logger.info("Compressing uploaded audio to meet API requirements...")
+                audio_file = self.compress_audio(object_url)
+            if not audio_file:
+                return None
+
+            try:
+                return self.transcribe_audio(audio_file)
+            finally:
+                try:
+                    audio_file.unlink()
+                except Exception as e:
+                    logger.warning(f"Failed to delete transcoded audio: {e}")
+
+        except Exception as e:
+            logger.exception(f"Error transcribing object {object_name}: {e}")
+            return None
+        finally:
+            # 转录完成后由清理任务删除客户端上传的对象
+            uploader.release_object(object_url, size)
+
 
-# Global processor instance
-audio_processor = AudioProcessor()
+@lru_cache()
+def get_audio_processor() -> AudioProcessor:
+    """Get the shared audio processor instance, created on first use"""
+    return AudioProcessor()
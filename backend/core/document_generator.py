@@ -1,54 +1,141 @@
-"""Document Generator - Generate DOCX and Markdown files"""
+"""Document Generator - Generate DOCX, Markdown, text, HTML and ODT files"""
+import html
+import io
+import itertools
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Literal, Optional
+from urllib.parse import quote
 
-from docx import Document
-from docx.shared import Pt, Inches
+from docx.shared import Emu, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from loguru import logger
 
 from config import settings
+from core.document_model import BlockDocument, BlockType
+from core.docx_writer import CONTENT_STYLE_NAME, StreamingDocxWriter, get_template
+from core.fanout import fan_out
+from core.odt_writer import StreamingOdtWriter
+from utils.output_files import OutputReservation, output_names
+
+# Bullet list styles, by nesting depth
+LIST_STYLES = ("List Bullet", "List Bullet 2", "List Bullet 3")
+
+OutputFormat = Literal["docx", "md", "txt", "html", "odt"]
+OUTPUT_EXTENSIONS = {"docx": ".docx", "md": ".md", "txt": ".txt", "html": ".html", "odt": ".odt"}
+
+HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>body {{ font-family: Arial, sans-serif; max-width: 50em; margin: 2em auto; line-height: 1.5; }}</style>
+</head>
+<body>
+"""
+HTML_END = "\n</body>\n</html>\n"
 
 
 class DocumentGenerator:
-    """Document Generator for DOCX and Markdown"""
+    """Document Generator for DOCX, Markdown, text, HTML and ODT"""
 
-    def _get_unique_filename(self, output_dir: Path, base_filename: str) -> str:
+    def _split_first_document(
+        self,
+        content: str | BlockDocument | Iterable[str | BlockDocument]
+    ) -> tuple[BlockDocument, Iterator[BlockDocument]]:
+        """
+        Get the first non-empty document of the content
+
+        Content is either a whole text/document or an iterable of them (e.g.
+        EPUB chapters) consumed as they are produced. Plain text is turned
+        into paragraphs. The first document is needed up front for the
+        empty check and the default filename.
+
+        Args:
+            content: Text content, structured document, or iterable of either
+
+        Returns:
+            (first non-empty document or an empty one, iterator over all documents)
+        """
+        if isinstance(content, (str, BlockDocument)):
+            content = [content]
+
+        documents = (
+            BlockDocument.from_text(chunk) if isinstance(chunk, str) else chunk
+            for chunk in content
+        )
+        for document in documents:
+            if len(document):
+                return document, itertools.chain([document], documents)
+        return BlockDocument(), iter([])
+
+    def iter_documents(self, content: str | BlockDocument | Iterable[str | BlockDocument]) -> Iterator[BlockDocument]:
+        """
+        Iterate the content as structured documents
+
+        Args:
+            content: Text content, structured document, or iterable of either
+
+        Returns:
+            Iterator over the documents
+        """
+        _, documents = self._split_first_document(content)
+        return documents
+
+    def _get_styles(self, doc) -> dict:
         """
-        Get unique filename by adding (1), (2), etc. if file already exists
+        Look up the styles used for content once per document
+
+        Styles missing from a custom template fall back to Normal (None).
 
         Args:
-            output_dir: Output directory
-            base_filename: Base filename with extension
+            doc: python-docx Document
 
         Returns:
-            Unique filename
+            {"title": style, "headings": {level: style}, "lists": [style], "content": style}
         """
-        output_path = output_dir / base_filename
+        def get_style(name):
+            try:
+                return doc.styles[name]
+            except KeyError:
+                return None
 
-        # 如果文件不存在，直接返回原文件名
-        if not output_path.exists():
-            return base_filename
+        lists = [style for style in map(get_style, LIST_STYLES) if style is not None]
+        return {
+            "title": get_style("Title"),
+            "headings": {level: get_style(f"Heading {level}") for level in range(1, 10)},
+            "lists": lists or [None],
+            "content": get_style(CONTENT_STYLE_NAME),
+        }
 
-        # 分离文件名和扩展名
-        name_part = base_filename.rsplit('.', 1)[0]
-        ext_part = '.' + base_filename.rsplit('.', 1)[1] if '.' in base_filename else ''
+    def _add_blocks(self, doc, styles: dict, document: BlockDocument, image_pipeline=None):
+        """
+        Add the blocks of a structured document to a DOCX document
 
-        # 尝试添加数字后缀
-        counter = 1
-        while True:
-            new_filename = f"{name_part}({counter}){ext_part}"
-            new_path = output_dir / new_filename
-            if not new_path.exists():
-                return new_filename
-            counter += 1
+        Headings become Word headings (with outline levels, so they show up in
+        the navigation pane and table of contents), list items use the bullet
+        list styles, text runs use the content character style. Images are
+        embedded if an image pipeline is given.
 
-            # 防止无限循环，最多尝试1000次
-            if counter > 1000:
-                import time
-                timestamp = int(time.time())
-                return f"{name_part}_{timestamp}{ext_part}"
+        Args:
+            doc: python-docx Document
+            styles: Styles from _get_styles
+            document: Structured document
+            image_pipeline: ImagePipeline for the document's images (images are skipped if None)
+        """
+        for block_type, level, text in document:
+            if block_type == BlockType.HEADING:
+                doc.add_paragraph(text, style=styles["headings"][max(1, min(level, 9))])
+            elif block_type == BlockType.IMAGE:
+                image = image_pipeline.get(text) if image_pipeline else None
+                if image:
+                    doc.add_picture(io.BytesIO(image_pipeline.read(image)), width=Inches(image.width_inches))
+            elif block_type == BlockType.LIST_ITEM:
+                list_styles = styles["lists"]
+                paragraph = doc.add_paragraph(style=list_styles[max(1, min(level, len(list_styles))) - 1])
+                paragraph.add_run(text, style=styles["content"])
+            else:
+                doc.add_paragraph().add_run(text, style=styles["content"])
 
     def _clean_filename(self, filename: str) -> str:
         """
@@ -70,102 +157,248 @@ class DocumentGenerator:
             cleaned = cleaned[:100]
         return cleaned
 
+    def _get_output_filename(
+        self,
+        first_document: BlockDocument,
+        output_filename: Optional[str],
+        extension: str,
+        max_title_chars: Optional[int] = None
+    ) -> str:
+        """
+        Get the output filename, from the first line of the content if not given
+
+        Args:
+            first_document: First non-empty document of the content
+            output_filename: Requested filename (auto-generate if None)
+            extension: Extension to ensure, e.g. ".md"
+            max_title_chars: Max characters taken from the first line
+
+        Returns:
+            Filename with extension
+        """
+        if not output_filename:
+            # 尝试从内容的第一行提取标题作为文件名
+            first_line = first_document.first_text().strip()
+            # 移除开头的Markdown标题符号（#）
+            title_text = first_line.replace('#', '').strip()
+            # 清理文件名中的非法字符
+            clean_title = self._clean_filename(title_text)
+            if max_title_chars:
+                clean_title = clean_title[:max_title_chars]
+
+            if clean_title:
+                output_filename = f"{clean_title}{extension}"
+            else:
+                # 如果第一行为空或太短，使用时间戳
+                timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+                output_filename = f"document_{timestamp_str}{extension}"
+
+        # Ensure extension
+        if not output_filename.endswith(extension):
+            output_filename += extension
+        return output_filename
+
+    def _reserve_output(self, output_dir: Optional[str], output_filename: str) -> OutputReservation:
+        """
+        Reserve a unique filename in the output directory to avoid overwriting existing files
+
+        Args:
+            output_dir: Custom output directory (use default if None)
+            output_filename: Filename with extension
+
+        Returns:
+            Reservation to write the file through
+        """
+        # Determine output directory
+        if output_dir:
+            output_base_dir = Path(output_dir)
+        else:
+            output_base_dir = settings.output_dir
+
+        # Create directory if it doesn't exist
+        output_base_dir.mkdir(parents=True, exist_ok=True)
+
+        return output_names.reserve(output_base_dir, output_filename)
+
     def generate_docx(
         self,
-        content: str,
+        content: str | BlockDocument | Iterable[str | BlockDocument],
         title: Optional[str] = None,
         output_filename: Optional[str] = None,
-        output_dir: Optional[str] = None
+        output_dir: Optional[str] = None,
+        images=None,
+        template_path: Optional[str] = None
     ) -> Optional[Path]:
         """
         Generate DOCX document from text content
 
         Args:
-            content: Text content
+            content: Text content or structured document, or an iterable of them written as they arrive
             title: Document title
             output_filename: Output filename (auto-generate if None)
             output_dir: Custom output directory (use default if None)
+            images: Reader of the images referenced by image blocks (e.g. EPUBImageReader), images are skipped if None
+            template_path: .docx/.dotx template for styles and page setup (use configured template if None)
 
         Returns:
             Output file path if successful, None otherwise
         """
         try:
-            if not content:
+            first_document, documents = self._split_first_document(content)
+            if not len(first_document):
                 logger.error("Empty content provided")
                 return None
 
-            # Create document
-            doc = Document()
+            # DOCX文件名只取前10个字符
+            output_filename = self._get_output_filename(first_document, output_filename, ".docx", max_title_chars=10)
+            reservation = self._reserve_output(output_dir, output_filename)
+
+            # Write to a temporary file, renamed to the reserved name when complete
+            with reservation:
+                if settings.docx_writer == "streaming":
+                    self._write_docx_streaming(reservation.temp_path, first_document, documents, title, images, template_path)
+                else:
+                    self._write_docx_python_docx(reservation.temp_path, first_document, documents, title, images, template_path)
+
+            output_path = reservation.path
+            logger.info(f"DOCX document generated: {output_path}")
+            return output_path
 
+        except Exception as e:
+            logger.exception(f"Error generating DOCX: {e}")
+            return None
+
+    def _iter_with_images(
+        self,
+        first_document: BlockDocument,
+        documents: Iterator[BlockDocument],
+        image_pipeline
+    ) -> Iterator[BlockDocument]:
+        """
+        Iterate documents, downscaling the images of the next one while the current one is written
+
+        Args:
+            first_document: First document (already at the head of documents)
+            documents: All documents
+            image_pipeline: ImagePipeline, or None to just iterate
+        """
+        if image_pipeline is None:
+            yield from documents
+            return
+
+        image_pipeline.prefetch(first_document.image_paths())
+        document = next(documents, None)
+        while document is not None:
+            next_document = next(documents, None)
+            if next_document is not None:
+                image_pipeline.prefetch(next_document.image_paths())
+            yield document
+            document = next_document
+
+    def _log_image_stats(self, image_pipeline):
+        """Log image deduplication and downscaling results"""
+        stats = image_pipeline.get_stats()
+        if stats["references"]:
+            logger.info(
+                f"Images: {stats['references']} references, {stats['unique']} unique, "
+                f"{stats['downscaled']} downscaled, "
+                f"{stats['source_bytes'] / 1024 / 1024:.1f}MB -> {stats['output_bytes'] / 1024 / 1024:.1f}MB"
+            )
+
+    def _write_docx_streaming(
+        self,
+        output_path: Path,
+        first_document: BlockDocument,
+        documents: Iterator[BlockDocument],
+        title: Optional[str],
+        images,
+        template_path: Optional[str]
+    ):
+        """
+        Write a DOCX file block by block with the streaming writer
+
+        Memory stays flat regardless of document size; a partial file is
+        removed on error.
+        """
+        writer = StreamingDocxWriter(output_path, get_template(template_path))
+        image_pipeline = None
+        try:
             # Add title if provided
             if title:
-                heading = doc.add_heading(title, 0)
-                heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                writer.add_title(title)
 
             # Add timestamp
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            doc.add_paragraph(f"Generated at: {timestamp}")
-            doc.add_paragraph()  # Empty line
+            writer.add_paragraph(f"Generated at: {timestamp}", content=False)
+            writer.add_paragraph()  # Empty line
 
             # Add content
-            # Split content by paragraphs
-            paragraphs = content.split('\n')
-            for para_text in paragraphs:
-                if para_text.strip():
-                    paragraph = doc.add_paragraph(para_text.strip())
-                    # Set font
-                    for run in paragraph.runs:
-                        run.font.size = Pt(12)
-                        run.font.name = 'Arial'
-
-            # Generate output filename if not provided
-            if not output_filename:
-                # 尝试从内容的第一行提取标题作为文件名
-                first_line = content.split('\n')[0].strip() if content else ""
-                # 移除开头的Markdown标题符号（#）
-                title_text = first_line.replace('#', '').strip()
-                # 清理文件名中的非法字符
-                clean_title = self._clean_filename(title_text)
-
-                if clean_title and len(clean_title) > 0:
-                    # DOCX文件名只取前10个字符
-                    short_title = clean_title[:10] if len(clean_title) > 10 else clean_title
-                    output_filename = f"{short_title}.docx"
-                else:
-                    # 如果第一行为空或太短，使用时间戳
-                    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    output_filename = f"document_{timestamp_str}.docx"
+            if images is not None:
+                from core.image_processor import ImagePipeline
+                image_pipeline = ImagePipeline(images, max_width_inches=writer.content_width_inches)
 
-            # Ensure .docx extension
-            if not output_filename.endswith('.docx'):
-                output_filename += '.docx'
+            for document in self._iter_with_images(first_document, documents, image_pipeline):
+                writer.add_document(document, image_pipeline)
 
-            # Determine output directory
-            if output_dir:
-                output_base_dir = Path(output_dir)
-            else:
-                output_base_dir = settings.output_dir
+            writer.close()
+        except Exception:
+            writer.abort()
+            raise
+        finally:
+            if image_pipeline:
+                image_pipeline.close()
 
-            # Create directory if it doesn't exist
-            output_base_dir.mkdir(parents=True, exist_ok=True)
+        if image_pipeline:
+            self._log_image_stats(image_pipeline)
 
-            # Get unique filename to avoid overwriting existing files
-            unique_filename = self._get_unique_filename(output_base_dir, output_filename)
+    def _write_docx_python_docx(
+        self,
+        output_path: Path,
+        first_document: BlockDocument,
+        documents: Iterator[BlockDocument],
+        title: Optional[str],
+        images,
+        template_path: Optional[str]
+    ):
+        """Build the whole DOCX document with python-docx, then save it"""
+        # Create document from the cached template
+        doc = get_template(template_path).new_document()
+        styles = self._get_styles(doc)
+
+        # Add title if provided
+        if title:
+            heading = doc.add_paragraph(title, style=styles["title"])
+            heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+        # Add timestamp
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        doc.add_paragraph(f"Generated at: {timestamp}")
+        doc.add_paragraph()  # Empty line
+
+        # Add content
+        image_pipeline = None
+        if images is not None:
+            from core.image_processor import ImagePipeline
+
+            section = doc.sections[-1]
+            content_width = Emu(section.page_width - section.left_margin - section.right_margin)
+            image_pipeline = ImagePipeline(images, max_width_inches=content_width.inches)
 
-            # Save to output directory
-            output_path = output_base_dir / unique_filename
-            doc.save(str(output_path))
+        try:
+            for document in self._iter_with_images(first_document, documents, image_pipeline):
+                self._add_blocks(doc, styles, document, image_pipeline)
+        finally:
+            if image_pipeline:
+                image_pipeline.close()
 
-            logger.info(f"DOCX document generated: {output_path}")
-            return output_path
+        if image_pipeline:
+            self._log_image_stats(image_pipeline)
 
-        except Exception as e:
-            logger.exception(f"Error generating DOCX: {e}")
-            return None
+        doc.save(str(output_path))
 
     def generate_markdown(
         self,
-        content: str,
+        content: str | BlockDocument | Iterable[str | BlockDocument],
         title: Optional[str] = None,
         output_filename: Optional[str] = None,
         output_dir: Optional[str] = None
@@ -174,7 +407,7 @@ class DocumentGenerator:
         Generate Markdown file from text content
 
         Args:
-            content: Text content
+            content: Text content or structured document, or an iterable of them written as they arrive
             title: Document title
             output_filename: Output filename (auto-generate if None)
             output_dir: Custom output directory (use default if None)
@@ -183,11 +416,12 @@ class DocumentGenerator:
             Output file path if successful, None otherwise
         """
         try:
-            if not content:
+            first_document, documents = self._split_first_document(content)
+            if not len(first_document):
                 logger.error("Empty content provided")
                 return None
 
-            # Build markdown content
+            # Build markdown header
             md_parts = []
 
             # Add title if provided
@@ -199,52 +433,334 @@ class DocumentGenerator:
             md_parts.append(f"*Generated at: {timestamp}*\n")
             md_parts.append("---\n")
 
-            # Add content
-            md_parts.append(content)
+            md_header = "\n".join(md_parts)
+
+            output_filename = self._get_output_filename(first_document, output_filename, ".md")
+            reservation = self._reserve_output(output_dir, output_filename)
+
+            # Write content document by document, separated by blank lines, to a
+            # temporary file renamed when complete (no truncated file is left behind)
+            with reservation:
+                with open(reservation.temp_path, 'w', encoding='utf-8') as f:
+                    f.write(md_header)
+                    f.write("\n")
+                    for index, document in enumerate(documents):
+                        if index:
+                            f.write("\n\n")
+                        f.write(document.to_markdown())
 
-            md_content = "\n".join(md_parts)
+            output_path = reservation.path
+            logger.info(f"Markdown file generated: {output_path}")
+            return output_path
 
-            # Generate output filename if not provided
-            if not output_filename:
-                # 尝试从内容的第一行提取标题作为文件名
-                first_line = content.split('\n')[0].strip() if content else ""
-                # 移除开头的Markdown标题符号（#）
-                title_text = first_line.replace('#', '').strip()
-                # 清理文件名中的非法字符
-                clean_title = self._clean_filename(title_text)
+        except Exception as e:
+            logger.exception(f"Error generating Markdown: {e}")
+            return None
 
-                if clean_title and len(clean_title) > 0:
-                    output_filename = f"{clean_title}.md"
+    def generate_text(
+        self,
+        content: str | BlockDocument | Iterable[str | BlockDocument],
+        title: Optional[str] = None,
+        output_filename: Optional[str] = None,
+        output_dir: Optional[str] = None
+    ) -> Optional[Path]:
+        """
+        Generate plain text file from text content
+
+        Args:
+            content: Text content or structured document, or an iterable of them written as they arrive
+            title: Document title
+            output_filename: Output filename (auto-generate if None)
+            output_dir: Custom output directory (use default if None)
+
+        Returns:
+            Output file path if successful, None otherwise
+        """
+        try:
+            first_document, documents = self._split_first_document(content)
+            if not len(first_document):
+                logger.error("Empty content provided")
+                return None
+
+            output_filename = self._get_output_filename(first_document, output_filename, ".txt")
+            reservation = self._reserve_output(output_dir, output_filename)
+
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            with reservation:
+                with open(reservation.temp_path, 'w', encoding='utf-8') as f:
+                    if title:
+                        f.write(f"{title}\n\n")
+                    f.write(f"Generated at: {timestamp}\n\n")
+                    for index, document in enumerate(documents):
+                        if index:
+                            f.write("\n\n")
+                        f.write(document.to_text())
+                    f.write("\n")
+
+            output_path = reservation.path
+            logger.info(f"Text file generated: {output_path}")
+            return output_path
+
+        except Exception as e:
+            logger.exception(f"Error generating text file: {e}")
+            return None
+
+    def generate_html(
+        self,
+        content: str | BlockDocument | Iterable[str | BlockDocument],
+        title: Optional[str] = None,
+        output_filename: Optional[str] = None,
+        output_dir: Optional[str] = None
+    ) -> Optional[Path]:
+        """
+        Generate HTML file from text content
+
+        Args:
+            content: Text content or structured document, or an iterable of them written as they arrive
+            title: Document title
+            output_filename: Output filename (auto-generate if None)
+            output_dir: Custom output directory (use default if None)
+
+        Returns:
+            Output file path if successful, None otherwise
+        """
+        try:
+            first_document, documents = self._split_first_document(content)
+            if not len(first_document):
+                logger.error("Empty content provided")
+                return None
+
+            output_filename = self._get_output_filename(first_document, output_filename, ".html")
+            reservation = self._reserve_output(output_dir, output_filename)
+
+            page_title = html.escape(title or first_document.first_text().strip())
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            with reservation:
+                with open(reservation.temp_path, 'w', encoding='utf-8') as f:
+                    f.write(HTML_HEAD.format(title=page_title))
+                    if title:
+                        f.write(f"<h1>{html.escape(title)}</h1>\n")
+                    f.write(f"<p><em>Generated at: {timestamp}</em></p>\n<hr>\n")
+                    for document in documents:
+                        f.write(document.to_html())
+                        f.write("\n")
+                    f.write(HTML_END)
+
+            output_path = reservation.path
+            logger.info(f"HTML file generated: {output_path}")
+            return output_path
+
+        except Exception as e:
+            logger.exception(f"Error generating HTML: {e}")
+            return None
+
+    def generate_odt(
+        self,
+        content: str | BlockDocument | Iterable[str | BlockDocument],
+        title: Optional[str] = None,
+        output_filename: Optional[str] = None,
+        output_dir: Optional[str] = None
+    ) -> Optional[Path]:
+        """
+        Generate ODT (OpenDocument Text) document from text content
+
+        Args:
+            content: Text content or structured document, or an iterable of them written as they arrive
+            title: Document title
+            output_filename: Output filename (auto-generate if None)
+            output_dir: Custom output directory (use default if None)
+
+        Returns:
+            Output file path if successful, None otherwise
+        """
+        try:
+            first_document, documents = self._split_first_document(content)
+            if not len(first_document):
+                logger.error("Empty content provided")
+                return None
+
+            # 与DOCX一致，文件名只取前10个字符
+            output_filename = self._get_output_filename(first_document, output_filename, ".odt", max_title_chars=10)
+            reservation = self._reserve_output(output_dir, output_filename)
+
+            with reservation:
+                writer = StreamingOdtWriter(reservation.temp_path, title or "")
+                try:
+                    if title:
+                        writer.add_title(title)
+
+                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    writer.add_paragraph(f"Generated at: {timestamp}")
+                    writer.add_paragraph()  # Empty line
+
+                    for document in documents:
+                        writer.add_document(document)
+                    writer.close()
+                except Exception:
+                    writer.abort()
+                    raise
+
+            output_path = reservation.path
+            logger.info(f"ODT document generated: {output_path}")
+            return output_path
+
+        except Exception as e:
+            logger.exception(f"Error generating ODT: {e}")
+            return None
+
+    def generate(
+        self,
+        content: str | BlockDocument | Iterable[str | BlockDocument],
+        output_formats: list[OutputFormat],
+        title: Optional[str] = None,
+        output_filename: Optional[str] = None,
+        output_dir: Optional[str] = None,
+        images=None,
+        template_path: Optional[str] = None
+    ) -> dict[str, Optional[Path]]:
+        """
+        Generate several output formats from one pass over the content
+
+        The content (e.g. streamed EPUB chapters or PDF pages) is read once
+        and fed to all generators, which run concurrently; extraction is
+        never repeated per format.
+
+        Args:
+            content: Text content or structured document, or an iterable of them
+            output_formats: Formats to generate (docx, md, txt, html, odt)
+            title: Document title
+            output_filename: Output filename without extension (auto-generate per format if None)
+            output_dir: Custom output directory (use default if None)
+            images: Image reader for DOCX output (see generate_docx)
+            template_path: Template for DOCX output (see generate_docx)
+
+        Returns:
+            Output file path (None if failed) per format, in the requested order
+        """
+        output_formats = list(dict.fromkeys(output_formats))
+
+        if output_filename:
+            # The same name for every format: drop an extension given for one of them
+            stem, dot, extension = output_filename.rpartition(".")
+            if dot and stem and f".{extension.lower()}" in OUTPUT_EXTENSIONS.values():
+                output_filename = stem
+
+        def make_generator(output_format: OutputFormat):
+            def generate(documents):
+                if output_format == "docx":
+                    return self.generate_docx(documents, title, output_filename, output_dir, images, template_path)
+                elif output_format == "md":
+                    return self.generate_markdown(documents, title, output_filename, output_dir)
+                elif output_format == "txt":
+                    return self.generate_text(documents, title, output_filename, output_dir)
+                elif output_format == "html":
+                    return self.generate_html(documents, title, output_filename, output_dir)
                 else:
-                    # 如果第一行为空或太短，使用时间戳
-                    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    output_filename = f"document_{timestamp_str}.md"
+                    return self.generate_odt(documents, title, output_filename, output_dir)
+            return generate
 
-            # Ensure .md extension
-            if not output_filename.endswith('.md'):
-                output_filename += '.md'
+        generators = [make_generator(output_format) for output_format in output_formats]
+        if len(generators) == 1:
+            return {output_formats[0]: generators[0](content)}
 
-            # Determine output directory
-            if output_dir:
-                output_base_dir = Path(output_dir)
-            else:
-                output_base_dir = settings.output_dir
+        first_document, documents = self._split_first_document(content)
+        if not len(first_document):
+            logger.error("Empty content provided")
+            return {output_format: None for output_format in output_formats}
 
-            # Create directory if it doesn't exist
-            output_base_dir.mkdir(parents=True, exist_ok=True)
+        logger.debug(f"Generating {', '.join(output_formats)} from one extraction")
+        results = fan_out(documents, generators, buffer=settings.output_fanout_buffer)
+        return dict(zip(output_formats, results))
 
-            # Get unique filename to avoid overwriting existing files
-            unique_filename = self._get_unique_filename(output_base_dir, output_filename)
+    def generate_index(
+        self,
+        volumes: list[tuple[str, Path]],
+        output_format: OutputFormat,
+        title: Optional[str] = None,
+        output_filename: Optional[str] = None,
+        output_dir: Optional[str] = None
+    ) -> Optional[Path]:
+        """
+        Generate an index document linking to volumes in the same directory
 
-            # Save to output directory
-            output_path = output_base_dir / unique_filename
-            output_path.write_text(md_content, encoding='utf-8')
+        Args:
+            volumes: (label, file path) per volume, in order
+            output_format: Index format
+            title: Document title
+            output_filename: Output filename (auto-generate if None)
+            output_dir: Output directory of the volumes (use default if None)
 
-            logger.info(f"Markdown file generated: {output_path}")
+        Returns:
+            Output file path if successful, None otherwise
+        """
+        try:
+            extension = OUTPUT_EXTENSIONS[output_format]
+            first_document = BlockDocument.from_text(title or "index")
+            output_filename = self._get_output_filename(first_document, output_filename, extension)
+            reservation = self._reserve_output(output_dir, output_filename)
+
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            generated = f"Generated at: {timestamp}, {len(volumes)} volumes"
+            # Links relative to the index file
+            links = [(label, quote(path.name)) for label, path in volumes]
+
+            with reservation:
+                if output_format == "docx":
+                    writer = StreamingDocxWriter(reservation.temp_path, get_template())
+                    try:
+                        if title:
+                            writer.add_title(title)
+                        writer.add_paragraph(generated, content=False)
+                        writer.add_paragraph()
+                        for label, target in links:
+                            writer.add_link(label, target)
+                        writer.close()
+                    except Exception:
+                        writer.abort()
+                        raise
+                elif output_format == "odt":
+                    writer = StreamingOdtWriter(reservation.temp_path, title or "")
+                    try:
+                        if title:
+                            writer.add_title(title)
+                        writer.add_paragraph(generated)
+                        writer.add_paragraph()
+                        for label, target in links:
+                            # ODF resolves relative links from inside the package
+                            writer.add_link(label, f"../{target}")
+                        writer.close()
+                    except Exception:
+                        writer.abort()
+                        raise
+                else:
+                    with open(reservation.temp_path, 'w', encoding='utf-8') as f:
+                        if output_format == "md":
+                            if title:
+                                f.write(f"# {title}\n\n")
+                            f.write(f"*{generated}*\n\n")
+                            f.writelines(f"- [{label}]({target})\n" for label, target in links)
+                        elif output_format == "html":
+                            f.write(HTML_HEAD.format(title=html.escape(title or "")))
+                            if title:
+                                f.write(f"<h1>{html.escape(title)}</h1>\n")
+                            f.write(f"<p><em>{generated}</em></p>\n<ul>\n")
+                            f.writelines(
+                                f'<li><a href="{html.escape(target)}">{html.escape(label)}</a></li>\n'
+                                for label, target in links
+                            )
+                            f.write("</ul>" + HTML_END)
+                        else:
+                            if title:
+                                f.write(f"{title}\n\n")
+                            f.write(f"{generated}\n\n")
+                            f.writelines(f"{label}: {path.name}\n" for label, path in volumes)
+
+            output_path = reservation.path
+            logger.info(f"Volume index generated: {output_path}")
             return output_path
 
         except Exception as e:
-            logger.exception(f"Error generating Markdown: {e}")
+            logger.exception(f"Error generating volume index: {e}")
             return None
 
 
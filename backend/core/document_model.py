@@ -0,0 +1,179 @@
+"""Document Model - Compact structured text passed from extractors to generators"""
+import html
+from array import array
+from enum import IntEnum
+from typing import Iterator, Optional
+
+
+class BlockType(IntEnum):
+    """Block types"""
+    PARAGRAPH = 0
+    HEADING = 1  # level 1-6
+    LIST_ITEM = 2  # level = list nesting depth, from 1
+    IMAGE = 3  # text = image path inside the source (e.g. EPUB zip member)
+
+
+class BlockDocument:
+    """
+    Compact structured document
+
+    Blocks are stored column-wise in typed arrays (type, level, end offset)
+    with their text concatenated in one shared buffer, so a block costs 6
+    bytes plus its characters instead of a Python string object per line.
+    Extractors produce one BlockDocument per chapter; generators consume them.
+    """
+
+    __slots__ = ("_types", "_levels", "_ends", "_parts", "_length")
+
+    def __init__(self):
+        self._types = array("B")
+        self._levels = array("B")
+        self._ends = array("I")
+        # Text buffer, joined into a single string on first read
+        self._parts: list[str] = []
+        self._length = 0
+
+    def add(self, block_type: BlockType, text: str, level: int = 0):
+        """
+        Append a block
+
+        Args:
+            block_type: Block type
+            text: Block text (empty blocks are skipped)
+            level: Heading level or list depth
+        """
+        if not text:
+            return
+
+        self._parts.append(text)
+        self._length += len(text)
+        self._types.append(block_type)
+        self._levels.append(min(level, 255))
+        self._ends.append(self._length)
+
+    @property
+    def text(self) -> str:
+        """All block text as one string, without separators"""
+        if len(self._parts) != 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0]
+
+    @property
+    def char_count(self) -> int:
+        """Characters of all block text"""
+        return self._length
+
+    @property
+    def first_type(self) -> Optional[BlockType]:
+        """Type of the first block, None if empty"""
+        return BlockType(self._types[0]) if self._types else None
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __iter__(self) -> Iterator[tuple[BlockType, int, str]]:
+        """Iterate blocks as (type, level, text)"""
+        text = self.text
+        start = 0
+        for block_type, level, end in zip(self._types, self._levels, self._ends):
+            yield BlockType(block_type), level, text[start:end]
+            start = end
+
+    def first_text(self) -> str:
+        """Text of the first text (non-image) block, empty string if there are none"""
+        for block_type, _, block_text in self:
+            if block_type != BlockType.IMAGE:
+                return block_text
+        return ""
+
+    def image_paths(self) -> list[str]:
+        """Paths of the image blocks, in document order"""
+        return [block_text for block_type, _, block_text in self if block_type == BlockType.IMAGE]
+
+    def to_text(self) -> str:
+        """Plain text with one line per text block (images are left out)"""
+        return "\n".join(block_text for block_type, _, block_text in self if block_type != BlockType.IMAGE)
+
+    def to_markdown(self) -> str:
+        """Markdown with headings and (nested) bullet lists, blocks separated by blank lines (images are left out)"""
+        lines = []
+        previous_type = None
+        for block_type, level, block_text in self:
+            if block_type == BlockType.IMAGE:
+                continue
+            # Consecutive list items form one list
+            if lines and not (block_type == previous_type == BlockType.LIST_ITEM):
+                lines.append("")
+
+            if block_type == BlockType.HEADING:
+                lines.append(f"{'#' * max(1, min(level, 6))} {block_text}")
+            elif block_type == BlockType.LIST_ITEM:
+                lines.append(f"{'  ' * max(0, level - 1)}- {block_text}")
+            else:
+                lines.append(block_text)
+            previous_type = block_type
+        return "\n".join(lines)
+
+    def to_html(self) -> str:
+        """HTML with headings, paragraphs and nested bullet lists (images are left out)"""
+        parts = []
+        depth = 0  # open <ul> levels
+        for block_type, level, block_text in self:
+            if block_type == BlockType.IMAGE:
+                continue
+            text = html.escape(block_text, quote=False)
+            if block_type == BlockType.LIST_ITEM:
+                level = max(1, level)
+                if depth >= level:
+                    parts.append("</li>")
+                while depth > level:
+                    parts.append("</ul></li>")
+                    depth -= 1
+                while depth < level:
+                    parts.append("<ul>")
+                    depth += 1
+                    # Skipped nesting levels get an empty item
+                    if depth < level:
+                        parts.append("<li>")
+                parts.append(f"<li>{text}")
+                continue
+
+            # Close open lists
+            if depth:
+                parts.append("</li>" + "</ul></li>" * (depth - 1) + "</ul>")
+                depth = 0
+            if block_type == BlockType.HEADING:
+                tag = f"h{max(1, min(level, 6))}"
+                parts.append(f"<{tag}>{text}</{tag}>")
+            else:
+                parts.append(f"<p>{text}</p>")
+        if depth:
+            parts.append("</li>" + "</ul></li>" * (depth - 1) + "</ul>")
+        return "\n".join(parts)
+
+    def __getstate__(self):
+        # Pickle the compacted buffer (sent back from parsing worker processes)
+        return self._types, self._levels, self._ends, self.text
+
+    def __setstate__(self, state):
+        self._types, self._levels, self._ends, text = state
+        self._parts = [text]
+        self._length = len(text)
+
+    @classmethod
+    def from_text(cls, text: str) -> "BlockDocument":
+        """
+        Build a document from plain text, one paragraph per non-empty line
+
+        Args:
+            text: Plain text (e.g. a transcript)
+
+        Returns:
+            Document of paragraphs
+        """
+        document = cls()
+        for line in text.split("\n"):
+            line = line.strip()
+            if line:
+                document.add(BlockType.PARAGRAPH, line)
+        return document
@@ -0,0 +1,459 @@
+"""DOCX Writer - Cached templates and streaming DOCX output"""
+import hashlib
+import io
+import re
+import shutil
+import tempfile
+import zipfile
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+from xml.sax.saxutils import escape
+
+import docx
+from lxml import etree
+
+from config import settings
+from core.document_model import BlockDocument, BlockType
+
+W_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NAMESPACE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+RELS_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/content-types"
+IMAGE_RELATIONSHIP = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+HYPERLINK_RELATIONSHIP = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"
+
+# Template bundled with python-docx (what docx.Document() starts from), located without its private API
+DEFAULT_TEMPLATE = Path(docx.__file__).parent / "templates" / "default.docx"
+
+DOCUMENT_PART = "word/document.xml"
+DOCUMENT_RELS_PART = "word/_rels/document.xml.rels"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+# Main part content types: templates (.dotx) are written out as documents
+DOCUMENT_CONTENT_TYPE = b"application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"
+TEMPLATE_CONTENT_TYPE = b"application/vnd.openxmlformats-officedocument.wordprocessingml.template.main+xml"
+
+# Image format -> (file extension, content type)
+IMAGE_TYPES = {
+    "JPEG": ("jpeg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "GIF": ("gif", "image/gif"),
+    "BMP": ("bmp", "image/bmp"),
+    "TIFF": ("tiff", "image/tiff"),
+}
+
+# Character style carrying the content font, declared once in styles.xml
+CONTENT_STYLE_ID = "ToDocxContent"
+CONTENT_STYLE_NAME = "To-Docx Content"
+CONTENT_STYLE = (
+    f'<w:style xmlns:w="{W_NAMESPACE}" w:type="character" w:customStyle="1" w:styleId="{CONTENT_STYLE_ID}">'
+    f'<w:name w:val="{CONTENT_STYLE_NAME}"/><w:basedOn w:val="DefaultParagraphFont"/><w:uiPriority w:val="1"/><w:qFormat/>'
+    '<w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial" w:cs="Arial"/><w:sz w:val="24"/><w:szCs w:val="24"/></w:rPr>'
+    '</w:style>'
+)
+
+DOCUMENT_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:document xmlns:w="{W_NAMESPACE}" xmlns:r="{R_NAMESPACE}"'
+    ' xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"'
+    ' xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+    ' xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+    '<w:body>'
+)
+DOCUMENT_END = '</w:body></w:document>'
+
+PICTURE = (
+    '<w:p><w:r><w:drawing><wp:inline distT="0" distB="0" distL="0" distR="0">'
+    '<wp:extent cx="{cx}" cy="{cy}"/><wp:docPr id="{id}" name="Picture {id}"/>'
+    '<wp:cNvGraphicFramePr><a:graphicFrameLocks noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+    '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture"><pic:pic>'
+    '<pic:nvPicPr><pic:cNvPr id="0" name="{name}"/><pic:cNvPicPr/></pic:nvPicPr>'
+    '<pic:blipFill><a:blip r:embed="{rel_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+    '<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm><a:prstGeom prst="rect"/></pic:spPr>'
+    '</pic:pic></a:graphicData></a:graphic></wp:inline></w:drawing></w:r></w:p>'
+)
+
+EMU_PER_INCH = 914400
+TWIPS_PER_INCH = 1440
+
+# Characters not allowed in XML 1.0
+_INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+# Flush document.xml to its staging file in chunks of about this many characters
+FLUSH_CHARS = 256 * 1024
+
+
+def _attribute(value: str) -> str:
+    """Escape an XML attribute value"""
+    return escape(value, {'"': "&quot;"})
+
+
+class DocxTemplate:
+    """
+    Base package a streamed document is written into
+
+    Holds every part of a .docx/.dotx template except the document body,
+    with the content font style added to styles.xml (unless the template
+    defines it), and resolves style names to the template's style IDs.
+    Styles, page setup, headers and footers come from the template; its
+    body content is not copied.
+
+    Instances are immutable once loaded and shared by all jobs; load them
+    through get_template().
+    """
+
+    def __init__(self, template_path: Optional[Path] = None):
+        """
+        Load a template
+
+        Args:
+            template_path: .docx/.dotx template (use python-docx's default template if None)
+        """
+        self.path = Path(template_path or DEFAULT_TEMPLATE)
+
+        with zipfile.ZipFile(self.path) as template_zip:
+            self.parts = {
+                info.filename: template_zip.read(info.filename)
+                for info in template_zip.infolist()
+                if info.filename not in (DOCUMENT_PART, DOCUMENT_RELS_PART)
+            }
+            document = etree.fromstring(template_zip.read(DOCUMENT_PART))
+            document_rels = etree.fromstring(template_zip.read(DOCUMENT_RELS_PART))
+
+        # Page setup of the last section
+        section = document.find(f"{{{W_NAMESPACE}}}body/{{{W_NAMESPACE}}}sectPr")
+        self.section_xml = etree.tostring(section, encoding="unicode") if section is not None else ""
+        self.content_width_inches = self._get_content_width(section)
+
+        # Relationships other than the body's own content (images, hyperlinks...)
+        self.relationships = [
+            (rel.get("Id"), rel.get("Type"), rel.get("Target"))
+            for rel in document_rels
+            if rel.get("TargetMode") != "External" and not rel.get("Target", "").startswith("media/")
+        ]
+
+        styles = etree.fromstring(self.parts["word/styles.xml"])
+        self.style_ids = {
+            style.find(f"{{{W_NAMESPACE}}}name").get(f"{{{W_NAMESPACE}}}val").lower(): style.get(f"{{{W_NAMESPACE}}}styleId")
+            for style in styles.iterfind(f"{{{W_NAMESPACE}}}style")
+            if style.find(f"{{{W_NAMESPACE}}}name") is not None
+        }
+        if CONTENT_STYLE_NAME.lower() not in self.style_ids:
+            styles.append(etree.fromstring(CONTENT_STYLE))
+            self.parts["word/styles.xml"] = etree.tostring(styles, xml_declaration=True, encoding="UTF-8", standalone=True)
+            self.style_ids[CONTENT_STYLE_NAME.lower()] = CONTENT_STYLE_ID
+
+        # Content types with image defaults
+        content_types = etree.fromstring(self.parts[CONTENT_TYPES_PART])
+        defaults = {element.get("Extension").lower() for element in content_types.iterfind(f"{{{CONTENT_TYPES_NAMESPACE}}}Default")}
+        for extension, content_type in IMAGE_TYPES.values():
+            if extension not in defaults:
+                etree.SubElement(content_types, f"{{{CONTENT_TYPES_NAMESPACE}}}Default", Extension=extension, ContentType=content_type)
+        self.parts[CONTENT_TYPES_PART] = etree.tostring(
+            content_types, xml_declaration=True, encoding="UTF-8", standalone=True
+        ).replace(TEMPLATE_CONTENT_TYPE, DOCUMENT_CONTENT_TYPE)
+
+        self._blank_docx: Optional[bytes] = None
+
+    def _get_content_width(self, section) -> float:
+        """Page width minus left and right margins, in inches (6 inches if unknown)"""
+        if section is None:
+            return 6.0
+        page_size = section.find(f"{{{W_NAMESPACE}}}pgSz")
+        margins = section.find(f"{{{W_NAMESPACE}}}pgMar")
+        try:
+            width = int(page_size.get(f"{{{W_NAMESPACE}}}w"))
+            left = int(margins.get(f"{{{W_NAMESPACE}}}left"))
+            right = int(margins.get(f"{{{W_NAMESPACE}}}right"))
+        except (AttributeError, TypeError, ValueError):
+            return 6.0
+        return (width - left - right) / TWIPS_PER_INCH
+
+    def get_style_id(self, name: str) -> Optional[str]:
+        """
+        Get the ID of a style by its name
+
+        Args:
+            name: Style name as shown in Word (e.g. "Heading 1", "List Bullet")
+
+        Returns:
+            Style ID, None if the template has no such style
+        """
+        return self.style_ids.get(name.lower())
+
+    def new_document(self):
+        """
+        Create a python-docx Document based on this template
+
+        The blank document is built once and cloned from bytes per call,
+        so the template's parts are not re-read or re-patched per job.
+
+        Returns:
+            python-docx Document without body content
+        """
+        if self._blank_docx is None:
+            blank = io.BytesIO()
+            StreamingDocxWriter(blank, self).close()
+            self._blank_docx = blank.getvalue()
+        return docx.Document(io.BytesIO(self._blank_docx))
+
+
+@lru_cache(maxsize=8)
+def _load_template(template_path: str, size: int, mtime_ns: int) -> DocxTemplate:
+    """Load a template (cached per path, size and modification time)"""
+    return DocxTemplate(Path(template_path))
+
+
+def get_template(template_path: Optional[str | Path] = None) -> DocxTemplate:
+    """
+    Get a parsed DOCX template, loading it only on first use or when the file changed
+
+    Args:
+        template_path: .docx/.dotx template (use the configured template, or python-docx's default, if None)
+
+    Returns:
+        Shared template
+    """
+    path = Path(template_path or settings.docx_template or DEFAULT_TEMPLATE).resolve()
+    stat = path.stat()
+    return _load_template(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+class StreamingDocxWriter:
+    """
+    Writes a DOCX file block by block
+
+    Images go into the archive as they are added, once per distinct
+    content. Only one archive entry can be open for writing at a time, so
+    word/document.xml is staged in a temporary file meanwhile and copied
+    in on close. Styles come from the template and are referenced by ID,
+    never repeated per run, so memory doesn't grow with the document.
+    """
+
+    def __init__(self, output_path: Path | BinaryIO, template: Optional[DocxTemplate] = None):
+        """
+        Start a document
+
+        Args:
+            output_path: DOCX file to create, or a binary stream
+            template: Base package (use the configured template if None)
+        """
+        self.template = template or get_template()
+        self.output_path = output_path
+
+        self._zip = zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED)
+        # Content types first, as Word writes them
+        self._zip.writestr(CONTENT_TYPES_PART, self.template.parts[CONTENT_TYPES_PART])
+        self._document = tempfile.TemporaryFile(prefix="document_", dir=settings.temp_dir)
+        self._buffer = [DOCUMENT_START]
+        self._buffered_chars = len(DOCUMENT_START)
+
+        self._images: dict[str, tuple[str, str]] = {}  # sha1 -> (relationship id, part name)
+        self._next_rel_id = 1 + max(
+            (int(rel_id[3:]) for rel_id, _, _ in self.template.relationships if rel_id.startswith("rId") and rel_id[3:].isdigit()),
+            default=0
+        )
+        self._hyperlinks: list[tuple[str, str]] = []  # (relationship id, target)
+        self._drawing_id = 0
+        self._content_style = self.template.get_style_id(CONTENT_STYLE_NAME)
+
+        self._heading_styles = {
+            level: self.template.get_style_id(f"Heading {level}") for level in range(1, 10)
+        }
+        self._title_style = self.template.get_style_id("Title")
+        self._hyperlink_style = self.template.get_style_id("Hyperlink")
+        self._list_styles = [
+            style_id for style_id in (
+                self.template.get_style_id(name) for name in ("List Bullet", "List Bullet 2", "List Bullet 3")
+            ) if style_id
+        ]
+
+    @property
+    def content_width_inches(self) -> float:
+        """Available page width for images"""
+        return self.template.content_width_inches
+
+    def _write(self, xml: str):
+        """Buffer XML, flushing to the archive in large chunks"""
+        self._buffer.append(xml)
+        self._buffered_chars += len(xml)
+        if self._buffered_chars >= FLUSH_CHARS:
+            self._flush()
+
+    def _flush(self):
+        self._document.write("".join(self._buffer).encode("utf-8"))
+        self._buffer.clear()
+        self._buffered_chars = 0
+
+    def _paragraph(self, text: str, style_id: Optional[str] = None, run_style_id: Optional[str] = None, center: bool = False):
+        """Write a single-run paragraph"""
+        properties = ""
+        if style_id or center:
+            properties = "<w:pPr>"
+            if style_id:
+                properties += f'<w:pStyle w:val="{style_id}"/>'
+            if center:
+                properties += '<w:jc w:val="center"/>'
+            properties += "</w:pPr>"
+
+        run_properties = f'<w:rPr><w:rStyle w:val="{run_style_id}"/></w:rPr>' if run_style_id else ""
+        text = escape(_INVALID_XML_CHARS.sub("", text))
+        self._write(f'<w:p>{properties}<w:r>{run_properties}<w:t xml:space="preserve">{text}</w:t></w:r></w:p>')
+
+    def add_title(self, text: str):
+        """Add a centered document title"""
+        self._paragraph(text, self._title_style, center=True)
+
+    def add_heading(self, text: str, level: int):
+        """Add a heading (level 1-9)"""
+        self._paragraph(text, self._heading_styles[max(1, min(level, 9))])
+
+    def add_paragraph(self, text: str = "", content: bool = True):
+        """
+        Add a paragraph
+
+        Args:
+            text: Paragraph text (empty paragraph if "")
+            content: Use the content font (False for plain Normal text)
+        """
+        if not text:
+            self._write("<w:p/>")
+            return
+        self._paragraph(text, run_style_id=self._content_style if content else None)
+
+    def add_list_item(self, text: str, level: int):
+        """Add a bullet list item (nesting level from 1)"""
+        style_id = self._list_styles[max(1, min(level, len(self._list_styles))) - 1] if self._list_styles else None
+        self._paragraph(text, style_id, run_style_id=self._content_style)
+
+    def add_link(self, text: str, target: str):
+        """
+        Add a paragraph linking to a file or URL
+
+        Args:
+            text: Link text
+            target: Relative file path or URL
+        """
+        rel_id = f"rId{self._next_rel_id}"
+        self._next_rel_id += 1
+        self._hyperlinks.append((rel_id, target))
+
+        run_properties = f'<w:rStyle w:val="{self._hyperlink_style}"/>' if self._hyperlink_style else '<w:color w:val="0563C1"/><w:u w:val="single"/>'
+        text = escape(_INVALID_XML_CHARS.sub("", text))
+        self._write(
+            f'<w:p><w:hyperlink r:id="{rel_id}" w:history="1">'
+            f'<w:r><w:rPr>{run_properties}</w:rPr><w:t xml:space="preserve">{text}</w:t></w:r>'
+            '</w:hyperlink></w:p>'
+        )
+
+    def add_image(self, blob: bytes, image_format: str, width_inches: float, height_inches: float):
+        """
+        Add an image in its own paragraph
+
+        Args:
+            blob: Encoded image
+            image_format: Image format (JPEG, PNG, GIF, BMP or TIFF)
+            width_inches: Display width
+            height_inches: Display height
+        """
+        self._add_picture(hashlib.sha1(blob).hexdigest(), lambda: blob, image_format, width_inches, height_inches)
+
+    def _add_picture(self, digest: str, read: Callable[[], bytes], image_format: str, width_inches: float, height_inches: float):
+        """
+        Add an image, writing its data into the archive the first time its digest is seen
+
+        Args:
+            digest: SHA-1 identifying the image content
+            read: Returns the encoded image (not called for duplicates)
+            image_format: Image format (JPEG, PNG, GIF, BMP or TIFF)
+            width_inches: Display width
+            height_inches: Display height
+        """
+        image = self._images.get(digest)
+        if image is None:
+            extension, _ = IMAGE_TYPES.get(image_format, IMAGE_TYPES["PNG"])
+            rel_id = f"rId{self._next_rel_id}"
+            self._next_rel_id += 1
+            # Prefixed so they can't clash with media of the template's headers and footers
+            part_name = f"word/media/todocx_image{len(self._images) + 1}.{extension}"
+            # Already compressed
+            self._zip.writestr(part_name, read(), compress_type=zipfile.ZIP_STORED)
+            image = self._images[digest] = (rel_id, part_name)
+
+        self._drawing_id += 1
+        rel_id, part_name = image
+        self._write(PICTURE.format(
+            cx=round(width_inches * EMU_PER_INCH),
+            cy=round(height_inches * EMU_PER_INCH),
+            id=self._drawing_id,
+            name=_attribute(Path(part_name).name),
+            rel_id=rel_id
+        ))
+
+    def add_document(self, document: BlockDocument, image_pipeline=None):
+        """
+        Add the blocks of a structured document
+
+        Args:
+            document: Structured document
+            image_pipeline: ImagePipeline for the document's images (images are skipped if None)
+        """
+        for block_type, level, text in document:
+            if block_type == BlockType.HEADING:
+                self.add_heading(text, level)
+            elif block_type == BlockType.LIST_ITEM:
+                self.add_list_item(text, level)
+            elif block_type == BlockType.IMAGE:
+                image = image_pipeline.get(text) if image_pipeline else None
+                if image:
+                    # Keyed by the source digest: duplicates are never read back
+                    self._add_picture(
+                        image.digest, partial(image_pipeline.read, image),
+                        image.format, image.width_inches, image.height_inches
+                    )
+            else:
+                self.add_paragraph(text)
+
+    def close(self):
+        """Finish the document body and write the remaining parts"""
+        self._write(self.template.section_xml + DOCUMENT_END)
+        self._flush()
+        self._document.seek(0)
+        with self._zip.open(DOCUMENT_PART, "w", force_zip64=True) as document:
+            shutil.copyfileobj(self._document, document, FLUSH_CHARS)
+        self._document.close()
+
+        relationships = [
+            f'<Relationship Id="{rel_id}" Type="{rel_type}" Target="{_attribute(target)}"/>'
+            for rel_id, rel_type, target in self.template.relationships
+        ]
+        relationships.extend(
+            f'<Relationship Id="{rel_id}" Type="{IMAGE_RELATIONSHIP}" Target="{part_name[len("word/"):]}"/>'
+            for rel_id, part_name in self._images.values()
+        )
+        relationships.extend(
+            f'<Relationship Id="{rel_id}" Type="{HYPERLINK_RELATIONSHIP}" Target="{_attribute(target)}" TargetMode="External"/>'
+            for rel_id, target in self._hyperlinks
+        )
+        self._zip.writestr(
+            DOCUMENT_RELS_PART,
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{RELS_NAMESPACE}">{"".join(relationships)}</Relationships>'
+        )
+
+        for part_name, data in self.template.parts.items():
+            if part_name != CONTENT_TYPES_PART:
+                self._zip.writestr(part_name, data)
+
+        self._zip.close()
+
+    def abort(self):
+        """Close and delete a partially written document"""
+        try:
+            self._document.close()
+            self._zip.close()
+        except Exception:
+            pass
+        if isinstance(self.output_path, Path):
+            self.output_path.unlink(missing_ok=True)
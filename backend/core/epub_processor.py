@@ -1,17 +1,419 @@
 """EPUB Processor - Extract text from EPUB files"""
-import html
+import itertools
+import os
+import posixpath
+import threading
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+from urllib.parse import unquote
 
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
+from lxml import etree
 from loguru import logger
 
+from config import settings
+from core.document_model import BlockDocument
+from core.html_text import get_text_backend
+
+# EPUB container layout
+CONTAINER_PATH = "META-INF/container.xml"
+HTML_MEDIA_TYPES = {"application/xhtml+xml", "text/html"}
+DC_NAMESPACE = "http://purl.org/dc/elements/1.1/"
+
+# Parallel parsing batch size bounds (uncompressed bytes per worker task)
+MIN_BATCH_BYTES = 256 * 1024
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+@dataclass
+class EPUBPackage:
+    """Parsed OPF package document of an EPUB"""
+    manifest: dict[str, tuple[str, str]]  # item id -> (zip member path, media type)
+    spine: list[str]  # zip member paths of XHTML documents in reading order
+    metadata: dict[str, list[tuple[str, dict]]]  # Dublin Core name -> [(value, attributes)]
+    size: int = field(init=False)  # approximate memory footprint in bytes
+
+    def __post_init__(self):
+        manifest_size = sum(len(item_id) + len(path) + len(media_type) for item_id, (path, media_type) in self.manifest.items())
+        spine_size = sum(len(path) for path in self.spine)
+        metadata_size = sum(len(value) for values in self.metadata.values() for value, _ in values)
+        # Strings plus a rough per-entry object overhead
+        self.size = manifest_size + spine_size + metadata_size + 200 * (len(self.manifest) + len(self.spine))
+
+
+class EPUBPackageCache:
+    """
+    LRU cache of parsed EPUB packages
+
+    Keyed by path, size and modification time, so a changed file is parsed
+    again. Bounded by entry count and approximate memory.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, EPUBPackage] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[EPUBPackage]:
+        """Get a cached package, marking it as recently used"""
+        with self._lock:
+            package = self._entries.get(key)
+            if package is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return package
+
+    def put(self, key: tuple, package: EPUBPackage):
+        """Cache a package, evicting least recently used entries over the limits"""
+        if package.size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+
+            self._entries[key] = package
+            self._bytes += package.size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+
+# Per worker process state: text backends
+_worker_backends: dict = {}
+
+
+def _extract_batch(epub_path: str, member_paths: list[str], backend_name: str) -> list[Optional[BlockDocument]]:
+    """
+    Extract structured text of a batch of spine documents (runs in a worker process)
+
+    The archive is opened per batch, never kept open between batches: a
+    book replaced at the same path would be read through the old handle,
+    and on Windows an open handle keeps the user from deleting or
+    overwriting the file. Batches are large, so reopening costs little.
+
+    Args:
+        epub_path: EPUB file path
+        member_paths: Zip member paths of the documents
+        backend_name: HTML text extraction backend name
+
+    Returns:
+        Document per spine entry, None for documents missing from the archive
+    """
+    backend = _worker_backends.get(backend_name)
+    if backend is None:
+        backend = _worker_backends[backend_name] = get_text_backend(backend_name)
+
+    documents = []
+    with zipfile.ZipFile(epub_path) as epub_zip:
+        for member_path in member_paths:
+            try:
+                content = epub_zip.read(member_path)
+            except KeyError:
+                documents.append(None)
+                continue
+            documents.append(backend.extract_document(content, member_path))
+    return documents
+
+
+class EPUBImageReader:
+    """
+    Reads images from an EPUB archive
+
+    Safe to use from several threads: each thread reads through its own
+    handle of the archive.
+    """
+
+    def __init__(self, epub_path: Path):
+        self.epub_path = epub_path
+        self._local = threading.local()
+        self._zips: list[zipfile.ZipFile] = []
+        self._lock = threading.Lock()
+
+    def _get_zip(self) -> zipfile.ZipFile:
+        """Get this thread's handle of the archive"""
+        epub_zip = getattr(self._local, "zip", None)
+        if epub_zip is None:
+            epub_zip = zipfile.ZipFile(self.epub_path)
+            self._local.zip = epub_zip
+            with self._lock:
+                self._zips.append(epub_zip)
+        return epub_zip
+
+    def size(self, member_path: str) -> int:
+        """Uncompressed size of an image, 0 if it is missing"""
+        try:
+            return self._get_zip().getinfo(member_path).file_size
+        except KeyError:
+            return 0
+
+    def read(self, member_path: str) -> Optional[bytes]:
+        """Read an image, None if it is missing from the archive"""
+        try:
+            return self._get_zip().read(member_path)
+        except KeyError:
+            logger.warning(f"Image missing from EPUB: {member_path}")
+            return None
+
+    def __reduce__(self):
+        # Sent to worker processes as the archive path; each opens its own handles
+        return EPUBImageReader, (self.epub_path,)
+
+    def close(self):
+        """Close all archive handles"""
+        with self._lock:
+            for epub_zip in self._zips:
+                epub_zip.close()
+            self._zips.clear()
+
 
 class EPUBProcessor:
     """EPUB File Processor"""
     
+    def __init__(self, text_backend: Optional[str] = None):
+        """
+        Initialize EPUB processor
+        
+        Args:
+            text_backend: HTML text extraction backend name (use configured backend if None)
+        """
+        self.text_backend = get_text_backend(text_backend or settings.epub_text_backend)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers = 0
+        self._pool_lock = threading.Lock()
+    
+    def _get_parse_workers(self) -> int:
+        """Get the configured number of chapter parsing processes"""
+        workers = settings.epub_parse_workers
+        if workers <= 0:
+            return os.cpu_count() or 1
+        return workers
+    
+    def _get_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Get the shared process pool, created on first use"""
+        with self._pool_lock:
+            if self._pool is None or self._pool_workers != workers:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                self._pool = ProcessPoolExecutor(max_workers=workers)
+                self._pool_workers = workers
+            return self._pool
+    
+    def shutdown(self):
+        """Shut down the chapter parsing worker processes"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+    
+    def _plan_batches(self, epub_zip: zipfile.ZipFile, member_paths: list[str], workers: int) -> list[list[str]]:
+        """
+        Group consecutive spine documents into worker tasks
+        
+        Batches target a few tasks per worker, so many tiny chapters share
+        one task instead of paying IPC overhead each, while large chapters
+        still spread across all workers.
+        
+        Args:
+            epub_zip: Opened EPUB archive
+            member_paths: Zip member paths in spine order
+            workers: Number of worker processes
+            
+        Returns:
+            Batches of member paths, in spine order
+        """
+        sizes = []
+        for member_path in member_paths:
+            try:
+                sizes.append(epub_zip.getinfo(member_path).file_size)
+            except KeyError:
+                sizes.append(0)
+        
+        target = min(max(sum(sizes) // (workers * 4), MIN_BATCH_BYTES), MAX_BATCH_BYTES)
+        
+        batches = []
+        batch = []
+        batch_bytes = 0
+        for member_path, size in zip(member_paths, sizes):
+            batch.append(member_path)
+            batch_bytes += size
+            if batch_bytes >= target:
+                batches.append(batch)
+                batch = []
+                batch_bytes = 0
+        if batch:
+            batches.append(batch)
+        
+        return batches
+    
+    def _iter_documents_parallel(self, epub_path: Path, batches: list[list[str]], workers: int) -> Iterator[Optional[BlockDocument]]:
+        """
+        Extract documents in worker processes, yielding them in spine order
+        
+        At most two batches per worker are in flight, which bounds memory
+        when the consumer is slower than the workers.
+        """
+        pool = self._get_pool(workers)
+        backend_name = self.text_backend.name
+        batch_iter = iter(batches)
+        
+        pending = deque(
+            pool.submit(_extract_batch, str(epub_path), batch, backend_name)
+            for batch in itertools.islice(batch_iter, workers * 2)
+        )
+        while pending:
+            documents = pending.popleft().result()
+            next_batch = next(batch_iter, None)
+            if next_batch is not None:
+                pending.append(pool.submit(_extract_batch, str(epub_path), next_batch, backend_name))
+            yield from documents
+    
+    def _parse_package(self, epub_zip: zipfile.ZipFile) -> "EPUBPackage":
+        """
+        Parse the OPF package document of an EPUB
+        
+        Follows META-INF/container.xml to the OPF package document and
+        resolves its spine against the manifest.
+        
+        Args:
+            epub_zip: Opened EPUB archive
+            
+        Returns:
+            Parsed package (manifest, spine and metadata)
+        """
+        container = etree.fromstring(epub_zip.read(CONTAINER_PATH))
+        rootfile = container.find(".//{*}rootfile")
+        if rootfile is None:
+            raise ValueError("No rootfile in EPUB container")
+        
+        opf_path = rootfile.get("full-path")
+        opf = etree.fromstring(epub_zip.read(opf_path))
+        opf_dir = posixpath.dirname(opf_path)
+        
+        # Manifest: item id -> (zip member path, media type)
+        manifest = {}
+        for item in opf.iterfind("{*}manifest/{*}item"):
+            href = unquote(item.get("href", "").split("#")[0])
+            if href:
+                member_path = posixpath.normpath(posixpath.join(opf_dir, href))
+                manifest[item.get("id")] = (member_path, item.get("media-type", ""))
+        
+        spine = []
+        for itemref in opf.iterfind("{*}spine/{*}itemref"):
+            entry = manifest.get(itemref.get("idref"))
+            if entry is not None and entry[1] in HTML_MEDIA_TYPES:
+                spine.append(entry[0])
+        
+        # Dublin Core metadata: name -> [(value, attributes)], like ebooklib
+        metadata = {}
+        metadata_element = opf.find("{*}metadata")
+        if metadata_element is not None:
+            for element in metadata_element:
+                if isinstance(element.tag, str) and element.tag.startswith(f"{{{DC_NAMESPACE}}}"):
+                    name = etree.QName(element).localname
+                    metadata.setdefault(name, []).append(((element.text or "").strip(), dict(element.attrib)))
+        
+        return EPUBPackage(manifest=manifest, spine=spine, metadata=metadata)
+    
+    def _get_package(self, epub_path: Path, epub_zip: Optional[zipfile.ZipFile] = None) -> "EPUBPackage":
+        """
+        Get the parsed package of an EPUB, from cache if unchanged
+        
+        Args:
+            epub_path: EPUB file path
+            epub_zip: Already opened archive to parse from on a cache miss
+            
+        Returns:
+            Parsed package
+        """
+        stat = epub_path.stat()
+        key = (str(epub_path.resolve()), stat.st_size, stat.st_mtime_ns)
+        
+        package = package_cache.get(key)
+        if package is not None:
+            return package
+        
+        if epub_zip is not None:
+            package = self._parse_package(epub_zip)
+        else:
+            with zipfile.ZipFile(epub_path) as opened_zip:
+                package = self._parse_package(opened_zip)
+        
+        package_cache.put(key, package)
+        return package
+    
+    def iter_chapters(self, epub_file: str | Path) -> Iterator[BlockDocument]:
+        """
+        Extract structured text from an EPUB file chapter by chapter, in reading order
+        
+        Walks the OPF spine and reads one XHTML document at a time from the
+        archive, so memory stays bounded by the largest chapter and callers
+        can start writing output before the whole book is parsed.
+        
+        With `epub_parse_workers` > 1, large books are parsed in worker
+        processes and reassembled in spine order.
+        
+        Args:
+            epub_file: EPUB file path
+            
+        Yields:
+            Document (headings, lists, paragraphs) of each non-empty chapter
+        """
+        epub_path = Path(epub_file)
+        logger.debug(f"Reading EPUB file: {epub_path.name}")
+        
+        with zipfile.ZipFile(epub_path) as epub_zip:
+            member_paths = self._get_package(epub_path, epub_zip).spine
+            
+            # Fan large books out to worker processes
+            workers = min(self._get_parse_workers(), len(member_paths))
+            if workers > 1:
+                spine_paths = set(member_paths)
+                total_bytes = sum(info.file_size for info in epub_zip.infolist() if info.filename in spine_paths)
+                batches = self._plan_batches(epub_zip, member_paths, workers)
+                if total_bytes >= settings.epub_parallel_min_bytes and len(batches) > 1:
+                    logger.debug(f"Parsing {len(member_paths)} documents in {len(batches)} batches on {workers} processes")
+                    documents = self._iter_documents_parallel(epub_path, batches, workers)
+                    for member_path, document in zip(member_paths, documents):
+                        if document is None:
+                            logger.warning(f"Spine document missing from EPUB: {member_path}")
+                        elif len(document):
+                            yield document
+                    return
+            
+            for member_path in member_paths:
+                try:
+                    content = epub_zip.read(member_path)
+                except KeyError:
+                    logger.warning(f"Spine document missing from EPUB: {member_path}")
+                    continue
+                
+                document = self.text_backend.extract_document(content, member_path)
+                if len(document):
+                    yield document
+    
+    def open_images(self, epub_file: str | Path) -> EPUBImageReader:
+        """
+        Open the images of an EPUB file, referenced by the image blocks of its chapters
+        
+        Args:
+            epub_file: EPUB file path
+            
+        Returns:
+            Image reader, to be closed by the caller
+        """
+        return EPUBImageReader(Path(epub_file))
+    
     def extract_text(self, epub_file: str | Path) -> Optional[str]:
         """
         Extract text content from EPUB file
@@ -28,38 +430,12 @@ class EPUBProcessor:
                 logger.error(f"EPUB file not found: {epub_path}")
                 return None
             
-            logger.debug(f"Reading EPUB file: {epub_path.name}")
-            book = epub.read_epub(str(epub_path))
-            
-            # Extract text from all items
-            text_parts = []
-            
-            for item in book.get_items():
-                if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    # Parse HTML content
-                    content = item.get_content().decode('utf-8', errors='ignore')
-                    soup = BeautifulSoup(content, 'html.parser')
-                    
-                    # Remove script and style elements
-                    for script in soup(["script", "style"]):
-                        script.decompose()
-                    
-                    # Get text
-                    text = soup.get_text()
-                    
-                    # Clean up whitespace
-                    lines = (line.strip() for line in text.splitlines())
-                    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                    text = '\n'.join(chunk for chunk in chunks if chunk)
-                    
-                    if text:
-                        text_parts.append(text)
-            
-            if not text_parts:
+            full_text = '\n\n'.join(chapter.to_text() for chapter in self.iter_chapters(epub_path))
+            
+            if not full_text:
                 logger.warning("No text content found in EPUB")
                 return None
             
-            full_text = '\n\n'.join(text_parts)
             logger.info(f"EPUB text extracted: {len(full_text)} characters")
             return full_text
             
@@ -79,13 +455,13 @@ class EPUBProcessor:
         """
         try:
             epub_path = Path(epub_file)
-            book = epub.read_epub(str(epub_path))
+            package = self._get_package(epub_path)
             
             metadata = {
-                'title': book.get_metadata('DC', 'title'),
-                'author': book.get_metadata('DC', 'creator'),
-                'language': book.get_metadata('DC', 'language'),
-                'publisher': book.get_metadata('DC', 'publisher'),
+                'title': package.metadata.get('title', []),
+                'author': package.metadata.get('creator', []),
+                'language': package.metadata.get('language', []),
+                'publisher': package.metadata.get('publisher', []),
             }
             
             return metadata
@@ -95,6 +471,12 @@ class EPUBProcessor:
             return {}
 
 
+# Parsed packages shared by text and metadata extraction
+package_cache = EPUBPackageCache(
+    max_entries=settings.epub_cache_max_entries,
+    max_bytes=settings.epub_cache_max_bytes
+)
+
 # Global processor instance
 epub_processor = EPUBProcessor()
 
@@ -0,0 +1,109 @@
+"""Fan-out - Feed one stream of extracted documents to several generators"""
+import contextvars
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+# End of stream marker
+_END = object()
+
+
+class _SourceError:
+    """Extraction error, re-raised in every consumer"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class _Consumer:
+    """Bounded queue of one consumer"""
+
+    def __init__(self, buffer: int):
+        self.queue: queue.Queue = queue.Queue(maxsize=buffer)
+        self.done = threading.Event()
+
+    def __iter__(self) -> Iterator:
+        while True:
+            item = self.queue.get()
+            if item is _END:
+                return
+            if isinstance(item, _SourceError):
+                raise item.error
+            yield item
+
+    def put(self, item) -> bool:
+        """Wait for room in the queue, False if the consumer has stopped reading"""
+        while not self.done.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+def fan_out(source: Iterable, consumers: list[Callable[[Iterator], T]], buffer: int = 8) -> list[T]:
+    """
+    Run several consumers over one stream, each in its own thread
+
+    The source is iterated once, in the calling thread, and every item is
+    handed to all consumers. Each consumer reads from a bounded queue, so
+    the source never gets more than `buffer` items ahead of the slowest
+    one and memory stays flat. A consumer that stops early (e.g. fails) is
+    dropped without holding up the others; an error of the source is
+    raised in all consumers. Consumers run in a copy of the caller's
+    context, so their log lines keep the job ID.
+
+    Args:
+        source: Items to distribute (e.g. extracted documents)
+        consumers: Functions taking an iterator over the items
+        buffer: Items queued per consumer
+
+    Returns:
+        Result of each consumer, in order
+    """
+    queues = [_Consumer(buffer) for _ in consumers]
+    results: list = [None] * len(consumers)
+    errors: list = [None] * len(consumers)
+
+    def run(index: int):
+        try:
+            results[index] = consumers[index](iter(queues[index]))
+        except BaseException as e:
+            errors[index] = e
+        finally:
+            queues[index].done.set()
+
+    threads = [
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(run, index), name=f"fanout-{index}", daemon=True
+        )
+        for index in range(len(consumers))
+    ]
+    for thread in threads:
+        thread.start()
+
+    end = _END
+    try:
+        for item in source:
+            live = [consumer for consumer in queues if consumer.put(item)]
+            if not live:
+                logger.debug("All consumers stopped, stopping extraction")
+                break
+    except Exception as e:
+        end = _SourceError(e)
+    finally:
+        for consumer in queues:
+            consumer.put(end)
+
+    for thread in threads:
+        thread.join()
+
+    for error in errors:
+        if error is not None:
+            raise error
+    return results
@@ -0,0 +1,305 @@
+"""HTML Text Extraction - Convert (X)HTML documents to plain text"""
+import posixpath
+import re
+import threading
+from urllib.parse import unquote
+
+from typing import Optional
+
+from lxml import etree
+
+from core.document_model import BlockDocument, BlockType
+
+# Elements whose content is never text
+SKIP_TAGS = {"script", "style", "head", "template", "noscript"}
+
+# Elements that start a new line
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "body", "br", "caption", "dd",
+    "div", "dl", "dt", "figcaption", "figure", "footer", "h1", "h2", "h3", "h4",
+    "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section",
+    "table", "td", "th", "tr", "ul",
+}
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+LIST_TAGS = {"ul", "ol"}
+
+# Image elements (<image> is the SVG one) and their source attributes
+IMAGE_TAGS = {"img", "image"}
+IMAGE_SOURCE_ATTRIBUTES = ("src", "href", "xlink:href", "{http://www.w3.org/1999/xlink}href")
+
+# Precompiled whitespace normalization
+_WHITESPACE = re.compile(r"\s+")
+_INLINE_WHITESPACE = re.compile(r"[^\S\n]+")
+_LINE_BREAKS = re.compile(r" *\n\s*")
+
+
+def normalize_lines(text: str) -> str:
+    """
+    Collapse whitespace within lines and drop empty lines
+
+    Args:
+        text: Raw text with newlines at block boundaries
+
+    Returns:
+        Non-empty, stripped lines joined by newlines
+    """
+    text = _INLINE_WHITESPACE.sub(" ", text)
+    return _LINE_BREAKS.sub("\n", text).strip()
+
+
+def _split_preformatted(text: str) -> list[str]:
+    """
+    Split <pre> text into blocks, keeping all whitespace
+
+    One block per line, indentation and spacing untouched. Blank lines
+    can't be blocks of their own (empty blocks are dropped), so each one
+    stays attached to the block before it as a trailing newline (leading
+    ones to the first block): joining the blocks with newlines gives back
+    the original text.
+
+    Args:
+        text: Raw text of a <pre> element
+
+    Returns:
+        Blocks in order
+    """
+    # A newline right after <pre> isn't content (HTML parsing rule), nor are trailing ones
+    if text.startswith("\n"):
+        text = text[1:]
+    blocks = []
+    leading = ""
+    for line in text.rstrip("\n").split("\n"):
+        if line:
+            blocks.append(leading + line)
+            leading = ""
+        elif blocks:
+            blocks[-1] += "\n"
+        else:
+            leading += "\n"
+    return blocks
+
+
+def resolve_image_path(base_path: str, source: Optional[str]) -> Optional[str]:
+    """
+    Resolve an image reference against the path of the referencing document
+
+    Args:
+        base_path: Path of the document (e.g. EPUB zip member path)
+        source: Image src/href attribute value
+
+    Returns:
+        Normalized image path, None for empty, external or inline (data:) images
+    """
+    if not source:
+        return None
+
+    source = source.strip()
+    if source.startswith(("data:", "/")) or "://" in source:
+        return None
+
+    source = unquote(source.split("#")[0])
+    if not source:
+        return None
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_path), source))
+
+
+def _get_image_source(element) -> Optional[str]:
+    """Get the first non-empty source attribute of an image element"""
+    for attribute in IMAGE_SOURCE_ATTRIBUTES:
+        source = element.get(attribute)
+        if source:
+            return source
+    return None
+
+
+class LxmlTextBackend:
+    """
+    lxml text extraction backend
+
+    Parses with libxml2's HTML parser and walks the tree once, starting a
+    new block at every block-level element. Whitespace inside text nodes
+    is collapsed like a browser would, except within <pre>.
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        # lxml parsers must not be shared between threads
+        self._local = threading.local()
+
+    def _get_parser(self) -> etree.HTMLParser:
+        """Get this thread's HTML parser"""
+        parser = getattr(self._local, "parser", None)
+        if parser is None:
+            parser = etree.HTMLParser(
+                encoding="utf-8",
+                remove_comments=True,
+                remove_pis=True,
+                no_network=True
+            )
+            self._local.parser = parser
+        return parser
+
+    def extract_document(self, content: bytes, base_path: str = "") -> BlockDocument:
+        """
+        Extract structured text from an (X)HTML document
+
+        Headings (h1-h6) and list items keep their type and level; every
+        other block-level element becomes a paragraph. Images become image
+        blocks at their position, with paths resolved against base_path.
+
+        Args:
+            content: Raw document content (UTF-8)
+            base_path: Path of the document, for resolving image references
+
+        Returns:
+            Document with one block per text block
+        """
+        document = BlockDocument()
+        root = etree.fromstring(content, self._get_parser())
+        if root is None:
+            return document
+
+        parts = []
+        # Enclosing block context: (type, level); nested blocks inherit it
+        context = [(BlockType.PARAGRAPH, 0)]
+        list_depth = 0
+        pre_depth = 0
+
+        def add(text):
+            if text:
+                parts.append(text if pre_depth else _WHITESPACE.sub(" ", text))
+
+        def flush():
+            if not parts:
+                return
+            block_type, level = context[-1]
+            if pre_depth:
+                for line in _split_preformatted("".join(parts)):
+                    document.add(block_type, line, level)
+            else:
+                for line in normalize_lines("".join(parts)).split("\n"):
+                    document.add(block_type, line, level)
+            parts.clear()
+
+        walker = etree.iterwalk(root, events=("start", "end"))
+        for event, element in walker:
+            tag = element.tag if isinstance(element.tag, str) else ""
+
+            if event == "start":
+                if tag in SKIP_TAGS:
+                    walker.skip_subtree()
+                    continue
+                if tag in IMAGE_TAGS:
+                    image_path = resolve_image_path(base_path, _get_image_source(element))
+                    if image_path:
+                        flush()
+                        document.add(BlockType.IMAGE, image_path)
+                elif tag in BLOCK_TAGS:
+                    flush()
+                    if tag in HEADING_TAGS:
+                        context.append((BlockType.HEADING, int(tag[1])))
+                    elif tag == "li":
+                        context.append((BlockType.LIST_ITEM, max(1, list_depth)))
+                    else:
+                        context.append(context[-1])
+                    if tag in LIST_TAGS:
+                        list_depth += 1
+                    elif tag == "pre":
+                        pre_depth += 1
+                add(element.text)
+            else:
+                if tag in BLOCK_TAGS:
+                    flush()
+                    context.pop()
+                    if tag in LIST_TAGS:
+                        list_depth -= 1
+                    elif tag == "pre":
+                        pre_depth -= 1
+                add(element.tail)
+
+        flush()
+        return document
+
+    def extract(self, content: bytes) -> str:
+        """
+        Extract text from an (X)HTML document
+
+        Args:
+            content: Raw document content (UTF-8)
+
+        Returns:
+            Text with one line per block
+        """
+        return self.extract_document(content).to_text()
+
+
+class BeautifulSoupTextBackend:
+    """
+    BeautifulSoup text extraction backend
+
+    The original html.parser based implementation. Slower than lxml; line
+    breaks follow the document source rather than block elements.
+    """
+
+    name = "bs4"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup_class = BeautifulSoup
+
+    def extract(self, content: bytes) -> str:
+        """
+        Extract text from an (X)HTML document
+
+        Args:
+            content: Raw document content (UTF-8)
+
+        Returns:
+            Text with one line per non-empty source line
+        """
+        soup = self._soup_class(content.decode("utf-8", errors="ignore"), "html.parser")
+
+        # Remove script, style and other non-text elements
+        for element in soup(list(SKIP_TAGS)):
+            element.decompose()
+
+        return normalize_lines(soup.get_text())
+
+    def extract_document(self, content: bytes, base_path: str = "") -> BlockDocument:
+        """
+        Extract text from an (X)HTML document as paragraphs
+
+        This backend doesn't detect structure or images: every line is a paragraph.
+
+        Args:
+            content: Raw document content (UTF-8)
+            base_path: Path of the document (unused)
+
+        Returns:
+            Document with one paragraph per line
+        """
+        return BlockDocument.from_text(self.extract(content))
+
+
+# Available backends by name
+TEXT_BACKENDS = {
+    LxmlTextBackend.name: LxmlTextBackend,
+    BeautifulSoupTextBackend.name: BeautifulSoupTextBackend,
+}
+
+
+def get_text_backend(name: str):
+    """
+    Create a text extraction backend
+
+    Args:
+        name: Backend name ("lxml" or "bs4")
+
+    Returns:
+        Backend instance
+    """
+    if name not in TEXT_BACKENDS:
+        raise ValueError(f"Unknown HTML text backend: {name} (available: {', '.join(TEXT_BACKENDS)})")
+    return TEXT_BACKENDS[name]()
@@ -0,0 +1,309 @@
+"""Image Processor - Deduplicate and downscale images embedded in documents"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+from loguru import logger
+from PIL import Image, UnidentifiedImageError
+
+from config import settings
+
+# Image formats python-docx can embed; anything else is converted to PNG
+DOCX_IMAGE_FORMATS = {"JPEG", "PNG", "GIF", "BMP", "TIFF"}
+
+# Assumed resolution of images without DPI information
+DEFAULT_DPI = 96
+
+
+class ImageReader(Protocol):
+    """Source of image data by path (e.g. EPUBImageReader)"""
+
+    def size(self, path: str) -> int: ...
+
+    def read(self, path: str) -> Optional[bytes]: ...
+
+
+@dataclass
+class ProcessedImage:
+    """Image ready to embed"""
+    blob: bytes
+    format: str  # JPEG, PNG, GIF, BMP or TIFF
+    width_inches: float  # display size
+    height_inches: float
+    source_bytes: int
+    downscaled: bool
+
+
+@dataclass
+class SpooledImage:
+    """Processed image whose data waits in the spool file of an ImagePipeline"""
+    digest: str  # SHA-1 of the source image
+    format: str
+    width_inches: float
+    height_inches: float
+    offset: int
+    size: int
+
+
+class ImageProcessor:
+    """Downscales and recompresses images to a max resolution at their display size"""
+
+    def __init__(self, max_dpi: Optional[int] = None, jpeg_quality: Optional[int] = None):
+        """
+        Initialize image processor
+
+        Args:
+            max_dpi: Max resolution at display size (use configured value if None)
+            jpeg_quality: JPEG quality of recompressed images (use configured value if None)
+        """
+        self.max_dpi = max_dpi or settings.epub_image_max_dpi
+        self.jpeg_quality = jpeg_quality or settings.epub_image_jpeg_quality
+
+    def process(self, data: bytes, max_width_inches: float) -> Optional[ProcessedImage]:
+        """
+        Fit an image to the page and downscale it to the max DPI
+
+        Images are displayed at their natural size (pixels / DPI), shrunk to
+        the page width. Images with more pixels than the max DPI needs at
+        that size are resized and recompressed; JPEGs are decoded at reduced
+        scale directly when possible.
+
+        Args:
+            data: Encoded image
+            max_width_inches: Available page width
+
+        Returns:
+            Processed image, None if the image can't be decoded
+        """
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                source_format = image.format
+                dpi = image.info.get("dpi", (DEFAULT_DPI, DEFAULT_DPI))[0]
+                if not dpi or dpi < 10:
+                    dpi = DEFAULT_DPI
+
+                width_inches = min(image.width / dpi, max_width_inches)
+                height_inches = width_inches * image.height / image.width
+                target_width = max(1, round(width_inches * self.max_dpi))
+
+                if image.width <= target_width and source_format in DOCX_IMAGE_FORMATS:
+                    return ProcessedImage(
+                        blob=data,
+                        format=source_format,
+                        width_inches=width_inches,
+                        height_inches=height_inches,
+                        source_bytes=len(data),
+                        downscaled=False
+                    )
+
+                downscaled = image.width > target_width
+                if downscaled:
+                    target_size = (target_width, max(1, round(image.height * target_width / image.width)))
+                    # JPEG: let the decoder skip to the nearest 1/2, 1/4, 1/8 scale
+                    image.draft(image.mode, target_size)
+                    image = image.resize(target_size, Image.LANCZOS)
+                else:
+                    image.load()
+
+                output = io.BytesIO()
+                if source_format == "JPEG" and image.mode in ("RGB", "L", "CMYK"):
+                    output_format = "JPEG"
+                    image.save(output, "JPEG", quality=self.jpeg_quality, optimize=True, dpi=(self.max_dpi, self.max_dpi))
+                else:
+                    output_format = "PNG"
+                    if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+                        image = image.convert("RGBA")
+                    image.save(output, "PNG", dpi=(self.max_dpi, self.max_dpi))
+
+                blob = output.getvalue()
+                # Recompression without resizing may not pay off
+                if not downscaled and source_format in DOCX_IMAGE_FORMATS and len(blob) >= len(data):
+                    blob = data
+                    output_format = source_format
+
+                return ProcessedImage(
+                    blob=blob,
+                    format=output_format,
+                    width_inches=width_inches,
+                    height_inches=height_inches,
+                    source_bytes=len(data),
+                    downscaled=downscaled
+                )
+
+        except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning(f"Skipping undecodable image: {e}")
+            return None
+
+
+class ImagePipeline:
+    """
+    Loads the images of one document for embedding
+
+    - Each image is processed once: by path, and by content hash when the
+      same image is stored under several paths.
+    - Processed images are written to a temporary spool file right away;
+      only their place in it is kept, and the data is read back on use.
+    - Images are read and downscaled ahead of the writer in a thread pool.
+    - Read-ahead stops at a byte budget of undecoded images; the rest are
+      processed when the writer gets to them.
+    """
+
+    def __init__(
+        self,
+        reader: ImageReader,
+        max_width_inches: float,
+        processor: Optional[ImageProcessor] = None,
+        workers: Optional[int] = None,
+        memory_limit: Optional[int] = None
+    ):
+        """
+        Initialize image pipeline
+
+        Args:
+            reader: Image source
+            max_width_inches: Available page width
+            processor: Image processor (use configured one if None)
+            workers: Processing threads (use configured value if None, 0 = one per CPU core)
+            memory_limit: Read-ahead budget in bytes (use configured value if None)
+        """
+        self.reader = reader
+        self.max_width_inches = max_width_inches
+        self.processor = processor or ImageProcessor()
+        self.memory_limit = memory_limit if memory_limit is not None else settings.epub_image_memory_limit
+
+        workers = workers if workers is not None else settings.epub_image_workers
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image")
+
+        self._lock = threading.Lock()
+        self._pending: dict[str, Future] = {}
+        self._pending_bytes = 0
+        self._by_path: dict[str, Optional[SpooledImage]] = {}
+        self._by_hash: dict[str, SpooledImage] = {}
+        self._spool = tempfile.TemporaryFile(prefix="images_", dir=settings.temp_dir)
+        self._stats = {
+            "references": 0,
+            "unique": 0,
+            "duplicates": 0,
+            "downscaled": 0,
+            "source_bytes": 0,
+            "output_bytes": 0,
+        }
+
+    def _load(self, path: str) -> Optional[SpooledImage]:
+        """Read, deduplicate, process and spool one image"""
+        data = self.reader.read(path)
+        if data is None:
+            return None
+
+        digest = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            image = self._by_hash.get(digest)
+            if image is not None:
+                self._stats["duplicates"] += 1
+                return image
+
+        processed = self.processor.process(data, self.max_width_inches)
+        if processed is None:
+            return None
+
+        with self._lock:
+            # Another thread may have processed the same content meanwhile
+            image = self._by_hash.get(digest)
+            if image is not None:
+                self._stats["duplicates"] += 1
+                return image
+
+            self._spool.seek(0, os.SEEK_END)
+            image = self._by_hash[digest] = SpooledImage(
+                digest=digest,
+                format=processed.format,
+                width_inches=processed.width_inches,
+                height_inches=processed.height_inches,
+                offset=self._spool.tell(),
+                size=len(processed.blob)
+            )
+            self._spool.write(processed.blob)
+            self._stats["unique"] += 1
+            self._stats["downscaled"] += processed.downscaled
+            self._stats["source_bytes"] += processed.source_bytes
+            self._stats["output_bytes"] += image.size
+        return image
+
+    def prefetch(self, paths: list[str]):
+        """
+        Start processing images ahead of use, within the read-ahead budget
+
+        Args:
+            paths: Image paths in the order they will be used
+        """
+        for path in paths:
+            with self._lock:
+                if path in self._by_path or path in self._pending:
+                    continue
+                size = self.reader.size(path)
+                if self._pending and self._pending_bytes + size > self.memory_limit:
+                    return
+                self._pending_bytes += size
+
+                future = self._executor.submit(self._load, path)
+                self._pending[path] = future
+            future.add_done_callback(lambda _, size=size: self._release(size))
+
+    def _release(self, size: int):
+        """Return read-ahead budget of a finished image"""
+        with self._lock:
+            self._pending_bytes -= size
+
+    def get(self, path: str) -> Optional[SpooledImage]:
+        """
+        Get a processed image, waiting for or doing the processing
+
+        Args:
+            path: Image path
+
+        Returns:
+            Processed image (its data comes from read()), None if missing or undecodable
+        """
+        with self._lock:
+            self._stats["references"] += 1
+            if path in self._by_path:
+                return self._by_path[path]
+            future = self._pending.get(path)
+
+        image = future.result() if future is not None else self._load(path)
+
+        with self._lock:
+            self._pending.pop(path, None)
+            self._by_path[path] = image
+        return image
+
+    def read(self, image: SpooledImage) -> bytes:
+        """
+        Read back the data of a processed image
+
+        Args:
+            image: Image from get()
+
+        Returns:
+            Encoded image
+        """
+        with self._lock:
+            self._spool.seek(image.offset)
+            return self._spool.read(image.size)
+
+    def get_stats(self) -> dict:
+        """Image counts and sizes so far"""
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        """Stop processing and delete the spool file"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._spool.close()
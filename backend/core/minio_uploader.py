@@ -1,20 +1,46 @@
 """MinIO Uploader"""
+import hashlib
+import math
 import os
 import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from datetime import datetime, timedelta
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 from io import BytesIO
 
 from minio import Minio
+from minio.datatypes import Part
 from minio.error import S3Error
-from minio.commonconfig import ENABLED
+from minio.commonconfig import ENABLED, Filter
+from minio.deleteobjects import DeleteObject
+from minio.lifecycleconfig import AbortIncompleteMultipartUpload, Expiration, LifecycleConfig, Rule
 from minio.versioningconfig import VersioningConfig
 from loguru import logger
 
 from config import settings
 
+# S3 multipart limits
+MIN_PART_SIZE = 5 * 1024 * 1024  # 5MB
+MAX_MULTIPART_COUNT = 10000
+
+# S3 error codes meaning the cached bucket state is stale
+BUCKET_ERROR_CODES = {"NoSuchBucket"}
+
+# Transcribed audio uploads, garbage collected by lifecycle rule and sweeper
+AUDIO_FOLDER = "audios"
+AUDIO_LIFECYCLE_RULE_ID = "to-docx-expire-audios"
+MAX_DELETE_BATCH_SIZE = 1000  # S3 DeleteObjects limit
+
+
+class IncompleteUploadError(Exception):
+    """Presigned upload that can't be completed yet: parts or bytes are missing"""
+
 
 @contextmanager
 def temp_file_context(file_content: bytes):
@@ -45,6 +71,24 @@ class MinIOUploader:
 
     def __init__(self):
         """Initialize MinIO client"""
+        # Cached bucket state: name of the verified bucket and when it was verified
+        self._bucket_lock = threading.Lock()
+        self._verified_bucket: Optional[str] = None
+        self._bucket_verified_at = 0.0
+        self._metrics = {
+            "bucket_checks": 0,
+            "bucket_rechecks_on_error": 0,
+            "round_trips_saved": 0,
+            "sweeps": 0,
+            "objects_deleted": 0,
+            "bytes_reclaimed": 0,
+        }
+
+        # Objects whose job is complete, deleted by the next sweep: {object name: size}
+        self._completed_objects: dict[str, int] = {}
+        self._sweeper_thread: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
+
         if not settings.minio_endpoint or not settings.minio_access_key or not settings.minio_secret_key:
             logger.warning("MinIO credentials not configured, uploader will not work")
             self.client = None
@@ -66,21 +110,93 @@ class MinIOUploader:
             logger.error(f"Failed to initialize MinIO client: {e}")
             self.client = None
 
-    def _ensure_bucket_exists(self):
-        """Ensure the bucket exists, create if not"""
+    def _ensure_bucket_exists(self, force: bool = False):
+        """
+        Ensure the bucket exists and is publicly readable, create if not
+
+        The result is cached for `minio_bucket_cache_ttl` seconds, so uploads
+        don't pay an extra S3 round trip each.
+
+        Args:
+            force: Re-check even if the cached bucket state is still fresh
+        """
         if not self.client:
             return
 
+        bucket_name = settings.minio_bucket
+        with self._bucket_lock:
+            cache_fresh = (
+                self._verified_bucket == bucket_name
+                and time.monotonic() - self._bucket_verified_at < settings.minio_bucket_cache_ttl
+            )
+            if cache_fresh and not force:
+                # Each cached check saves the `bucket_exists` round trip
+                self._metrics["round_trips_saved"] += 1
+                return
+
+            self._metrics["bucket_checks"] += 1
+            self._verified_bucket = None
+
+        # Network calls run outside the lock, so a slow MinIO response doesn't
+        # stall other upload threads (concurrent checks are idempotent)
         try:
-            if not self.client.bucket_exists(settings.minio_bucket):
-                self.client.make_bucket(settings.minio_bucket)
-                logger.info(f"Created bucket: {settings.minio_bucket}")
+            if not self.client.bucket_exists(bucket_name):
+                try:
+                    self.client.make_bucket(bucket_name)
+                    logger.info(f"Created bucket: {bucket_name}")
+                except S3Error as e:
+                    # Created by a concurrent check
+                    if e.code not in ("BucketAlreadyOwnedByYou", "BucketAlreadyExists"):
+                        raise
 
             # Set bucket policy to allow public read access for audio files
             self._set_public_read_policy()
 
+            # Let the server expire old audio uploads where supported
+            self._set_audio_lifecycle_rule()
+
         except S3Error as e:
             logger.error(f"Error checking/creating bucket: {e}")
+            return
+
+        with self._bucket_lock:
+            self._verified_bucket = bucket_name
+            self._bucket_verified_at = time.monotonic()
+
+    def _upload_with_bucket_check(self, object_name: str, upload: Callable[[], None]):
+        """
+        Run an upload against the bucket
+
+        Uses the cached bucket state. If the upload fails with a bucket-related
+        S3 error, the bucket is re-checked (re-created if needed) and the upload
+        retried once.
+
+        Args:
+            object_name: Object name in MinIO
+            upload: Callable performing the upload
+        """
+        self._ensure_bucket_exists()
+        try:
+            upload()
+        except S3Error as e:
+            if e.code not in BUCKET_ERROR_CODES:
+                raise
+
+            logger.warning(f"Upload of {object_name} failed with {e.code}, re-checking bucket")
+            with self._bucket_lock:
+                self._metrics["bucket_rechecks_on_error"] += 1
+            self._ensure_bucket_exists(force=True)
+            upload()
+
+    def get_metrics(self) -> dict:
+        """
+        Get uploader metrics
+
+        Returns:
+            Counters of bucket checks performed and S3 round trips saved by caching
+        """
+        with self._bucket_lock:
+            return dict(self._metrics)
 
     def _set_public_read_policy(self):
         """Set bucket policy to allow public read access"""
@@ -108,6 +224,38 @@ class MinIOUploader:
         except S3Error as e:
             logger.warning(f"Failed to set bucket policy (may already exist): {e}")
 
+    def _set_audio_lifecycle_rule(self):
+        """
+        Set a lifecycle rule expiring uploaded audio after the retention window
+
+        Existing rules of the bucket are kept. Servers without lifecycle
+        support are left to the background sweeper.
+        """
+        if not self.client or settings.minio_audio_retention_hours <= 0:
+            return
+
+        try:
+            retention_days = max(1, math.ceil(settings.minio_audio_retention_hours / 24))
+            rule = Rule(
+                ENABLED,
+                rule_filter=Filter(prefix=f"{AUDIO_FOLDER}/"),
+                rule_id=AUDIO_LIFECYCLE_RULE_ID,
+                expiration=Expiration(days=retention_days),
+                abort_incomplete_multipart_upload=AbortIncompleteMultipartUpload(
+                    days_after_initiation=retention_days
+                )
+            )
+
+            current = self.client.get_bucket_lifecycle(settings.minio_bucket)
+            rules = [r for r in (current.rules if current else []) if r.rule_id != AUDIO_LIFECYCLE_RULE_ID]
+            rules.append(rule)
+
+            self.client.set_bucket_lifecycle(settings.minio_bucket, LifecycleConfig(rules))
+            logger.debug(f"Set audio lifecycle rule: expire after {retention_days} days")
+
+        except S3Error as e:
+            logger.warning(f"Lifecycle rules not supported, relying on sweeper: {e}")
+
     def upload_file(
         self,
         file_path: str | Path,
@@ -138,7 +286,9 @@ class MinIOUploader:
 
         # Generate object name if not provided
         if not object_name:
-            timestamp = int(datetime.now().timestamp())
+            # Named after the file's modification time, not the current time, so
+            # a retry of the same file gets the same name and resumes its upload
+            timestamp = int(file_path.stat().st_mtime)
             # Remove spaces from filename
             clean_filename = file_path.name.replace(' ', '_')
             object_name = f"{folder}/{timestamp}_{clean_filename}"
@@ -148,25 +298,37 @@ class MinIOUploader:
             object_name = f"{folder}/{clean_object_name}"
 
         try:
-            # Ensure bucket exists
-            if not self.client.bucket_exists(settings.minio_bucket):
-                self.client.make_bucket(settings.minio_bucket)
-                self._set_public_read_policy()
-
-            # Upload file
-            self.client.fput_object(
-                bucket_name=settings.minio_bucket,
-                object_name=object_name,
-                file_path=str(file_path),
-                content_type=content_type
-            )
+            file_size = file_path.stat().st_size
+
+            if file_size > settings.minio_multipart_threshold:
+                # Large file: parallel multipart upload, each part read from disk on demand
+                def read_part(offset: int, length: int) -> bytes:
+                    with open(file_path, 'rb') as f:
+                        f.seek(offset)
+                        return f.read(length)
+
+                def upload():
+                    self._multipart_upload(object_name, file_size, read_part, content_type)
+            else:
+                def upload():
+                    start_time = time.monotonic()
+                    self.client.fput_object(
+                        bucket_name=settings.minio_bucket,
+                        object_name=object_name,
+                        file_path=str(file_path),
+                        content_type=content_type
+                    )
+                    self._log_upload_speed(object_name, file_size, time.monotonic() - start_time)
+
+            self._upload_with_bucket_check(object_name, upload)
 
             # Generate URL
-            url = self._get_object_url(object_name)
+            url = self.get_object_url(object_name)
             logger.info(f"File uploaded successfully: {url}")
             return url
 
-        except S3Error as e:
+        except Exception as e:
+            # S3 errors, and connection errors from the part uploads or the bucket check
             logger.error(f"Failed to upload file: {e}")
             return None
 
@@ -203,33 +365,328 @@ class MinIOUploader:
             object_name = f"{normalized_path}{clean_filename}"
 
         try:
-            # Ensure bucket exists
-            if not self.client.bucket_exists(settings.minio_bucket):
-                self.client.make_bucket(settings.minio_bucket)
-                self._set_public_read_policy()
-
-            # Upload using BytesIO
-            file_stream = BytesIO(file_content)
             file_size = len(file_content)
 
-            self.client.put_object(
-                bucket_name=settings.minio_bucket,
-                object_name=object_name,
-                data=file_stream,
-                length=file_size,
-                content_type=content_type
-            )
+            if file_size > settings.minio_multipart_threshold:
+                # Large payload: parallel multipart upload of slices of the buffer
+                content_view = memoryview(file_content)
+
+                def read_part(offset: int, length: int) -> bytes:
+                    return bytes(content_view[offset:offset + length])
+
+                def upload():
+                    self._multipart_upload(object_name, file_size, read_part, content_type)
+            else:
+                def upload():
+                    start_time = time.monotonic()
+                    # Upload using BytesIO
+                    self.client.put_object(
+                        bucket_name=settings.minio_bucket,
+                        object_name=object_name,
+                        data=BytesIO(file_content),
+                        length=file_size,
+                        content_type=content_type
+                    )
+                    self._log_upload_speed(object_name, file_size, time.monotonic() - start_time)
+
+            self._upload_with_bucket_check(object_name, upload)
 
             # Generate URL
-            url = self._get_object_url(object_name)
+            url = self.get_object_url(object_name)
             logger.info(f"File uploaded successfully: {url}")
             return url
 
-        except S3Error as e:
+        except Exception as e:
+            # S3 errors, and connection errors from the part uploads or the bucket check
             logger.error(f"Failed to upload file: {e}")
             return None
 
-    def _get_object_url(self, object_name: str) -> str:
+    def _get_part_size(self, total_size: int) -> int:
+        """
+        Get multipart part size for an object
+
+        Uses the configured part size, raised if needed to stay within
+        the S3 limits (min 5MB per part, max 10000 parts).
+        """
+        part_size = max(settings.minio_part_size, MIN_PART_SIZE)
+        min_size_for_count = math.ceil(total_size / MAX_MULTIPART_COUNT)
+        return max(part_size, min_size_for_count)
+
+    def _find_incomplete_upload(self, object_name: str) -> tuple[Optional[str], dict[int, Part]]:
+        """
+        Find an incomplete multipart upload of an object
+
+        Args:
+            object_name: Object name in MinIO
+
+        Returns:
+            (upload ID, {part number: uploaded part}), (None, {}) if not found
+        """
+        try:
+            result = self.client._list_multipart_uploads(settings.minio_bucket, prefix=object_name)
+            uploads = [upload for upload in result.uploads if upload.object_name == object_name]
+            if not uploads:
+                return None, {}
+
+            # Resume the most recently initiated upload
+            upload = max(
+                uploads,
+                key=lambda u: u.initiated_time.timestamp() if u.initiated_time else 0
+            )
+
+            return upload.upload_id, self._list_uploaded_parts(object_name, upload.upload_id)
+
+        except S3Error as e:
+            logger.warning(f"Failed to list incomplete uploads for {object_name}: {e}")
+            return None, {}
+
+    def _list_uploaded_parts(self, object_name: str, upload_id: str) -> dict[int, Part]:
+        """
+        List the parts of a multipart upload received so far
+
+        Returns:
+            {part number: uploaded part}
+        """
+        parts = {}
+        part_number_marker = None
+        while True:
+            parts_result = self.client._list_parts(
+                settings.minio_bucket,
+                object_name,
+                upload_id,
+                part_number_marker=part_number_marker
+            )
+            parts.update({part.part_number: part for part in parts_result.parts})
+            if not parts_result.is_truncated:
+                break
+            part_number_marker = parts_result.next_part_number_marker
+        return parts
+
+    def _upload_part_with_retry(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        """
+        Upload a single part, retrying with exponential backoff
+
+        Returns:
+            ETag of the uploaded part
+        """
+        attempts = max(1, settings.minio_part_retries)
+        for attempt in range(1, attempts + 1):
+            try:
+                return self.client._upload_part(
+                    settings.minio_bucket,
+                    object_name,
+                    data,
+                    None,
+                    upload_id,
+                    part_number
+                )
+            except Exception as e:
+                if attempt >= attempts:
+                    raise
+                delay = 2 ** (attempt - 1)
+                logger.warning(
+                    f"Part {part_number} of {object_name} failed (attempt {attempt}/{attempts}): {e}, "
+                    f"retrying in {delay}s"
+                )
+                time.sleep(delay)
+
+    def _multipart_upload(
+        self,
+        object_name: str,
+        total_size: int,
+        read_part: Callable[[int, int], bytes],
+        content_type: str
+    ):
+        """
+        Upload an object using parallel multipart upload
+
+        Parts are uploaded concurrently through a bounded thread pool, so at most
+        `minio_parallel_uploads` parts are held in memory at a time. An incomplete
+        upload of the same object is resumed, re-using parts whose ETag matches the
+        local data. On failure the upload is left incomplete so a retry can resume it;
+        retries resume across calls because object names are stable (file
+        modification time, not upload time).
+
+        Args:
+            object_name: Object name in MinIO
+            total_size: Object size in bytes
+            read_part: Callable returning `length` bytes starting at `offset`
+            content_type: MIME type of the object
+        """
+        part_size = self._get_part_size(total_size)
+        part_count = math.ceil(total_size / part_size)
+
+        try:
+            upload_id, uploaded_parts = self._find_incomplete_upload(object_name)
+            if upload_id:
+                logger.info(f"Resuming multipart upload: {object_name} ({len(uploaded_parts)}/{part_count} parts uploaded)")
+            else:
+                upload_id = self.client._create_multipart_upload(
+                    settings.minio_bucket,
+                    object_name,
+                    {"Content-Type": content_type}
+                )
+
+            def upload_part(part_number: int) -> tuple[Part, int]:
+                offset = (part_number - 1) * part_size
+                length = min(part_size, total_size - offset)
+                data = read_part(offset, length)
+
+                # Skip parts already uploaded by a previous attempt
+                existing = uploaded_parts.get(part_number)
+                if existing and existing.size == length and existing.etag == hashlib.md5(data).hexdigest():
+                    return Part(part_number, existing.etag), 0
+
+                etag = self._upload_part_with_retry(object_name, upload_id, part_number, data)
+                return Part(part_number, etag), length
+
+            start_time = time.monotonic()
+            parts = []
+            sent_bytes = 0
+            workers = max(1, min(settings.minio_parallel_uploads, part_count))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="minio-part") as executor:
+                for part, sent in executor.map(upload_part, range(1, part_count + 1)):
+                    parts.append(part)
+                    sent_bytes += sent
+
+            self.client._complete_multipart_upload(settings.minio_bucket, object_name, upload_id, parts)
+
+            elapsed = time.monotonic() - start_time
+            resumed_bytes = total_size - sent_bytes
+            if resumed_bytes:
+                logger.info(f"Resumed {resumed_bytes / 1024 / 1024:.2f}MB from previous upload of {object_name}")
+            self._log_upload_speed(object_name, sent_bytes, elapsed, part_count=part_count, workers=workers)
+
+        except Exception as e:
+            logger.error(f"Multipart upload failed, can be resumed on retry: {object_name}: {e}")
+            raise
+
+    def _log_upload_speed(
+        self,
+        object_name: str,
+        size: int,
+        elapsed: float,
+        part_count: int = 1,
+        workers: int = 1
+    ):
+        """Log upload size, duration and throughput"""
+        speed = size / elapsed / 1024 / 1024 if elapsed > 0 else 0.0
+        details = f"{speed:.2f}MB/s"
+        if part_count > 1:
+            details += f", {part_count} parts, {workers} workers"
+        logger.info(f"Uploaded {object_name}: {size / 1024 / 1024:.2f}MB in {elapsed:.2f}s ({details})")
+
+    def release_object(self, url: str, size: int = 0):
+        """
+        Mark an uploaded object as no longer needed
+
+        The object is deleted by the next sweep.
+
+        Args:
+            url: Object URL returned by upload_file or upload_bytes
+            size: Object size in bytes, for reclaimed bytes reporting
+        """
+        base_url = self.get_object_url("")
+        if not url.startswith(base_url):
+            logger.warning(f"Not an object URL of this bucket: {url}")
+            return
+
+        with self._bucket_lock:
+            self._completed_objects[url[len(base_url):]] = size
+
+    def sweep(self) -> dict:
+        """
+        Delete completed and expired audio objects in batches
+
+        Deletes objects released by `release_object` and every object under
+        `audios/` older than `minio_audio_retention_hours`.
+
+        Returns:
+            dict: {"objects_deleted": int, "bytes_reclaimed": int}
+        """
+        if not self.client:
+            return {"objects_deleted": 0, "bytes_reclaimed": 0}
+
+        with self._bucket_lock:
+            candidates = self._completed_objects
+            self._completed_objects = {}
+
+        try:
+            if settings.minio_audio_retention_hours > 0:
+                cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.minio_audio_retention_hours)
+                for obj in self.client.list_objects(settings.minio_bucket, prefix=f"{AUDIO_FOLDER}/", recursive=True):
+                    if obj.last_modified and obj.last_modified < cutoff:
+                        candidates[obj.object_name] = obj.size or 0
+        except S3Error as e:
+            logger.error(f"Failed to list expired audio objects: {e}")
+
+        deleted = 0
+        reclaimed = 0
+        names = list(candidates)
+        batch_size = max(1, min(settings.minio_delete_batch_size, MAX_DELETE_BATCH_SIZE))
+
+        for start in range(0, len(names), batch_size):
+            batch = names[start:start + batch_size]
+            try:
+                # remove_objects is lazy, errors are only reported while iterating
+                errors = {
+                    error.name
+                    for error in self.client.remove_objects(
+                        settings.minio_bucket,
+                        [DeleteObject(name) for name in batch]
+                    )
+                }
+            except S3Error as e:
+                logger.error(f"Failed to delete objects: {e}")
+                with self._bucket_lock:
+                    # Retry on the next sweep
+                    for name in batch:
+                        self._completed_objects.setdefault(name, candidates[name])
+                continue
+
+            for name in batch:
+                if name in errors:
+                    logger.warning(f"Failed to delete object: {name}")
+                else:
+                    deleted += 1
+                    reclaimed += candidates[name]
+
+        with self._bucket_lock:
+            self._metrics["sweeps"] += 1
+            self._metrics["objects_deleted"] += deleted
+            self._metrics["bytes_reclaimed"] += reclaimed
+
+        if deleted:
+            logger.info(f"Sweep deleted {deleted} objects, reclaimed {reclaimed / 1024 / 1024:.2f}MB")
+        return {"objects_deleted": deleted, "bytes_reclaimed": reclaimed}
+
+    def start_sweeper(self):
+        """Start the background sweeper thread"""
+        if not self.client or settings.minio_sweep_interval <= 0:
+            return
+        if self._sweeper_thread and self._sweeper_thread.is_alive():
+            return
+
+        def run():
+            while not self._sweeper_stop.wait(settings.minio_sweep_interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.exception(f"Sweep failed: {e}")
+
+        self._sweeper_stop.clear()
+        self._sweeper_thread = threading.Thread(target=run, name="minio-sweeper", daemon=True)
+        self._sweeper_thread.start()
+        logger.info(f"MinIO sweeper started (every {settings.minio_sweep_interval}s)")
+
+    def stop_sweeper(self):
+        """Stop the background sweeper thread"""
+        self._sweeper_stop.set()
+        if self._sweeper_thread:
+            self._sweeper_thread.join(timeout=5)
+            self._sweeper_thread = None
+
+    def get_object_url(self, object_name: str) -> str:
         """
         Get public object URL
 
@@ -272,6 +729,200 @@ class MinIOUploader:
             logger.error(f"Failed to generate presigned URL: {e}")
             return None
 
+    def create_presigned_upload(
+        self,
+        filename: str,
+        size: int,
+        content_type: str = "application/octet-stream",
+        expires: Optional[timedelta] = None
+    ) -> Optional[dict]:
+        """
+        Let a client upload a file straight to the bucket
+
+        Files up to `minio_multipart_threshold` get one presigned PUT URL,
+        larger ones a multipart upload with a presigned URL per part, so
+        the bytes never pass through the backend. Objects are created under
+        `audios/`: the lifecycle rule and the sweeper delete them (and
+        abandoned multipart uploads) after the retention window.
+
+        Args:
+            filename: Original filename
+            size: File size in bytes
+            content_type: MIME type of the file
+            expires: URL lifetime (use configured value if None)
+
+        Returns:
+            {"object_name", "upload_id" (None for a single PUT), "part_size",
+            "parts": [{"part_number", "offset", "size", "url"}]}, None if failed
+        """
+        if not self.client:
+            logger.error("MinIO client not initialized")
+            return None
+
+        expires = expires or timedelta(seconds=settings.minio_presigned_upload_expiry)
+        clean_filename = Path(filename.replace("\\", "/")).name.replace(" ", "_")
+        # Unique folder per upload keeps the original filename as the object's base name
+        object_name = f"{AUDIO_FOLDER}/{int(time.time())}_{uuid.uuid4().hex[:8]}/{clean_filename}"
+
+        try:
+            self._ensure_bucket_exists()
+
+            if size <= settings.minio_multipart_threshold:
+                url = self.client.presigned_put_object(settings.minio_bucket, object_name, expires)
+                logger.info(f"Presigned upload: {object_name} ({size / 1024 / 1024:.2f}MB, single PUT)")
+                return {
+                    "object_name": object_name,
+                    "upload_id": None,
+                    "part_size": size,
+                    "parts": [{"part_number": 1, "offset": 0, "size": size, "url": url}],
+                }
+
+            part_size = self._get_part_size(size)
+            part_count = math.ceil(size / part_size)
+            upload_id = self.client._create_multipart_upload(
+                settings.minio_bucket,
+                object_name,
+                {"Content-Type": content_type}
+            )
+            parts = []
+            for part_number in range(1, part_count + 1):
+                offset = (part_number - 1) * part_size
+                parts.append({
+                    "part_number": part_number,
+                    "offset": offset,
+                    "size": min(part_size, size - offset),
+                    "url": self.client.get_presigned_url(
+                        "PUT",
+                        settings.minio_bucket,
+                        object_name,
+                        expires,
+                        extra_query_params={"uploadId": upload_id, "partNumber": str(part_number)}
+                    ),
+                })
+            logger.info(f"Presigned upload: {object_name} ({size / 1024 / 1024:.2f}MB, {part_count} parts)")
+            return {"object_name": object_name, "upload_id": upload_id, "part_size": part_size, "parts": parts}
+
+        except S3Error as e:
+            logger.error(f"Failed to create presigned upload: {e}")
+            return None
+
+    def complete_presigned_upload(
+        self,
+        object_name: str,
+        size: int,
+        upload_id: Optional[str] = None,
+        part_size: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Finish a presigned upload once the client has sent every part
+
+        Parts are listed from the server (ETags aren't taken from the
+        client) and must be exactly parts 1..N of the declared size: S3
+        would happily complete an upload with parts missing, leaving a
+        truncated object.
+
+        Args:
+            object_name: Object name from create_presigned_upload
+            size: Total size declared when the upload was created
+            upload_id: Multipart upload ID (None for a single PUT)
+            part_size: Part size from create_presigned_upload (computed from size if None)
+
+        Returns:
+            Object size in bytes, None if the client isn't initialized
+
+        Raises:
+            IncompleteUploadError: Parts or bytes are missing
+            S3Error: Completing failed, e.g. NoSuchUpload for an unknown,
+                expired or already completed upload
+        """
+        if not self.client:
+            logger.error("MinIO client not initialized")
+            return None
+
+        try:
+            if upload_id:
+                part_size = part_size or self._get_part_size(size)
+                part_count = math.ceil(size / part_size)
+                expected = range(1, part_count + 1)
+                parts = self._list_uploaded_parts(object_name, upload_id)
+                invalid = [
+                    number for number in expected
+                    if number not in parts or parts[number].size != min(part_size, size - (number - 1) * part_size)
+                ]
+                invalid += sorted(set(parts).difference(expected))
+                if invalid:
+                    raise IncompleteUploadError(f"Parts missing or of the wrong size: {invalid}")
+                self.client._complete_multipart_upload(
+                    settings.minio_bucket,
+                    object_name,
+                    upload_id,
+                    [Part(number, parts[number].etag) for number in expected]
+                )
+
+            uploaded_size = self.get_object_size(object_name)
+            if uploaded_size is None:
+                raise IncompleteUploadError("Object not uploaded yet")
+            if uploaded_size != size:
+                raise IncompleteUploadError(f"Object has {uploaded_size} bytes, expected {size}")
+            logger.info(f"Presigned upload complete: {object_name} ({size / 1024 / 1024:.2f}MB)")
+            return size
+
+        except S3Error as e:
+            logger.error(f"Failed to complete presigned upload of {object_name}: {e}")
+            raise
+        except IncompleteUploadError as e:
+            logger.warning(f"Presigned upload of {object_name} incomplete: {e}")
+            raise
+
+    def abort_presigned_upload(self, object_name: str, upload_id: Optional[str] = None):
+        """
+        Cancel a presigned upload, deleting the parts or object received
+
+        Args:
+            object_name: Object name from create_presigned_upload
+            upload_id: Multipart upload ID (None for a single PUT)
+
+        Raises:
+            S3Error: Aborting failed, e.g. NoSuchUpload for an unknown,
+                expired or already completed upload
+        """
+        if not self.client:
+            return
+
+        try:
+            if upload_id:
+                self.client._abort_multipart_upload(settings.minio_bucket, object_name, upload_id)
+            else:
+                self.client.remove_object(settings.minio_bucket, object_name)
+            logger.info(f"Presigned upload aborted: {object_name}")
+        except S3Error as e:
+            logger.warning(f"Failed to abort presigned upload of {object_name}: {e}")
+            raise
+
+    def get_object_size(self, object_name: str) -> Optional[int]:
+        """
+        Get the size of an object
+
+        Returns:
+            Size in bytes, None if not found
+        """
+        if not self.client:
+            return None
+
+        try:
+            return self.client.stat_object(settings.minio_bucket, object_name).size
+        except S3Error as e:
+            if e.code not in ("NoSuchKey", "NoSuchObject"):
+                logger.error(f"Failed to stat {object_name}: {e}")
+            return None
+
+
+@lru_cache()
+def get_minio_uploader() -> MinIOUploader:
+    """Get the shared uploader instance, created on first use"""
+    return MinIOUploader()
+
 
-# Global uploader instance
-minio_uploader = MinIOUploader()
+def peek_minio_uploader() -> Optional[MinIOUploader]:
+    """Get the shared uploader if it was created already, never creating it (that connects to MinIO)"""
+    return get_minio_uploader() if get_minio_uploader.cache_info().currsize else None
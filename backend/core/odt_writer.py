@@ -0,0 +1,216 @@
+"""ODT Writer - Streaming OpenDocument Text output"""
+import re
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO
+from xml.sax.saxutils import escape
+
+from core.document_model import BlockDocument, BlockType
+
+MIMETYPE = "application/vnd.oasis.opendocument.text"
+
+NAMESPACES = (
+    'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+    'xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0" '
+    'xmlns:meta="urn:oasis:names:tc:opendocument:xmlns:meta:1.0" '
+    'xmlns:dc="http://purl.org/dc/elements/1.1/" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink" '
+    'office:version="1.2"'
+)
+
+MANIFEST = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">'
+    f'<manifest:file-entry manifest:full-path="/" manifest:media-type="{MIMETYPE}"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+    '<manifest:file-entry manifest:full-path="styles.xml" manifest:media-type="text/xml"/>'
+    '<manifest:file-entry manifest:full-path="meta.xml" manifest:media-type="text/xml"/>'
+    '</manifest:manifest>'
+)
+
+# Named styles matching the DOCX output: Arial 12pt body, bold headings, bullet lists
+_HEADING_SIZES = {1: "16pt", 2: "14pt", 3: "13pt"}
+STYLES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    f'<office:document-styles {NAMESPACES}>'
+    '<office:styles>'
+    '<style:default-style style:family="paragraph">'
+    '<style:paragraph-properties fo:margin-bottom="0.1in"/>'
+    '<style:text-properties style:font-name="Arial" fo:font-family="Arial" fo:font-size="12pt"/>'
+    '</style:default-style>'
+    '<style:style style:name="Standard" style:family="paragraph" style:class="text"/>'
+    '<style:style style:name="Text_20_body" style:display-name="Text body" style:family="paragraph" style:parent-style-name="Standard" style:class="text"/>'
+    '<style:style style:name="Title" style:family="paragraph" style:parent-style-name="Standard" style:class="chapter">'
+    '<style:paragraph-properties fo:text-align="center" fo:margin-bottom="0.2in"/>'
+    '<style:text-properties fo:font-size="26pt" fo:font-weight="bold"/>'
+    '</style:style>'
+    '<style:style style:name="Heading" style:family="paragraph" style:parent-style-name="Standard" style:class="text">'
+    '<style:paragraph-properties fo:margin-top="0.17in" fo:keep-with-next="always"/>'
+    '<style:text-properties fo:font-weight="bold"/>'
+    '</style:style>'
+    + "".join(
+        f'<style:style style:name="Heading_20_{level}" style:display-name="Heading {level}" style:family="paragraph" '
+        f'style:parent-style-name="Heading" style:default-outline-level="{level}" style:class="text">'
+        f'<style:text-properties fo:font-size="{_HEADING_SIZES.get(level, "12pt")}"/>'
+        '</style:style>'
+        for level in range(1, 7)
+    )
+    + '<style:style style:name="List_20_Paragraph" style:display-name="List Paragraph" style:family="paragraph" style:parent-style-name="Standard" style:class="list"/>'
+    '<text:list-style style:name="List_20_Bullet" style:display-name="List Bullet">'
+    + "".join(
+        f'<text:list-level-style-bullet text:level="{level}" text:bullet-char="•">'
+        '<style:list-level-properties text:list-level-position-and-space-mode="label-alignment">'
+        f'<style:list-level-label-alignment text:label-followed-by="listtab" fo:text-indent="-0.25in" fo:margin-left="{0.25 * level + 0.25:.2f}in"/>'
+        '</style:list-level-properties>'
+        '</text:list-level-style-bullet>'
+        for level in range(1, 11)
+    )
+    + '</text:list-style>'
+    '</office:styles>'
+    '</office:document-styles>'
+)
+
+CONTENT_START = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    f'<office:document-content {NAMESPACES}>'
+    '<office:body><office:text>'
+)
+CONTENT_END = '</office:text></office:body></office:document-content>'
+
+# Characters not allowed in XML 1.0
+_INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+# Buffered content.xml characters before writing to the archive
+FLUSH_CHARS = 256 * 1024
+
+
+def _text(value: str) -> str:
+    """Escape text content"""
+    return escape(_INVALID_XML_CHARS.sub("", value))
+
+
+def _attribute(value: str) -> str:
+    """Escape an attribute value"""
+    return escape(value, {'"': "&quot;"})
+
+
+class StreamingOdtWriter:
+    """
+    Writes an ODT file block by block
+
+    content.xml is written straight into the archive as blocks are added,
+    so memory doesn't grow with the document. Images are skipped.
+    """
+
+    def __init__(self, output_path: Path | BinaryIO, title: str = ""):
+        """
+        Start a document
+
+        Args:
+            output_path: ODT file to create, or a binary stream
+            title: Document title for the metadata
+        """
+        self.output_path = output_path
+
+        self._zip = zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED)
+        # The mimetype must be the first entry, uncompressed
+        self._zip.writestr("mimetype", MIMETYPE, compress_type=zipfile.ZIP_STORED)
+        self._zip.writestr("META-INF/manifest.xml", MANIFEST)
+        self._zip.writestr("styles.xml", STYLES)
+        self._zip.writestr(
+            "meta.xml",
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<office:document-meta {NAMESPACES}><office:meta>'
+            '<meta:generator>to-docx</meta:generator>'
+            f'<dc:title>{_text(title)}</dc:title>'
+            f'<dc:date>{datetime.now().isoformat(timespec="seconds")}</dc:date>'
+            '</office:meta></office:document-meta>'
+        )
+
+        self._content = self._zip.open("content.xml", "w", force_zip64=True)
+        self._buffer = [CONTENT_START]
+        self._buffered_chars = len(CONTENT_START)
+
+    def _write(self, xml: str):
+        """Buffer XML, flushing to the archive in large chunks"""
+        self._buffer.append(xml)
+        self._buffered_chars += len(xml)
+        if self._buffered_chars >= FLUSH_CHARS:
+            self._flush()
+
+    def _flush(self):
+        self._content.write("".join(self._buffer).encode("utf-8"))
+        self._buffer.clear()
+        self._buffered_chars = 0
+
+    def add_title(self, text: str):
+        """Add a centered document title"""
+        self._write(f'<text:p text:style-name="Title">{_text(text)}</text:p>')
+
+    def add_heading(self, text: str, level: int):
+        """Add a heading (level 1-10)"""
+        level = max(1, min(level, 10))
+        style = f"Heading_20_{min(level, 6)}"
+        self._write(f'<text:h text:style-name="{style}" text:outline-level="{level}">{_text(text)}</text:h>')
+
+    def add_paragraph(self, text: str = ""):
+        """Add a body text paragraph"""
+        self._write(f'<text:p text:style-name="Text_20_body">{_text(text)}</text:p>')
+
+    def add_link(self, text: str, target: str):
+        """
+        Add a paragraph linking to a file or URL
+
+        Args:
+            text: Link text
+            target: Relative file path or URL
+        """
+        self._write(
+            f'<text:p text:style-name="Text_20_body">'
+            f'<text:a xlink:type="simple" xlink:href="{_attribute(target)}">{_text(text)}</text:a></text:p>'
+        )
+
+    def add_list_item(self, text: str, level: int):
+        """Add a bulleted list item (nesting depth 1-10)"""
+        depth = max(1, min(level, 10))
+        # Each item is its own list, nested to its depth
+        opening = '<text:list text:style-name="List_20_Bullet"><text:list-item>' + "<text:list><text:list-item>" * (depth - 1)
+        closing = "</text:list-item></text:list>" * depth
+        self._write(f'{opening}<text:p text:style-name="List_20_Paragraph">{_text(text)}</text:p>{closing}')
+
+    def add_document(self, document: BlockDocument):
+        """
+        Add the blocks of a structured document
+
+        Args:
+            document: Structured document
+        """
+        for block_type, level, text in document:
+            if block_type == BlockType.HEADING:
+                self.add_heading(text, level)
+            elif block_type == BlockType.LIST_ITEM:
+                self.add_list_item(text, level)
+            elif block_type == BlockType.IMAGE:
+                continue
+            else:
+                self.add_paragraph(text)
+
+    def close(self):
+        """Finish the document"""
+        self._write(CONTENT_END)
+        self._flush()
+        self._content.close()
+        self._zip.close()
+
+    def abort(self):
+        """Close and delete a partially written document"""
+        try:
+            self._content.close()
+            self._zip.close()
+        except Exception:
+            pass
+        if isinstance(self.output_path, Path):
+            self.output_path.unlink(missing_ok=True)
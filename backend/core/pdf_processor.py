@@ -0,0 +1,311 @@
+"""PDF Processor - Extract the text layer of PDF files"""
+import ctypes
+import itertools
+import mmap
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pypdfium2 as pdfium
+from loguru import logger
+
+from config import settings
+from core.document_model import BlockDocument
+
+# Pages per worker task bounds
+MIN_BATCH_PAGES = 4
+MAX_BATCH_PAGES = 64
+
+# PDFium is not thread-safe: every call into it in this process holds this lock
+_pdfium_lock = threading.Lock()
+
+
+def _reset_pdfium_lock():
+    global _pdfium_lock
+    _pdfium_lock = threading.Lock()
+
+
+# Forked worker processes (Unix): never fork while a thread is inside PDFium, and each child
+# starts unlocked. Spawned workers (Windows) import the module and get a fresh lock anyway.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=lambda: _pdfium_lock.acquire(),
+        after_in_parent=lambda: _pdfium_lock.release(),
+        after_in_child=_reset_pdfium_lock
+    )
+
+
+class InvalidPDFError(Exception):
+    """File that can't be opened as a PDF (empty, not a PDF, damaged or encrypted)"""
+
+
+class MappedPDF:
+    """
+    PDF document over a memory-mapped file
+
+    PDFium reads the mapping in place, so worker processes opening the same
+    file share its pages through the OS page cache instead of each holding
+    a copy. The mapping is copy-on-write because ctypes needs a writable
+    buffer; PDFium never writes to it.
+    """
+
+    def __init__(self, pdf_path: str):
+        """
+        Open a PDF file
+
+        Args:
+            pdf_path: PDF file path
+
+        Raises:
+            InvalidPDFError: The file is empty or PDFium can't load it
+        """
+        self.path = pdf_path
+        with open(pdf_path, "rb") as f:
+            # An empty file can't be mapped
+            if os.fstat(f.fileno()).st_size == 0:
+                raise InvalidPDFError(f"Empty PDF file: {Path(pdf_path).name}")
+            self._mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self._buffer = (ctypes.c_char * len(self._mapping)).from_buffer(self._mapping)
+        try:
+            with _pdfium_lock:
+                self.document = pdfium.PdfDocument(self._buffer)
+        except pdfium.PdfiumError as e:
+            self.document = None
+            self._release_mapping()
+            raise InvalidPDFError(f"Invalid PDF file: {Path(pdf_path).name} ({e})")
+
+    def __len__(self) -> int:
+        with _pdfium_lock:
+            return len(self.document)
+
+    def extract_page(self, index: int) -> BlockDocument:
+        """
+        Extract the text layer of a page
+
+        Args:
+            index: Zero-based page index
+
+        Returns:
+            Document with one paragraph per text line
+        """
+        with _pdfium_lock:
+            page = self.document[index]
+            try:
+                text_page = page.get_textpage()
+                try:
+                    text = text_page.get_text_range()
+                finally:
+                    text_page.close()
+            finally:
+                page.close()
+        return BlockDocument.from_text(text.replace("\r\n", "\n").replace("\r", "\n"))
+
+    def close(self):
+        """Close the document and release the mapping"""
+        with _pdfium_lock:
+            self.document.close()
+        self.document = None
+        self._release_mapping()
+
+    def _release_mapping(self):
+        # The buffer export must be gone before the mapping can close
+        self._buffer = None
+        try:
+            self._mapping.close()
+        except BufferError:
+            pass
+
+
+def _extract_pages(pdf_path: str, start: int, stop: int) -> list[tuple[BlockDocument, float]]:
+    """
+    Extract the text layer of a page range (runs in a worker process)
+
+    The document is opened per range, never kept open between ranges: a
+    file replaced at the same path would be read through the old mapping,
+    and on Windows a mapped file can't be deleted or overwritten.
+
+    Args:
+        pdf_path: PDF file path
+        start: First page index
+        stop: Page index after the last page
+
+    Returns:
+        (document, seconds) per page
+    """
+    pdf = MappedPDF(pdf_path)
+    try:
+        pages = []
+        for index in range(start, stop):
+            page_start = time.perf_counter()
+            document = pdf.extract_page(index)
+            pages.append((document, time.perf_counter() - page_start))
+        return pages
+    finally:
+        pdf.close()
+
+
+class PDFProcessor:
+    """PDF File Processor"""
+
+    def __init__(self):
+        """Initialize PDF processor"""
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers = 0
+        self._pool_lock = threading.Lock()
+
+    def _get_parse_workers(self) -> int:
+        """Get the configured number of page parsing processes"""
+        workers = settings.pdf_parse_workers
+        if workers <= 0:
+            return os.cpu_count() or 1
+        return workers
+
+    def _get_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Get the shared process pool, created on first use"""
+        with self._pool_lock:
+            if self._pool is None or self._pool_workers != workers:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                self._pool = ProcessPoolExecutor(max_workers=workers)
+                self._pool_workers = workers
+            return self._pool
+
+    def shutdown(self):
+        """Shut down the page parsing worker processes"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _plan_ranges(self, page_count: int, workers: int) -> list[tuple[int, int]]:
+        """
+        Split pages into consecutive ranges, a few per worker
+
+        Args:
+            page_count: Number of pages
+            workers: Number of worker processes
+
+        Returns:
+            (start, stop) page index ranges, in order
+        """
+        batch_pages = min(max(-(-page_count // (workers * 4)), MIN_BATCH_PAGES), MAX_BATCH_PAGES)
+        return [(start, min(start + batch_pages, page_count)) for start in range(0, page_count, batch_pages)]
+
+    def _iter_pages_parallel(self, pdf_path: Path, ranges: list[tuple[int, int]], workers: int) -> Iterator[tuple[BlockDocument, float]]:
+        """
+        Extract page ranges in worker processes, yielding pages in order
+
+        At most two ranges per worker are in flight, which bounds memory
+        when the consumer is slower than the workers.
+        """
+        pool = self._get_pool(workers)
+        range_iter = iter(ranges)
+
+        pending = deque(
+            pool.submit(_extract_pages, str(pdf_path), start, stop)
+            for start, stop in itertools.islice(range_iter, workers * 2)
+        )
+        while pending:
+            pages = pending.popleft().result()
+            next_range = next(range_iter, None)
+            if next_range is not None:
+                pending.append(pool.submit(_extract_pages, str(pdf_path), *next_range))
+            yield from pages
+
+    def _iter_pages_serial(self, pdf: MappedPDF) -> Iterator[tuple[BlockDocument, float]]:
+        """Extract pages in this process, in order"""
+        for index in range(len(pdf)):
+            page_start = time.perf_counter()
+            document = pdf.extract_page(index)
+            yield document, time.perf_counter() - page_start
+
+    def iter_pages(self, pdf_file: str | Path) -> Iterator[BlockDocument]:
+        """
+        Extract the text layer of a PDF file page by page, in order
+
+        Documents with at least `pdf_parallel_min_pages` pages are split
+        into page ranges parsed in worker processes, each mapping the file
+        into memory, and reassembled in order. Per-page timings are logged
+        at debug level, with a summary of the slowest pages at the end.
+
+        Args:
+            pdf_file: PDF file path
+
+        Yields:
+            Document of each page with text
+
+        Raises:
+            InvalidPDFError: The file is empty or not a readable PDF
+        """
+        pdf_path = Path(pdf_file)
+        logger.debug(f"Reading PDF file: {pdf_path.name}")
+
+        start_time = time.perf_counter()
+        pdf = MappedPDF(str(pdf_path))
+        try:
+            page_count = len(pdf)
+            workers = min(self._get_parse_workers(), max(1, page_count // MIN_BATCH_PAGES))
+            if workers > 1 and page_count >= settings.pdf_parallel_min_pages:
+                # Workers map the file themselves
+                pdf.close()
+                pdf = None
+                ranges = self._plan_ranges(page_count, workers)
+                logger.debug(f"Parsing {page_count} pages in {len(ranges)} ranges on {workers} processes")
+                pages = self._iter_pages_parallel(pdf_path, ranges, workers)
+            else:
+                pages = self._iter_pages_serial(pdf)
+
+            timings = []
+            for index, (document, seconds) in enumerate(pages):
+                timings.append(seconds)
+                logger.debug(f"PDF page {index + 1}/{page_count}: {seconds * 1000:.1f}ms, {len(document)} lines")
+                if len(document):
+                    yield document
+        finally:
+            if pdf is not None:
+                pdf.close()
+
+        if timings:
+            slowest = sorted(range(len(timings)), key=timings.__getitem__, reverse=True)[:3]
+            slowest_text = ", ".join(f"p{index + 1} {timings[index] * 1000:.0f}ms" for index in slowest)
+            logger.info(
+                f"PDF text extracted: {page_count} pages in {time.perf_counter() - start_time:.2f}s "
+                f"(parse {sum(timings):.2f}s, slowest: {slowest_text})"
+            )
+
+    def extract_text(self, pdf_file: str | Path) -> Optional[str]:
+        """
+        Extract text content from PDF file
+
+        Args:
+            pdf_file: PDF file path
+
+        Returns:
+            Extracted text if successful, None otherwise
+        """
+        try:
+            pdf_path = Path(pdf_file)
+            if not pdf_path.exists():
+                logger.error(f"PDF file not found: {pdf_path}")
+                return None
+
+            full_text = '\n\n'.join(page.to_text() for page in self.iter_pages(pdf_path))
+
+            if not full_text:
+                logger.warning("No text layer found in PDF (scanned document?)")
+                return None
+
+            logger.info(f"PDF text extracted: {len(full_text)} characters")
+            return full_text
+
+        except Exception as e:
+            logger.exception(f"Error extracting PDF text: {e}")
+            return None
+
+
+# Global processor instance
+pdf_processor = PDFProcessor()
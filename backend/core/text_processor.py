@@ -0,0 +1,200 @@
+"""Text Processor - Stream plain text and Markdown files"""
+import codecs
+import re
+from pathlib import Path
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from config import settings
+from core.document_model import BlockDocument, BlockType
+
+# Byte order marks, longest first (UTF-32 LE starts with the UTF-16 LE BOM)
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Encodings tried on the sample when there is no BOM (GB18030 is a superset of GBK)
+FALLBACK_ENCODINGS = ("utf-8", "gb18030")
+
+MARKDOWN_SUFFIXES = {".md", ".markdown"}
+
+# Longest line read at once; longer lines are split into several blocks
+MAX_LINE_CHARS = 64 * 1024
+
+# Markdown syntax
+_HEADING = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_LIST_ITEM = re.compile(r"^([ \t]*)(?:[-*+]|\d{1,9}[.)])[ \t]+(.*)$")
+_FENCE = re.compile(r"^ {0,3}(```|~~~)")
+_THEMATIC_BREAK = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Detect the text encoding of a file from its first bytes
+
+    Args:
+        sample: First bytes of the file
+
+    Returns:
+        Codec name: from the BOM if any, else the first of UTF-8 and GB18030
+        that decodes the sample, else UTF-8 (undecodable bytes get replaced)
+    """
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            # Incremental decoding tolerates a character cut off at the end of the sample
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+
+    return "utf-8"
+
+
+class TextProcessor:
+    """Plain text and Markdown File Processor"""
+
+    def _iter_lines(self, text_path: Path) -> Iterator[str]:
+        """Read lines of a text file in its detected encoding, without line endings"""
+        with open(text_path, "rb") as f:
+            sample = f.read(settings.text_encoding_sample_bytes)
+
+        encoding = detect_encoding(sample)
+        logger.debug(f"Reading text file: {text_path.name} (encoding: {encoding})")
+
+        with open(text_path, "r", encoding=encoding, errors="replace", newline=None) as f:
+            for line in iter(lambda: f.readline(MAX_LINE_CHARS), ""):
+                yield line.rstrip("\n")
+
+    def _iter_text_blocks(self, lines: Iterator[str]) -> Iterator[tuple[BlockType, int, str]]:
+        """Plain text: one paragraph per non-empty line"""
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield BlockType.PARAGRAPH, 0, line
+
+    def _iter_markdown_blocks(self, lines: Iterator[str]) -> Iterator[tuple[BlockType, int, str]]:
+        """
+        Markdown: ATX headings, (nested) list items and paragraphs
+
+        Consecutive lines form one paragraph; fenced code keeps one
+        paragraph per line. Inline markup is kept as is.
+        """
+        paragraph = []
+        paragraph_chars = 0
+        fence = None
+
+        def flush():
+            nonlocal paragraph_chars
+            text = " ".join(paragraph)
+            paragraph.clear()
+            paragraph_chars = 0
+            return text
+
+        for line in lines:
+            if fence:
+                if line.lstrip().startswith(fence):
+                    fence = None
+                elif line.strip():
+                    yield BlockType.PARAGRAPH, 0, line.rstrip()
+                continue
+
+            fence_match = _FENCE.match(line)
+            heading_match = _HEADING.match(line)
+            thematic_break = _THEMATIC_BREAK.match(line)
+            list_match = _LIST_ITEM.match(line) if not thematic_break else None
+            starts_block = not line.strip() or fence_match or heading_match or list_match or thematic_break
+
+            if starts_block and paragraph:
+                yield BlockType.PARAGRAPH, 0, flush()
+
+            if fence_match:
+                fence = fence_match.group(1)
+            elif heading_match:
+                yield BlockType.HEADING, len(heading_match.group(1)), (heading_match.group(2) or "").strip()
+            elif list_match:
+                indent = len(list_match.group(1).expandtabs(4))
+                yield BlockType.LIST_ITEM, indent // 2 + 1, list_match.group(2).strip()
+            elif not starts_block:
+                paragraph.append(line.strip())
+                paragraph_chars += len(paragraph[-1])
+                if paragraph_chars >= MAX_LINE_CHARS:
+                    yield BlockType.PARAGRAPH, 0, flush()
+
+        if paragraph:
+            yield BlockType.PARAGRAPH, 0, flush()
+
+    def iter_documents(self, text_file: str | Path) -> Iterator[BlockDocument]:
+        """
+        Read a text or Markdown file as a stream of documents
+
+        The file is decoded incrementally and blocks are grouped into
+        documents of about `text_chunk_chars` characters, so memory stays
+        constant regardless of file size.
+
+        Args:
+            text_file: .txt or .md file path
+
+        Yields:
+            Documents of consecutive blocks
+        """
+        text_path = Path(text_file)
+        lines = self._iter_lines(text_path)
+        if text_path.suffix.lower() in MARKDOWN_SUFFIXES:
+            blocks = self._iter_markdown_blocks(lines)
+        else:
+            blocks = self._iter_text_blocks(lines)
+
+        document = BlockDocument()
+        characters = 0
+        for block_type, level, text in blocks:
+            document.add(block_type, text, level)
+            characters += len(text)
+            if characters >= settings.text_chunk_chars:
+                yield document
+                document = BlockDocument()
+                characters = 0
+
+        if len(document):
+            yield document
+
+    def extract_text(self, text_file: str | Path) -> Optional[str]:
+        """
+        Extract text content from a text or Markdown file
+
+        Args:
+            text_file: .txt or .md file path
+
+        Returns:
+            Extracted text if successful, None otherwise
+        """
+        try:
+            text_path = Path(text_file)
+            if not text_path.exists():
+                logger.error(f"Text file not found: {text_path}")
+                return None
+
+            full_text = "\n".join(document.to_text() for document in self.iter_documents(text_path))
+
+            if not full_text:
+                logger.warning("No text content found in file")
+                return None
+
+            logger.info(f"Text extracted: {len(full_text)} characters")
+            return full_text
+
+        except Exception as e:
+            logger.exception(f"Error extracting text: {e}")
+            return None
+
+
+# Global processor instance
+text_processor = TextProcessor()
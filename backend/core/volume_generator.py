@@ -0,0 +1,267 @@
+"""Volume Generator - Split large outputs into volumes generated in parallel"""
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Literal, Optional
+
+from loguru import logger
+
+from config import settings
+from core.document_generator import OUTPUT_EXTENSIONS, OutputFormat, document_generator
+from core.document_model import BlockDocument, BlockType
+
+VolumeMode = Literal["chapter", "size"]
+
+# Characters of the first line used in volume labels
+LABEL_CHARS = 60
+
+
+def _generate_volume(
+    documents: list[BlockDocument],
+    output_formats: list[OutputFormat],
+    title: Optional[str],
+    output_filename: str,
+    output_dir: Optional[str],
+    images,
+    template_path: Optional[str]
+) -> dict[str, Optional[Path]]:
+    """
+    Generate one volume in every format (runs in a worker process)
+
+    Args:
+        documents: Documents of the volume
+        output_formats: Formats to generate
+        title: Volume title
+        output_filename: Volume filename without extension
+        output_dir: Output directory
+        images: Image reader (opened in this process), or None
+        template_path: DOCX template
+
+    Returns:
+        Output file path (None if failed) per format
+    """
+    try:
+        return document_generator.generate(
+            documents, output_formats, title, output_filename, output_dir, images, template_path
+        )
+    finally:
+        if images is not None:
+            images.close()
+
+
+class VolumeGenerator:
+    """Generates large outputs as several volumes plus an index document"""
+
+    def __init__(self):
+        """Initialize volume generator"""
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers = 0
+        self._pool_lock = threading.Lock()
+
+    def _get_workers(self) -> int:
+        """Get the configured number of volume generating processes"""
+        workers = settings.volume_workers
+        if workers <= 0:
+            return os.cpu_count() or 1
+        return workers
+
+    def _get_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Get the shared process pool, created on first use"""
+        with self._pool_lock:
+            if self._pool is None or self._pool_workers != workers:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                self._pool = ProcessPoolExecutor(max_workers=workers)
+                self._pool_workers = workers
+            return self._pool
+
+    def shutdown(self):
+        """Shut down the volume worker processes"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _split_document(self, document: BlockDocument, max_chars: int) -> Iterator[BlockDocument]:
+        """
+        Cut a document into pieces of at most max_chars characters
+
+        Cuts fall between blocks; a block longer than max_chars on its own
+        is cut at a space in the second half of the limit if there is one,
+        otherwise at the limit.
+
+        Args:
+            document: Document (e.g. a whole transcript)
+            max_chars: Max characters per piece
+
+        Yields:
+            Pieces in order
+        """
+        if document.char_count <= max_chars:
+            yield document
+            return
+
+        piece = BlockDocument()
+        for block_type, level, text in document:
+            if piece.char_count + len(text) > max_chars and len(piece):
+                yield piece
+                piece = BlockDocument()
+            if block_type != BlockType.IMAGE:
+                while len(text) > max_chars:
+                    cut = text.rfind(" ", max_chars // 2, max_chars + 1)
+                    if cut <= 0:
+                        cut = max_chars
+                    piece.add(block_type, text[:cut], level)
+                    yield piece
+                    piece = BlockDocument()
+                    text = text[cut:].lstrip(" ")
+            piece.add(block_type, text, level)
+        if len(piece):
+            yield piece
+
+    def split(self, documents: Iterable[BlockDocument], mode: VolumeMode, max_chars: int) -> Iterator[list[BlockDocument]]:
+        """
+        Group documents into volumes
+
+        Args:
+            documents: Documents in order (EPUB chapters, text chunks, PDF pages)
+            mode: "chapter" starts a volume at every document opening with a
+                heading; "size" fills volumes up to max_chars characters, at
+                document boundaries where possible (larger documents are
+                cut at block boundaries, or inside a block as a last resort)
+            max_chars: Max characters per volume (size mode)
+
+        Yields:
+            Documents of each volume
+        """
+        if mode == "size":
+            documents = (piece for document in documents for piece in self._split_document(document, max_chars))
+
+        volume: list[BlockDocument] = []
+        volume_chars = 0
+        for document in documents:
+            if not len(document):
+                continue
+            if volume:
+                if mode == "chapter":
+                    new_volume = document.first_type == BlockType.HEADING
+                else:
+                    new_volume = volume_chars + document.char_count > max_chars
+                if new_volume:
+                    yield volume
+                    volume = []
+                    volume_chars = 0
+            volume.append(document)
+            volume_chars += document.char_count
+        if volume:
+            yield volume
+
+    def _get_base_filename(self, title: Optional[str], output_filename: Optional[str]) -> str:
+        """Filename shared by the index and the volumes, without extension"""
+        if output_filename:
+            stem, dot, extension = output_filename.rpartition(".")
+            if dot and stem and f".{extension.lower()}" in OUTPUT_EXTENSIONS.values():
+                return stem
+            return output_filename
+        return document_generator._clean_filename(title or "") or "document"
+
+    def generate(
+        self,
+        content: Iterable[BlockDocument],
+        output_formats: list[OutputFormat],
+        mode: VolumeMode,
+        max_chars: Optional[int] = None,
+        title: Optional[str] = None,
+        output_filename: Optional[str] = None,
+        output_dir: Optional[str] = None,
+        images=None,
+        template_path: Optional[str] = None
+    ) -> tuple[dict[str, Optional[Path]], list[dict[str, Optional[Path]]]]:
+        """
+        Generate the content as volumes, plus an index document per format
+
+        Volumes are cut while the content is still being extracted and
+        generated in worker processes, at most two per worker in flight, so
+        memory is bounded by a few volumes. Each worker writes complete
+        files; the index links the volumes by relative path, so they must
+        stay in the same directory.
+
+        Args:
+            content: Documents in order
+            output_formats: Formats to generate
+            mode: Volume boundaries, "chapter" or "size"
+            max_chars: Max characters per volume in size mode (use configured value if None)
+            title: Document title
+            output_filename: Base filename (from the title if None); volumes get _001, _002, ...
+            output_dir: Custom output directory (use default if None)
+            images: Image reader for DOCX output; must be picklable (EPUBImageReader)
+            template_path: Template for DOCX output
+
+        Returns:
+            (index file path per format, output file paths per format of each volume)
+        """
+        max_chars = max_chars or settings.volume_max_chars
+        base_filename = self._get_base_filename(title, output_filename)
+        workers = self._get_workers()
+        pool = self._get_pool(workers) if workers > 1 else None
+
+        labels = []
+        volume_outputs: list[dict[str, Optional[Path]]] = []
+        pending = deque()
+
+        def submit(number: int, documents: list[BlockDocument]):
+            arguments = (
+                documents,
+                output_formats,
+                f"{title} - Volume {number}" if title else None,
+                f"{base_filename}_{number:03d}",
+                output_dir,
+                images,
+                template_path
+            )
+            if pool is None:
+                # In-process: the caller's image reader stays open
+                pending.append(document_generator.generate(*arguments))
+            else:
+                pending.append(pool.submit(_generate_volume, *arguments))
+
+        def collect():
+            result = pending.popleft()
+            if not isinstance(result, dict):
+                try:
+                    result = result.result()
+                except Exception as e:
+                    logger.exception(f"Error generating volume {len(volume_outputs) + 1}: {e}")
+                    result = {}
+            volume_outputs.append(result)
+
+        for number, documents in enumerate(self.split(content, mode, max_chars), start=1):
+            first_line = documents[0].first_text().strip()[:LABEL_CHARS]
+            labels.append(f"Volume {number}: {first_line}" if first_line else f"Volume {number}")
+            logger.debug(f"Volume {number}: {len(documents)} chapters, {sum(document.char_count for document in documents)} characters")
+
+            if len(pending) >= workers * 2:
+                collect()
+            submit(number, documents)
+        while pending:
+            collect()
+
+        logger.info(f"Generated {len(volume_outputs)} volumes ({mode} mode) on {workers} processes")
+
+        index_paths = {}
+        for output_format in output_formats:
+            volumes = [
+                (label, outputs[output_format])
+                for label, outputs in zip(labels, volume_outputs) if outputs.get(output_format)
+            ]
+            index_paths[output_format] = document_generator.generate_index(
+                volumes, output_format, title, base_filename, output_dir
+            ) if volumes else None
+
+        return index_paths, volume_outputs
+
+
+# Global generator instance
+volume_generator = VolumeGenerator()
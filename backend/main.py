@@ -5,16 +5,23 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from loguru import logger
+from utils.startup_report import measure, mark_ready, format_startup_report
 
-from config import settings
-from utils.logger import setup_logger
-from routes import convert, system, license
+with measure("import fastapi"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from loguru import logger
+
+with measure("import config"):
+    from config import settings
+
+with measure("import routes"):
+    from utils.logger import setup_logger
+    from routes import convert, system, license, upload
 
 # Setup logger
-setup_logger()
+with measure("setup logger"):
+    setup_logger()
 
 # Create FastAPI application
 app = FastAPI(
@@ -34,25 +41,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def bind_request_id(request, call_next):
+    """Tag every log line of a request with its ID (X-Request-ID or generated)"""
+    import uuid
+
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:12]
+    with logger.contextualize(request_id=request_id):
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 # Include routers
 app.include_router(convert.router)
 app.include_router(system.router)
 app.include_router(license.router)
+app.include_router(upload.router)
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Application startup"""
-    import os
+def warm_up():
+    """
+    Run slow startup work in the background
 
-    logger.info(f"🚀 {settings.app_name} v{settings.app_version} starting...")
-    logger.info(f"📁 Output directory: {settings.output_dir}")
-    logger.info(f"📁 Temp directory: {settings.temp_dir}")
-    logger.info(f"🔧 Debug mode: {settings.debug}")
+    Imports heavy libraries and performs network/hardware checks after the
+    server is accepting requests, so the desktop app doesn't wait for them.
+    """
+    import importlib
+    import os
 
-    # Check activation status
+    # Preload conversion modules (python-docx, lxml, dashscope, minio)
+    for module_name in ("core.document_generator", "core.epub_processor", "core.audio_processor"):
+        try:
+            with measure(f"warm-up import {module_name}"):
+                importlib.import_module(module_name)
+        except Exception as e:
+            logger.warning(f"Failed to preload {module_name}: {e}")
+
+    # Parse the DOCX template once, ahead of the first conversion
+    try:
+        from core.docx_writer import get_template
+        with measure("warm-up DOCX template"):
+            get_template()
+    except Exception as e:
+        logger.warning(f"Failed to load DOCX template: {e}")
+
+    # Check activation status (machine code may spawn system commands)
     from utils.license import check_activation
-    activation = check_activation()
+    with measure("warm-up activation check"):
+        activation = check_activation()
     if activation["activated"]:
         logger.info(f"✅ Software activated (Expire: {activation['expire_date']})")
     else:
@@ -61,6 +99,10 @@ async def startup_event():
 
     # Check configurations
     if settings.minio_endpoint and settings.minio_access_key:
+        from core.minio_uploader import get_minio_uploader
+        with measure("warm-up MinIO bucket check"):
+            minio_uploader = get_minio_uploader()
+        minio_uploader.start_sweeper()
         logger.info(f"✅ MinIO configured: {settings.minio_endpoint}/{settings.minio_bucket}")
     else:
         logger.warning("⚠️  MinIO not configured - file upload will not work")
@@ -73,12 +115,61 @@ async def startup_event():
         logger.warning("⚠️  DashScope API not configured - audio transcription will not work")
         logger.warning("⚠️  Please activate the software to enable audio transcription")
 
+    logger.info(f"⏱️  Startup report: {format_startup_report()}")
+
+    # Probe dependencies in the background for the readiness endpoint
+    from utils.health import health_prober
+    health_prober.start()
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Application startup"""
+    import asyncio
+
+    logger.info(f"🚀 {settings.app_name} v{settings.app_version} starting...")
+    logger.info(f"📁 Output directory: {settings.output_dir}")
+    logger.info(f"📁 Temp directory: {settings.temp_dir}")
+    logger.info(f"🔧 Debug mode: {settings.debug}")
+
+    mark_ready()
+
+    # Machine code may spawn system commands (wmic, getmac): compute it right away, off the event loop
+    from utils.license import start_machine_code_probe
+    start_machine_code_probe()
+
+    # Keep a reference so the task isn't garbage collected
+    app.state.warm_up_task = asyncio.create_task(asyncio.to_thread(warm_up))
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown"""
     logger.info(f"🛑 {settings.app_name} shutting down...")
 
+    import sys
+    if "utils.health" in sys.modules:
+        from utils.health import health_prober
+        health_prober.stop()
+    if "core.minio_uploader" in sys.modules:
+        # Only stop an uploader that exists: creating one would connect to MinIO
+        from core.minio_uploader import peek_minio_uploader
+        uploader = peek_minio_uploader()
+        if uploader is not None:
+            uploader.stop_sweeper()
+    if "core.epub_processor" in sys.modules:
+        from core.epub_processor import epub_processor
+        epub_processor.shutdown()
+    if "core.pdf_processor" in sys.modules:
+        from core.pdf_processor import pdf_processor
+        pdf_processor.shutdown()
+    if "core.volume_generator" in sys.modules:
+        from core.volume_generator import volume_generator
+        volume_generator.shutdown()
+
+    # Write out queued log records
+    await logger.complete()
+
 
 @app.get("/")
 async def root():
@@ -92,8 +183,12 @@ async def root():
 
 
 if __name__ == "__main__":
+    import multiprocessing
     import uvicorn
 
+    # Required for worker processes (EPUB parsing) in the packaged executable
+    multiprocessing.freeze_support()
+
     logger.info(f"Starting server on {settings.host}:{settings.port}")
 
     uvicorn.run(
@@ -1,21 +1,19 @@
 """Conversion API Routes"""
+import itertools
 from pathlib import Path
 from typing import Literal
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Request, Response, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
 from config import settings
-from schemas.convert import ConvertRequest, ConvertResponse
-from core.audio_processor import audio_processor
-from core.epub_processor import epub_processor
-from core.document_generator import document_generator
+from schemas.convert import BundleRequest, ConvertRequest, ConvertResponse
 
 router = APIRouter(prefix="/api/convert", tags=["Convert"])
 
 
-def detect_file_type(file_path: Path) -> Literal["audio", "video", "epub", "unknown"]:
+def detect_file_type(file_path: Path) -> Literal["audio", "video", "epub", "text", "pdf", "unknown"]:
     """Detect file type by extension"""
     suffix = file_path.suffix.lower()
 
@@ -25,19 +23,47 @@ def detect_file_type(file_path: Path) -> Literal["audio", "video", "epub", "unkn
         return "video"
     elif suffix in settings.supported_ebook_formats:
         return "epub"
+    elif suffix in settings.supported_text_formats:
+        return "text"
+    elif suffix in settings.supported_pdf_formats:
+        return "pdf"
     else:
         return "unknown"
 
 
 @router.post("/file", response_model=ConvertResponse)
-async def convert_file(request: ConvertRequest):
+def convert_file(request: ConvertRequest):
     """
-    Convert file to DOCX or Markdown
+    Convert file to DOCX, Markdown, text, HTML or ODT
+
+    Runs in the server's thread pool (conversion is blocking work), counted
+    as an active job for the readiness check. Every log line of the job
+    carries its job_id.
+    """
+    from utils.health import track_job
+    import uuid
+
+    # 任务标识，写入日志和扣费记录
+    job_id = uuid.uuid4().hex[:12]
+
+    with track_job(), logger.contextualize(job_id=job_id):
+        return _convert_file(request, job_id)
+
+
+def _convert_file(request: ConvertRequest, job_id: str):
+    """
+    Convert file to DOCX, Markdown, text, HTML or ODT
 
     Supports:
-    - Audio files → Text → DOCX/MD
-    - Video files → Audio → Text → DOCX/MD
-    - EPUB files → Text → DOCX/MD
+    - Audio files → Text → DOCX/MD/TXT/HTML/ODT
+    - Video files → Audio → Text → DOCX/MD/TXT/HTML/ODT
+    - EPUB files → Text → DOCX/MD/TXT/HTML/ODT
+    - TXT/Markdown files → DOCX/MD/TXT/HTML/ODT
+    - PDF files (text layer) → DOCX/MD/TXT/HTML/ODT
+    - Audio/video uploaded straight to MinIO (object_name) → Text → DOCX/MD/TXT/HTML/ODT
+
+    Several output formats can be requested at once: the file is extracted
+    (or transcribed and billed) once and all formats are generated from it.
     """
     from utils.quota_manager import quota_manager
     from utils.license import check_activation
@@ -60,62 +86,149 @@ async def convert_file(request: ConvertRequest):
                 detail=quota_check['message']
             )
 
-        file_path = Path(request.file_path)
+        output_formats = request.output_formats
+        if request.object_name:
+            # Uploaded straight to MinIO: transcribed from the bucket, never downloaded
+            from routes.upload import check_object_name
 
-        # Check file exists
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+            check_object_name(request.object_name)
+            file_path = Path(request.object_name)
+            if detect_file_type(file_path) not in ("audio", "video"):
+                raise HTTPException(status_code=400, detail="Only audio and video can be converted from MinIO")
+        else:
+            file_path = Path(request.file_path)
+
+            # Check file exists
+            if not file_path.exists():
+                raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+        if request.template_path and not Path(request.template_path).is_file():
+            raise HTTPException(status_code=404, detail=f"Template not found: {request.template_path}")
 
         # Detect file type
         file_type = detect_file_type(file_path)
         logger.info(f"Processing file: {file_path.name} (type: {file_type})")
 
         # Extract text based on file type
+        # text_content is either the whole text or an iterator of chunks (EPUB chapters, text file chunks, PDF pages)
         text_content = None
+        content_preview = None
+        image_reader = None
 
         if file_type == "audio" or file_type == "video":
             # Audio/Video → Text (需要计费)
+            from core.audio_processor import get_audio_processor
+
+            audio_processor = get_audio_processor()
             audio_duration_seconds = 0  # 音频文件的实际时长
 
-            if file_type == "audio":
-                logger.debug("Processing audio file...")
-                result = audio_processor.transcribe_audio(file_path)
-                if result:
-                    text_content, audio_duration_seconds = result
-                else:
-                    text_content = None
-            else:
-                logger.debug("Extracting audio from video...")
-                audio_file = audio_processor.extract_audio_from_video(file_path)
-                if audio_file:
-                    logger.debug("Transcribing extracted audio...")
-                    result = audio_processor.transcribe_audio(audio_file)
+            object_url = None
+            if request.object_name:
+                from core.minio_uploader import get_minio_uploader
+
+                uploader = get_minio_uploader()
+                if uploader.get_object_size(request.object_name) is None:
+                    raise HTTPException(status_code=404, detail=f"Object not found: {request.object_name}")
+                object_url = uploader.get_object_url(request.object_name)
+
+            # 按探测到的时长预占额度，避免并发任务都通过检查后把余额扣成负数
+            estimated_duration = audio_processor.get_audio_duration(object_url or file_path) or 0
+            reserved_duration = estimated_duration
+            if not estimated_duration:
+                # Reserving nothing would let parallel jobs overdraw: assume a long file
+                reserved_duration = settings.quota_unknown_duration
+                logger.warning(f"Media duration not available, reserving quota for {reserved_duration / 60:.0f} minutes")
+            reservation = quota_manager.reserve_quota(reserved_duration, job_id=job_id)
+            if not reservation["success"]:
+                raise HTTPException(status_code=403, detail=reservation["message"])
+            reservation_id = reservation["reservation_id"]
+
+            try:
+                if request.object_name:
+                    logger.debug("Transcribing uploaded object...")
+                    result = audio_processor.transcribe_object(request.object_name, estimated_duration or None)
+                    if result:
+                        text_content, audio_duration_seconds = result
+                    else:
+                        text_content = None
+                elif file_type == "audio":
+                    logger.debug("Processing audio file...")
+                    result = audio_processor.transcribe_audio(file_path)
                     if result:
                         text_content, audio_duration_seconds = result
                     else:
                         text_content = None
                 else:
-                    raise HTTPException(status_code=500, detail="Failed to extract audio from video")
+                    logger.debug("Extracting audio from video...")
+                    audio_file = audio_processor.extract_audio_from_video(file_path)
+                    if audio_file:
+                        logger.debug("Transcribing extracted audio...")
+                        result = audio_processor.transcribe_audio(audio_file)
+                        if result:
+                            text_content, audio_duration_seconds = result
+                        else:
+                            text_content = None
+                    else:
+                        raise HTTPException(status_code=500, detail="Failed to extract audio from video")
 
-            # 只有转换成功才扣除额度
-            if not text_content:
-                raise HTTPException(status_code=500, detail="Failed to transcribe audio")
+                # 只有转换成功才扣除额度
+                if not text_content:
+                    raise HTTPException(status_code=500, detail="Failed to transcribe audio")
+            except BaseException:
+                # 转换失败，释放预占的额度
+                quota_manager.release_reservation(reservation_id)
+                raise
 
             # 使用音频文件的实际时长来扣减额度（而不是处理耗时）
             if audio_duration_seconds > 0:
                 logger.info(f"Audio duration for billing: {audio_duration_seconds / 60:.2f} minutes ({audio_duration_seconds / 3600:.2f} hours)")
-                quota_result = quota_manager.consume_quota(audio_duration_seconds)
+                quota_result = quota_manager.commit_reservation(reservation_id, audio_duration_seconds, job_id=job_id)
                 if not quota_result["success"]:
                     logger.warning(f"Failed to consume quota: {quota_result['message']}")
+                    quota_manager.release_reservation(reservation_id)
                 else:
                     logger.info(f"Quota consumed: {quota_result.get('consumed', 0):.4f} yuan, Remaining: {quota_result['remaining_quota']:.4f} yuan")
             else:
                 logger.warning("Audio duration not available, skipping quota consumption")
+                quota_manager.release_reservation(reservation_id)
 
         elif file_type == "epub":
             # EPUB → Text (不计费)
+            from core.epub_processor import epub_processor
+
             logger.debug("Extracting text from EPUB...")
-            text_content = epub_processor.extract_text(file_path)
+            # Stream chapters in reading order into the generator
+            chapters = epub_processor.iter_chapters(file_path)
+            first_chapter = next(chapters, None)
+            if first_chapter:
+                content_preview = first_chapter.to_text()[:200]
+                text_content = itertools.chain([first_chapter], chapters)
+                if settings.epub_images and "docx" in output_formats:
+                    image_reader = epub_processor.open_images(file_path)
+
+        elif file_type == "text":
+            # TXT/Markdown → Text (不计费)
+            from core.text_processor import text_processor
+
+            # Stream the file in bounded chunks into the generator
+            documents = text_processor.iter_documents(file_path)
+            first_document = next(documents, None)
+            if first_document:
+                content_preview = first_document.to_text()[:200]
+                text_content = itertools.chain([first_document], documents)
+
+        elif file_type == "pdf":
+            # PDF → Text (不计费)
+            from core.pdf_processor import InvalidPDFError, pdf_processor
+
+            # Stream pages in order into the generator
+            pages = pdf_processor.iter_pages(file_path)
+            try:
+                first_page = next(pages, None)
+            except InvalidPDFError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if first_page:
+                content_preview = first_page.to_text()[:200]
+                text_content = itertools.chain([first_page], pages)
 
         else:
             raise HTTPException(
@@ -128,23 +241,46 @@ async def convert_file(request: ConvertRequest):
             raise HTTPException(status_code=500, detail="Failed to extract text from file")
 
         # Generate document
-        output_file = None
-        if request.output_format == "docx":
-            output_file = document_generator.generate_docx(
-                content=text_content,
-                title=request.title or file_path.stem,
-                output_filename=request.output_filename,
-                output_dir=request.output_dir
-            )
-        else:  # markdown
-            output_file = document_generator.generate_markdown(
-                content=text_content,
-                title=request.title or file_path.stem,
-                output_filename=request.output_filename,
-                output_dir=request.output_dir
-            )
-
-        if not output_file:
+        from core.document_generator import document_generator
+
+        volume_files = []
+        try:
+            if request.volume_mode != "none":
+                # Volumes generated in parallel, output_files are their index documents
+                from core.volume_generator import volume_generator
+
+                output_files, volumes = volume_generator.generate(
+                    content=document_generator.iter_documents(text_content),
+                    output_formats=output_formats,
+                    mode=request.volume_mode,
+                    max_chars=request.volume_max_chars,
+                    title=request.title or file_path.stem,
+                    output_filename=request.output_filename,
+                    output_dir=request.output_dir,
+                    images=image_reader,
+                    template_path=request.template_path
+                )
+                volume_files = [
+                    str(Path(volume[output_format]).resolve())
+                    for volume in volumes for output_format in output_formats if volume.get(output_format)
+                ]
+            else:
+                # All formats are generated from one pass over the extracted content
+                output_files = document_generator.generate(
+                    content=text_content,
+                    output_formats=output_formats,
+                    title=request.title or file_path.stem,
+                    output_filename=request.output_filename,
+                    output_dir=request.output_dir,
+                    images=image_reader,
+                    template_path=request.template_path
+                )
+        finally:
+            if image_reader is not None:
+                image_reader.close()
+
+        failed_formats = [output_format for output_format, output_file in output_files.items() if not output_file]
+        if len(failed_formats) == len(output_files):
             raise HTTPException(status_code=500, detail="Failed to generate document")
 
         # 获取最新的额度信息
@@ -152,15 +288,26 @@ async def convert_file(request: ConvertRequest):
         remaining_quota = quota_info.get("remaining_quota", 0) if quota_info else 0
 
         # 确保返回绝对路径
-        output_file_abs = str(output_file.resolve() if hasattr(output_file, 'resolve') else output_file)
-        logger.info(f"Output file path: {output_file_abs}")
+        output_files_abs = [
+            str(output_file.resolve() if hasattr(output_file, 'resolve') else output_file)
+            for output_file in output_files.values() if output_file
+        ]
+        for output_file_abs in output_files_abs:
+            logger.info(f"Output file path: {output_file_abs}")
+
+        generated_formats = "/".join(output_format.upper() for output_format, output_file in output_files.items() if output_file)
+        message = f"File converted successfully to {generated_formats}."
+        if failed_formats:
+            message += f" Failed to generate {'/'.join(output_format.upper() for output_format in failed_formats)}."
 
         # Return response
         return ConvertResponse(
             success=True,
-            message=f"File converted successfully to {request.output_format.upper()}. Remaining quota: {remaining_quota:.4f} yuan",
-            output_file=output_file_abs,
-            content_preview=text_content[:200] if text_content else None
+            message=f"{message} Remaining quota: {remaining_quota:.4f} yuan",
+            output_file=output_files_abs[0],
+            output_files=output_files_abs,
+            volume_files=volume_files,
+            content_preview=content_preview if content_preview is not None else text_content[:200]
         )
 
     except HTTPException:
@@ -170,19 +317,66 @@ async def convert_file(request: ConvertRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _get_output_path(filename: str) -> Path:
+    """
+    Resolve a file in the output directory
+
+    Args:
+        filename: File name, relative to the output directory
+
+    Returns:
+        Absolute file path
+
+    Raises:
+        HTTPException: 404 if it isn't a file inside the output directory
+    """
+    output_dir = settings.output_dir.resolve()
+    file_path = (output_dir / filename).resolve()
+    if not file_path.is_relative_to(output_dir) or not file_path.is_file():
+        raise HTTPException(status_code=404, detail=f"File not found: {filename}")
+    return file_path
+
+
 @router.get("/download/{filename}")
-async def download_file(filename: str):
-    """Download generated file"""
-    try:
-        file_path = settings.output_dir / filename
+async def download_file(filename: str, request: Request):
+    """
+    Download generated file
 
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="File not found")
+    Supports resuming (Range / If-Range, single ranges) and conditional GET
+    (ETag / Last-Modified, answered with 304). The file is streamed in
+    chunks, never loaded into memory.
+    """
+    from utils.downloads import content_disposition, get_etag, get_last_modified, is_not_modified, iter_file, parse_range
 
-        return FileResponse(
-            path=str(file_path),
-            filename=filename,
-            media_type='application/octet-stream'
+    try:
+        file_path = _get_output_path(filename)
+        stat = file_path.stat()
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": get_etag(stat),
+            "Last-Modified": get_last_modified(stat),
+        }
+        if is_not_modified(request.headers, stat):
+            return Response(status_code=304, headers=headers)
+
+        try:
+            byte_range = parse_range(request.headers, stat)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+
+        headers["Content-Disposition"] = content_disposition(file_path.name)
+        if byte_range is None:
+            headers["Content-Length"] = str(stat.st_size)
+            return StreamingResponse(iter_file(file_path), media_type="application/octet-stream", headers=headers)
+
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            iter_file(file_path, start, end),
+            status_code=206,
+            media_type="application/octet-stream",
+            headers=headers
         )
 
     except HTTPException:
@@ -190,3 +384,46 @@ async def download_file(filename: str):
     except Exception as e:
         logger.exception(f"Error downloading file: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/download/bundle")
+async def download_bundle(request: BundleRequest):
+    """
+    Download several generated files as one ZIP archive
+
+    The archive is built while it is sent (no Content-Length, no staging
+    file), with constant memory whatever the number and size of files.
+    """
+    from utils.downloads import content_disposition, iter_zip
+
+    try:
+        filenames = list(dict.fromkeys(request.filenames))
+        if len(filenames) > settings.download_bundle_max_files:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many files: {len(filenames)} (max {settings.download_bundle_max_files})"
+            )
+
+        # Check every file before starting the response
+        output_dir = settings.output_dir.resolve()
+        files = []
+        for filename in filenames:
+            file_path = _get_output_path(filename)
+            files.append((file_path.relative_to(output_dir).as_posix(), file_path))
+
+        bundle_name = Path(request.bundle_name).name or "outputs.zip"
+        if not bundle_name.lower().endswith(".zip"):
+            bundle_name += ".zip"
+
+        logger.info(f"Streaming bundle {bundle_name}: {len(files)} files, {sum(path.stat().st_size for _, path in files) / 1024 / 1024:.2f}MB")
+        return StreamingResponse(
+            iter_zip(files),
+            media_type="application/zip",
+            headers={"Content-Disposition": content_disposition(bundle_name)}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error creating bundle: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -9,7 +9,8 @@ from loguru import logger
 from utils.license import (
     get_machine_code,
     check_activation,
-    activate_software
+    activate_software,
+    invalidate_activation_cache
 )
 
 router = APIRouter(prefix="/api/license", tags=["license"])
@@ -92,20 +93,19 @@ async def deactivate():
     删除激活码（用于测试或重新激活）
     """
     try:
-        from pathlib import Path
+        from utils.license import LICENSE_FILE
         from utils.quota_manager import quota_manager
 
-        license_file = Path(__file__).parent.parent / "config" / "license.dat"
-        quota_file = Path(__file__).parent.parent / "config" / "quota.dat"
+        license_file = LICENSE_FILE
 
         success = False
         if license_file.exists():
             license_file.unlink()
             success = True
             logger.info("License deactivated")
+        invalidate_activation_cache()
 
-        if quota_file.exists():
-            quota_file.unlink()
+        if quota_manager.clear():
             logger.info("Quota data cleared")
 
         if success:
@@ -143,3 +143,22 @@ async def get_quota_info():
     except Exception as e:
         logger.error(f"Failed to get quota info: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/quota/events")
+async def get_quota_events(limit: int = 50):
+    """
+    获取扣费记录
+    返回最近的扣费事件（任务、时长、费用、时间），最新的在前
+    """
+    try:
+        from utils.quota_manager import quota_manager
+
+        return {
+            "success": True,
+            "message": "Quota events retrieved successfully",
+            "data": quota_manager.get_consumption_events(max(1, min(limit, 1000)))
+        }
+    except Exception as e:
+        logger.error(f"Failed to get quota events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,10 +1,14 @@
 """Settings and System API Routes"""
+import os
+import sys
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from loguru import logger
 
 from config import settings
-from schemas.convert import SettingsRequest, SettingsResponse, HealthResponse
-from core.minio_uploader import minio_uploader
+from schemas.convert import SettingsRequest, SettingsResponse, HealthResponse, ReadinessResponse
+from utils.health import health_prober
 
 router = APIRouter(prefix="/api/system", tags=["System"])
 
@@ -13,10 +17,20 @@ router = APIRouter(prefix="/api/system", tags=["System"])
 async def health_check():
     """Health check endpoint"""
     try:
-        # Check MinIO connection
-        minio_connected = minio_uploader.client is not None
-        dashscope_configured = bool(settings.dashscope_api_key)
-        
+        # Polled by Electron during startup: only read the background prober's cached results
+        report = health_prober.get_report()
+        if report is not None:
+            minio_connected = report["checks"]["minio"]["status"] == "ok"
+        else:
+            minio_connected = False
+            # Never create the uploader here: that connects to MinIO on the event loop
+            if "core.minio_uploader" in sys.modules:
+                from core.minio_uploader import peek_minio_uploader
+                uploader = peek_minio_uploader()
+                minio_connected = uploader is not None and uploader.client is not None
+        # 优先使用激活码设置的环境变量
+        dashscope_configured = bool(os.environ.get("DASHSCOPE_API_KEY") or settings.dashscope_api_key)
+
         return HealthResponse(
             status="healthy",
             app_name=settings.app_name,
@@ -29,6 +43,47 @@ async def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/live")
+async def liveness_check():
+    """Liveness: the server process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness_check():
+    """
+    Readiness: dependencies and capacity, from the background prober
+
+    Returns 503 while warming up (no probe yet) or when a check fails
+    (disk space). Missing optional dependencies (MinIO, DashScope, ffmpeg)
+    and all workers busy are reported as degraded but don't fail readiness.
+    """
+    report = health_prober.get_report()
+    if report is None:
+        return JSONResponse(status_code=503, content=ReadinessResponse(ready=False).model_dump())
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=ReadinessResponse(**report).model_dump())
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Runtime metrics of backend services"""
+    try:
+        from utils.startup_report import get_startup_report
+
+        metrics = {"startup": get_startup_report(), "minio": None}
+
+        # Never create the uploader here: that connects to MinIO on the event loop
+        if "core.minio_uploader" in sys.modules:
+            from core.minio_uploader import peek_minio_uploader
+            uploader = peek_minio_uploader()
+            if uploader is not None:
+                metrics["minio"] = uploader.get_metrics()
+        return metrics
+    except Exception as e:
+        logger.exception(f"Error getting metrics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/settings", response_model=SettingsResponse)
 async def get_settings():
     """Get current settings"""
@@ -37,11 +92,13 @@ async def get_settings():
             minio_endpoint=settings.minio_endpoint,
             minio_bucket=settings.minio_bucket,
             minio_secure=settings.minio_secure,
-            dashscope_configured=bool(settings.dashscope_api_key),
+            dashscope_configured=bool(os.environ.get("DASHSCOPE_API_KEY") or settings.dashscope_api_key),
             output_dir=str(settings.output_dir),
             supported_audio_formats=settings.supported_audio_formats,
             supported_video_formats=settings.supported_video_formats,
-            supported_ebook_formats=settings.supported_ebook_formats
+            supported_ebook_formats=settings.supported_ebook_formats,
+            supported_text_formats=settings.supported_text_formats,
+            supported_pdf_formats=settings.supported_pdf_formats
         )
     except Exception as e:
         logger.exception(f"Error getting settings: {e}")
@@ -0,0 +1,199 @@
+"""
+Resumable Upload API Routes
+
+For clients on other machines: upload a file, then convert the returned
+file_path with /api/convert/file.
+
+1. POST /api/upload {filename, size, sha256?} -> upload_id
+2. PATCH /api/upload/{upload_id} with Upload-Offset: <offset> and the
+   bytes from that offset as the raw request body (any number of requests)
+3. If a request is interrupted: GET /api/upload/{upload_id} -> offset,
+   continue with step 2 from there
+4. Once all bytes are in, the response has complete=true, the sha256 and
+   the file_path
+
+Audio/video for remote deployments can skip the backend altogether:
+POST /api/upload/direct returns presigned MinIO URLs, the client PUTs the
+bytes to them, calls /api/upload/direct/complete with the size and
+part_size and converts with object_name instead of file_path.
+"""
+from pathlib import Path
+
+import anyio
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from minio.error import S3Error
+from starlette.requests import ClientDisconnect
+
+from config import settings
+from schemas.convert import (
+    DirectUploadAbortRequest,
+    DirectUploadCompleteRequest,
+    DirectUploadRequest,
+    DirectUploadResponse,
+    UploadCreateRequest,
+    UploadStatusResponse
+)
+from utils.upload_manager import UploadError, upload_manager
+
+router = APIRouter(prefix="/api/upload", tags=["Upload"])
+
+# S3 error codes of a presigned upload that doesn't exist (unknown, expired, completed or aborted)
+UPLOAD_NOT_FOUND_CODES = {"NoSuchUpload", "NoSuchKey", "NoSuchObject"}
+# S3 error codes of a multipart upload whose parts don't match what was listed
+UPLOAD_INCOMPLETE_CODES = {"InvalidPart", "InvalidPartOrder", "EntityTooSmall"}
+
+
+@router.post("", response_model=UploadStatusResponse)
+async def create_upload(request: UploadCreateRequest):
+    """Start a resumable upload (rejected with 413 above max_upload_size)"""
+    try:
+        return await run_in_threadpool(upload_manager.create, request.filename, request.size, request.sha256)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+def _get_minio_uploader():
+    """Get the MinIO uploader, 503 if MinIO isn't usable"""
+    from core.minio_uploader import get_minio_uploader
+
+    uploader = get_minio_uploader()
+    if uploader.client is None:
+        raise HTTPException(status_code=503, detail="MinIO not configured")
+    return uploader
+
+
+def check_object_name(object_name: str):
+    """Only objects of presigned uploads may be used (400 otherwise)"""
+    from core.minio_uploader import AUDIO_FOLDER
+
+    if not object_name.startswith(f"{AUDIO_FOLDER}/") or ".." in object_name.split("/"):
+        raise HTTPException(status_code=400, detail=f"Invalid object name: {object_name}")
+
+
+def _s3_error_response(e: S3Error) -> HTTPException:
+    """Map a MinIO error of a presigned upload to 404, 409 or 502"""
+    if e.code in UPLOAD_NOT_FOUND_CODES:
+        return HTTPException(status_code=404, detail="Upload not found or expired")
+    if e.code in UPLOAD_INCOMPLETE_CODES:
+        return HTTPException(status_code=409, detail=f"Upload incomplete: {e.message}")
+    return HTTPException(status_code=502, detail=f"MinIO error: {e.code}")
+
+
+@router.post("/direct", response_model=DirectUploadResponse)
+def create_direct_upload(request: DirectUploadRequest):
+    """
+    Get presigned URLs to upload audio/video straight to MinIO
+
+    One PUT URL up to minio_multipart_threshold, otherwise one URL per
+    part; each part's bytes (offset, size) are PUT to its URL, in any order
+    and in parallel. The backend never sees the bytes.
+    """
+    suffix = Path(request.filename).suffix.lower()
+    if suffix not in settings.supported_audio_formats + settings.supported_video_formats:
+        raise HTTPException(status_code=400, detail=f"Only audio and video can be uploaded directly: {suffix}")
+
+    upload = _get_minio_uploader().create_presigned_upload(request.filename, request.size, request.content_type)
+    if upload is None:
+        raise HTTPException(status_code=502, detail="Failed to create presigned upload")
+    return {**upload, "expires_in": settings.minio_presigned_upload_expiry}
+
+
+@router.post("/direct/complete")
+def complete_direct_upload(request: DirectUploadCompleteRequest):
+    """
+    Finish a presigned upload; the object_name can then be converted
+
+    Answers 409 unless every part (or the single PUT) has arrived with the
+    declared size, so a partial upload is never converted.
+    """
+    from core.minio_uploader import IncompleteUploadError
+
+    check_object_name(request.object_name)
+    try:
+        size = _get_minio_uploader().complete_presigned_upload(
+            request.object_name, request.size, request.upload_id, request.part_size
+        )
+    except IncompleteUploadError as e:
+        raise HTTPException(status_code=409, detail=f"Upload incomplete: {e}")
+    except S3Error as e:
+        raise _s3_error_response(e)
+    if size is None:
+        raise HTTPException(status_code=503, detail="MinIO not configured")
+    return {"success": True, "object_name": request.object_name, "size": size}
+
+
+@router.post("/direct/abort")
+def abort_direct_upload(request: DirectUploadAbortRequest):
+    """Cancel a presigned upload and delete what was received"""
+    check_object_name(request.object_name)
+    try:
+        _get_minio_uploader().abort_presigned_upload(request.object_name, request.upload_id)
+    except S3Error as e:
+        raise _s3_error_response(e)
+    return {"success": True, "message": "Upload aborted"}
+
+
+@router.get("/{upload_id}", response_model=UploadStatusResponse)
+async def get_upload(upload_id: str):
+    """Get the acknowledged offset of an upload, to resume it"""
+    try:
+        return await run_in_threadpool(upload_manager.get_status, upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@router.patch("/{upload_id}", response_model=UploadStatusResponse)
+async def append_upload(upload_id: str, request: Request, upload_offset: int = Header(..., ge=0)):
+    """
+    Append the request body to an upload
+
+    The body is streamed to disk in upload_buffer_size pieces and hashed on
+    the way, never held in memory whole. Bytes received before a dropped
+    connection are kept. Answers 409 with the current offset in the detail
+    if Upload-Offset doesn't match, and 413 as soon as the upload goes past
+    its declared size.
+    """
+    try:
+        status = await run_in_threadpool(upload_manager.get_status, upload_id)
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and upload_offset + int(content_length) > status["size"]:
+            # Refuse before reading anything
+            raise UploadError(f"Upload exceeds its declared size of {status['size']} bytes", status_code=413)
+
+        writer = (await run_in_threadpool(upload_manager.open, upload_id, upload_offset)).writer
+        try:
+            buffer = bytearray()
+            try:
+                async for chunk in request.stream():
+                    buffer += chunk
+                    if len(buffer) >= settings.upload_buffer_size:
+                        await run_in_threadpool(writer.write, bytes(buffer))
+                        buffer.clear()
+            except ClientDisconnect:
+                logger.info(f"Upload {upload_id} interrupted at {writer.offset + len(buffer)} bytes, can be resumed")
+            if buffer:
+                await run_in_threadpool(writer.write, bytes(buffer))
+        finally:
+            # Completing hashes and moves the file: off the event loop, and
+            # always run (it releases the upload) even if the request is cancelled
+            with anyio.CancelScope(shield=True):
+                status = await run_in_threadpool(writer.close)
+        return status
+
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        logger.exception(f"Error receiving upload {upload_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.delete("/{upload_id}")
+async def delete_upload(upload_id: str):
+    """Cancel an upload, or delete an uploaded file after conversion"""
+    try:
+        await run_in_threadpool(upload_manager.delete, upload_id)
+        return {"success": True, "message": "Upload deleted"}
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
@@ -1,25 +1,112 @@
 """Pydantic Schemas for API"""
 from typing import Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+OutputFormat = Literal["docx", "md", "txt", "html", "odt"]
 
 
 class ConvertRequest(BaseModel):
     """File conversion request"""
-    file_path: str = Field(..., description="Local file path to convert")
-    output_format: Literal["docx", "md"] = Field(default="docx", description="Output format")
+    file_path: Optional[str] = Field(None, description="Local file path to convert")
+    object_name: Optional[str] = Field(None, description="Audio/video uploaded straight to MinIO (presigned upload), instead of file_path")
+    output_format: OutputFormat | list[OutputFormat] = Field(default="docx", description="Output format, or several formats generated from one extraction")
     title: Optional[str] = Field(None, description="Document title")
     output_filename: Optional[str] = Field(None, description="Custom output filename")
     output_dir: Optional[str] = Field(None, description="Custom output directory")
+    template_path: Optional[str] = Field(None, description="Custom .docx/.dotx template for DOCX output")
+    volume_mode: Literal["none", "chapter", "size"] = Field(default="none", description="Split output into volumes at chapters or by size, with an index document")
+    volume_max_chars: Optional[int] = Field(None, gt=0, description="Max characters per volume in size mode (use configured value if None)")
+
+    @field_validator("output_format")
+    @classmethod
+    def check_output_format(cls, value):
+        if isinstance(value, list) and not value:
+            raise ValueError("At least one output format is required")
+        return value
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if bool(self.file_path) == bool(self.object_name):
+            raise ValueError("Exactly one of file_path and object_name is required")
+        return self
+
+    @property
+    def output_formats(self) -> list[str]:
+        """Requested formats, without duplicates"""
+        formats = self.output_format if isinstance(self.output_format, list) else [self.output_format]
+        return list(dict.fromkeys(formats))
 
 
 class ConvertResponse(BaseModel):
     """File conversion response"""
     success: bool
     message: str
-    output_file: Optional[str] = None
+    output_file: Optional[str] = None  # First output file
+    output_files: list[str] = Field(default_factory=list)  # All output files, in requested format order (volume indexes in volume mode)
+    volume_files: list[str] = Field(default_factory=list)  # Volume files in volume mode, in order
     content_preview: Optional[str] = None  # First 200 characters
 
 
+class BundleRequest(BaseModel):
+    """ZIP bundle download request"""
+    filenames: list[str] = Field(..., min_length=1, description="Output files to bundle (names in the output directory)")
+    bundle_name: str = Field(default="outputs.zip", description="Filename of the downloaded archive")
+
+
+class UploadCreateRequest(BaseModel):
+    """Start a resumable upload"""
+    filename: str = Field(..., description="Original filename, its extension selects the converter")
+    size: int = Field(..., ge=0, description="Total size in bytes")
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$", description="Expected SHA-256, checked on completion")
+
+
+class UploadStatusResponse(BaseModel):
+    """Resumable upload progress"""
+    upload_id: str
+    filename: str
+    size: int
+    offset: int  # Bytes received, the next request starts here
+    complete: bool
+    sha256: Optional[str] = None  # Content hash, once complete
+    file_path: Optional[str] = None  # Local path to convert, once complete
+
+
+class DirectUploadRequest(BaseModel):
+    """Start a presigned upload straight to MinIO"""
+    filename: str = Field(..., description="Original filename (audio or video)")
+    size: int = Field(..., gt=0, description="Total size in bytes")
+    content_type: str = Field(default="application/octet-stream", description="MIME type of the file")
+
+
+class DirectUploadPart(BaseModel):
+    """Byte range to PUT to a presigned URL"""
+    part_number: int
+    offset: int
+    size: int
+    url: str
+
+
+class DirectUploadResponse(BaseModel):
+    """Presigned upload: PUT each part's bytes to its URL, then complete"""
+    object_name: str  # Pass to /api/convert/file once complete
+    upload_id: Optional[str] = None  # Multipart upload ID, None for a single PUT
+    part_size: int
+    parts: list[DirectUploadPart]
+    expires_in: int  # Seconds the URLs stay valid
+
+
+class DirectUploadAbortRequest(BaseModel):
+    """Cancel a presigned upload"""
+    object_name: str
+    upload_id: Optional[str] = None
+
+
+class DirectUploadCompleteRequest(DirectUploadAbortRequest):
+    """Finish a presigned upload: all parts of the declared size must be there"""
+    size: int = Field(..., gt=0, description="Total size in bytes, as declared when the upload was created")
+    part_size: Optional[int] = Field(None, gt=0, description="part_size returned when the upload was created")
+
+
 class SettingsRequest(BaseModel):
     """Update settings request"""
     minio_endpoint: Optional[str] = None
@@ -41,6 +128,8 @@ class SettingsResponse(BaseModel):
     supported_audio_formats: list[str]
     supported_video_formats: list[str]
     supported_ebook_formats: list[str]
+    supported_text_formats: list[str]
+    supported_pdf_formats: list[str]
 
 
 class HealthResponse(BaseModel):
@@ -50,3 +139,11 @@ class HealthResponse(BaseModel):
     version: str
     minio_connected: bool
     dashscope_configured: bool
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness check response, from the latest background probe"""
+    ready: bool
+    checked_at: Optional[float] = None  # Unix time of the probe, None while warming up
+    duration_ms: Optional[float] = None
+    checks: dict[str, dict] = Field(default_factory=dict)  # name -> {"status": ok/degraded/fail, "message", "latency_ms", ...}
@@ -0,0 +1,11 @@
+"""
+Shared test setup
+
+Run from the backend directory: python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+# Modules import each other from the backend directory (config, core, utils)
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,30 @@
+"""Tests for the streaming DOCX writer"""
+import io
+import zipfile
+
+import docx
+from PIL import Image
+
+from core.docx_writer import StreamingDocxWriter
+
+
+def test_images_are_written_once_and_package_opens():
+    image = io.BytesIO()
+    Image.new("RGB", (40, 20), "red").save(image, "PNG")
+
+    output = io.BytesIO()
+    writer = StreamingDocxWriter(output)
+    writer.add_heading("Chapter", 1)
+    writer.add_image(image.getvalue(), "PNG", 2, 1)
+    writer.add_paragraph("text")
+    writer.add_image(image.getvalue(), "PNG", 2, 1)
+    writer.close()
+
+    with zipfile.ZipFile(output) as package:
+        names = package.namelist()
+    assert names[0] == "[Content_Types].xml"
+    assert [name for name in names if name.startswith("word/media/")] == ["word/media/todocx_image1.png"]
+
+    document = docx.Document(output)
+    assert len(document.inline_shapes) == 2
+    assert [paragraph.text for paragraph in document.paragraphs if paragraph.text] == ["Chapter", "text"]
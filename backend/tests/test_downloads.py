@@ -0,0 +1,74 @@
+"""Tests for download helpers"""
+import io
+import os
+import zipfile
+
+import pytest
+
+from utils.downloads import content_disposition, get_etag, is_not_modified, iter_file, iter_zip, parse_range
+
+
+@pytest.fixture
+def stat(tmp_path) -> os.stat_result:
+    path = tmp_path / "out.txt"
+    path.write_bytes(b"0123456789")
+    return path.stat()
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-4", (0, 4)),
+    ("bytes=5-", (5, 9)),
+    ("bytes=-3", (7, 9)),
+    ("bytes=-30", (0, 9)),
+    ("bytes=8-100", (8, 9)),
+    ("bytes=0-1,4-5", None),
+    ("items=0-4", None),
+    ("bytes=5-2", None),
+    ("bytes=a-b", None),
+    ("bytes=-", None),
+])
+def test_parse_range(stat, header, expected):
+    assert parse_range({"range": header}, stat) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=10-", "bytes=-0"])
+def test_unsatisfiable_range(stat, header):
+    with pytest.raises(ValueError):
+        parse_range({"range": header}, stat)
+
+
+def test_if_range(stat):
+    etag = get_etag(stat)
+    assert parse_range({"range": "bytes=0-4", "if-range": etag}, stat) == (0, 4)
+    assert parse_range({"range": "bytes=0-4", "if-range": '"stale"'}, stat) is None
+    # Weak ETags never validate a range
+    assert parse_range({"range": "bytes=0-4", "if-range": f"W/{etag}"}, stat) is None
+
+
+def test_conditional_get(stat):
+    etag = get_etag(stat)
+    assert is_not_modified({"if-none-match": f'"other", {etag}'}, stat)
+    assert not is_not_modified({"if-none-match": '"other"'}, stat)
+    assert not is_not_modified({}, stat)
+
+
+def test_iter_file_range(tmp_path):
+    path = tmp_path / "out.txt"
+    path.write_bytes(b"0123456789")
+    assert b"".join(iter_file(path, 2, 5)) == b"2345"
+    assert b"".join(iter_file(path)) == b"0123456789"
+
+
+def test_iter_zip(tmp_path):
+    (tmp_path / "a.txt").write_text("alpha" * 1000)
+    (tmp_path / "b.docx").write_bytes(b"PK fake docx")
+    archive = b"".join(iter_zip([("a.txt", tmp_path / "a.txt"), ("b.docx", tmp_path / "b.docx")]))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as bundle:
+        assert bundle.read("a.txt") == b"alpha" * 1000
+        assert bundle.getinfo("b.docx").compress_type == zipfile.ZIP_STORED
+
+
+def test_content_disposition():
+    assert content_disposition("out.docx") == 'attachment; filename="out.docx"'
+    assert content_disposition("报告.docx") == "attachment; filename*=utf-8''%E6%8A%A5%E5%91%8A.docx"
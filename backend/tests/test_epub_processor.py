@@ -0,0 +1,19 @@
+"""Tests for EPUB text extraction"""
+import zipfile
+
+from core.epub_processor import _extract_batch
+
+
+def _write_epub(path, text: str):
+    with zipfile.ZipFile(path, "w") as epub:
+        epub.writestr("chapter.xhtml", f"<html><body><p>{text}</p></body></html>")
+
+
+def test_worker_batches_read_the_current_file(tmp_path):
+    epub_path = tmp_path / "book.epub"
+    _write_epub(epub_path, "first edition")
+    assert _extract_batch(str(epub_path), ["chapter.xhtml"], "lxml")[0].to_text() == "first edition"
+
+    # Replaced at the same path: the next batch must not read the old archive
+    _write_epub(epub_path, "second edition")
+    assert _extract_batch(str(epub_path), ["chapter.xhtml", "missing.xhtml"], "lxml")[0].to_text() == "second edition"
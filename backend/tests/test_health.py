@@ -0,0 +1,28 @@
+"""Tests for the health prober"""
+from utils import health
+from utils.health import HealthProber, track_job
+
+
+def test_busy_workers_are_degraded_not_failed(monkeypatch):
+    monkeypatch.setattr(health.os, "cpu_count", lambda: 1)
+    monkeypatch.setattr(health.settings, "health_max_active_jobs", 0)
+    prober = HealthProber()
+
+    with track_job():
+        check = prober._probe_workers()
+        assert (check["status"], check["capacity"]) == ("ok", 2)
+        with track_job():
+            assert prober._probe_workers()["status"] == "degraded"
+    assert prober._probe_workers()["active"] == 0
+
+
+def test_ffprobe_next_to_configured_ffmpeg_keeps_suffix(tmp_path, monkeypatch):
+    for name in ("ffmpeg.exe", "ffprobe.exe"):
+        tool = tmp_path / name
+        tool.write_text("#!/bin/sh\necho version 1\n")
+        tool.chmod(0o755)
+    monkeypatch.setattr(health.settings, "ffmpeg_path", str(tmp_path / "ffmpeg.exe"))
+
+    check = HealthProber()._probe_executable("ffprobe")
+    assert check["status"] == "ok"
+    assert check["path"] == str(tmp_path / "ffprobe.exe")
@@ -0,0 +1,22 @@
+"""Tests for HTML text extraction"""
+from core.html_text import LxmlTextBackend
+
+PREFORMATTED = "def f(x):\n    if x:\n\n        return  1\n\n\n    return 2"
+
+
+def test_pre_round_trips_unchanged():
+    html = f"<html><body><p>a   b</p><pre>\n{PREFORMATTED}\n</pre><p>c</p></body></html>"
+    document = LxmlTextBackend().extract_document(html.encode())
+    assert document.to_text() == f"a b\n{PREFORMATTED}\nc"
+
+
+def test_pre_keeps_leading_blank_lines_and_inline_markup():
+    html = "<html><body><pre>\n\n  <b>x</b> =  1\n</pre></body></html>"
+    document = LxmlTextBackend().extract_document(html.encode())
+    assert document.to_text() == "\n  x =  1"
+
+
+def test_text_outside_pre_is_normalized():
+    html = "<html><body><p>  a \n\n  b  </p></body></html>"
+    document = LxmlTextBackend().extract_document(html.encode())
+    assert document.to_text() == "a b"
@@ -0,0 +1,39 @@
+"""Tests for the image pipeline"""
+import io
+
+from PIL import Image
+
+from core.image_processor import ImagePipeline
+
+
+def _png(color) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (40, 20), color).save(output, "PNG")
+    return output.getvalue()
+
+
+class _Reader:
+    def __init__(self, images: dict[str, bytes]):
+        self.images = images
+
+    def size(self, path: str) -> int:
+        return len(self.images.get(path, b""))
+
+    def read(self, path: str):
+        return self.images.get(path)
+
+
+def test_images_are_spooled_and_deduplicated():
+    red, blue = _png("red"), _png("blue")
+    pipeline = ImagePipeline(_Reader({"a.png": red, "b.png": blue, "copy.png": red}), max_width_inches=6, workers=2)
+    try:
+        pipeline.prefetch(["a.png", "b.png", "copy.png"])
+        a, b, copy = pipeline.get("a.png"), pipeline.get("b.png"), pipeline.get("copy.png")
+
+        assert copy is a
+        assert pipeline.read(a) == red
+        assert pipeline.read(b) == blue
+        assert pipeline.get("missing.png") is None
+        assert pipeline.get_stats()["unique"] == 2
+    finally:
+        pipeline.close()
@@ -0,0 +1,56 @@
+"""Tests for output filename reservation"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import output_files
+from utils.output_files import OutputNameIndex
+
+
+def test_concurrent_reservations_get_unique_names(tmp_path):
+    (tmp_path / "report.docx").touch()
+    index = OutputNameIndex()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        reservations = list(executor.map(lambda _: index.reserve(tmp_path, "report.docx"), range(50)))
+
+    names = {reservation.path.name for reservation in reservations}
+    assert len(names) == 50
+    assert names == {f"report({number}).docx" for number in range(1, 51)}
+
+
+def test_commit_and_abort(tmp_path):
+    index = OutputNameIndex()
+
+    with index.reserve(tmp_path, "out.txt") as reservation:
+        reservation.temp_path.write_text("done")
+    assert (tmp_path / "out.txt").read_text() == "done"
+
+    with pytest.raises(RuntimeError):
+        with index.reserve(tmp_path, "out.txt") as reservation:
+            reservation.temp_path.write_text("partial")
+            raise RuntimeError
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["out.txt"]
+
+
+def test_taken_name_falls_back_to_lowest_free_suffix(tmp_path):
+    index = OutputNameIndex()
+    first = index.reserve(tmp_path, "a.md").path
+    second = index.reserve(tmp_path, "a.md").path
+    assert (first.name, second.name) == ("a.md", "a(1).md")
+
+    # Freed name, and the next indexed one taken by someone else
+    first.unlink()
+    (tmp_path / "a(2).md").touch()
+    assert index.reserve(tmp_path, "a.md").path.name == "a.md"
+    assert index.reserve(tmp_path, "a.md").path.name == "a(3).md"
+
+
+def test_index_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(output_files, "MAX_INDEXED_NAMES", 3)
+    index = OutputNameIndex()
+    for number in range(10):
+        index.reserve(tmp_path, f"file{number}.txt")
+    # Evicted entries are found again by probing
+    assert index.reserve(tmp_path, "file0.txt").path.name == "file0(1).txt"
+    assert len(index._directories[next(iter(index._directories))]) <= 3
@@ -0,0 +1,45 @@
+"""Tests for PDF text extraction"""
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pypdfium2 as pdfium
+import pytest
+
+from conftest import BACKEND_DIR
+from core.pdf_processor import InvalidPDFError, MappedPDF, pdf_processor
+
+
+@pytest.mark.parametrize("content", [b"", b"not a pdf"])
+def test_invalid_pdf_raises_clean_error(tmp_path, content):
+    pdf_path = tmp_path / "input.pdf"
+    pdf_path.write_bytes(content)
+    with pytest.raises(InvalidPDFError):
+        next(pdf_processor.iter_pages(pdf_path), None)
+
+
+def test_concurrent_extraction(tmp_path):
+    pdf_path = tmp_path / "blank.pdf"
+    document = pdfium.PdfDocument.new()
+    for _ in range(20):
+        document.new_page(200, 200)
+    document.save(str(pdf_path))
+    document.close()
+
+    def extract(_):
+        pdf = MappedPDF(str(pdf_path))
+        try:
+            return sum(len(pdf.extract_page(index)) for index in range(len(pdf)))
+        finally:
+            pdf.close()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(extract, range(8))) == [0] * 8
+
+
+
+def test_import_without_register_at_fork():
+    # Windows has no os.register_at_fork; import in a fresh interpreter so the hooks of this one are untouched
+    code = "import os; del os.register_at_fork; import core.pdf_processor"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
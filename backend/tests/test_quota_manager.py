@@ -0,0 +1,62 @@
+"""Tests for the quota ledger and two-phase reservations"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.quota_manager import QuotaManager
+
+HOUR = 3600
+
+
+@pytest.fixture
+def quota(tmp_path):
+    manager = QuotaManager(tmp_path / "quota.db")
+    # 2 hours of transcription at 0.8 yuan/hour
+    assert manager.save_quota("sk-test-key-1234", 1.6)
+    return manager
+
+
+def test_reserve_commit(quota):
+    reservation = quota.reserve_quota(HOUR, job_id="job1")
+    assert reservation["success"]
+    assert reservation["reserved"] == pytest.approx(0.8)
+    assert quota.get_quota_info()["available_quota"] == pytest.approx(0.8)
+
+    # Billed by the actual duration, the reservation ends
+    result = quota.commit_reservation(reservation["reservation_id"], HOUR / 2, job_id="job1")
+    assert result["success"]
+    info = quota.get_quota_info()
+    assert info["remaining_quota"] == pytest.approx(1.2)
+    assert info["reserved_quota"] == 0
+    assert [event["job_id"] for event in quota.get_consumption_events()] == ["job1"]
+
+
+def test_release(quota):
+    reservation = quota.reserve_quota(HOUR)
+    assert quota.release_reservation(reservation["reservation_id"])
+    assert not quota.release_reservation(reservation["reservation_id"])
+
+    info = quota.get_quota_info()
+    assert info["remaining_quota"] == pytest.approx(1.6)
+    assert info["available_quota"] == pytest.approx(1.6)
+
+
+def test_reservations_cannot_overcommit(quota):
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: quota.reserve_quota(HOUR), range(4)))
+    assert sum(result["success"] for result in results) == 2
+    assert quota.get_quota_info()["available_quota"] == pytest.approx(0)
+
+
+def test_expired_reservation_is_dropped(quota):
+    assert quota.reserve_quota(2 * HOUR, timeout=-1)["success"]
+    assert quota.reserve_quota(2 * HOUR)["success"]
+
+
+def test_ledger_is_shared_between_managers(quota):
+    other = QuotaManager(quota.db_path)
+    reservation = other.reserve_quota(HOUR)
+    assert quota.get_quota_info()["reserved_quota"] == pytest.approx(0.8)
+
+    other.commit_reservation(reservation["reservation_id"], HOUR)
+    assert quota.get_quota_info()["remaining_quota"] == pytest.approx(0.8)
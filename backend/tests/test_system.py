@@ -0,0 +1,15 @@
+"""Tests for the system routes"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.minio_uploader import get_minio_uploader
+from routes.system import router
+
+
+def test_health_and_metrics_never_create_the_uploader():
+    get_minio_uploader.cache_clear()
+    client = TestClient(FastAPI(routes=router.routes))
+
+    assert client.get("/api/system/health").json()["minio_connected"] is False
+    assert client.get("/api/system/metrics").json()["minio"] is None
+    assert get_minio_uploader.cache_info().currsize == 0
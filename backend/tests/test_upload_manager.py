@@ -0,0 +1,98 @@
+"""Tests for resumable uploads"""
+import hashlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config import settings
+from routes.upload import router
+from utils.upload_manager import UploadError, UploadManager
+
+DATA = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "temp_dir", tmp_path)
+    return UploadManager()
+
+
+def _append(manager: UploadManager, upload_id: str, offset: int, data: bytes) -> dict:
+    context = manager.open(upload_id, offset)
+    with context as writer:
+        writer.write(data)
+    return context.status
+
+
+def test_resume_after_restart(manager):
+    upload_id = manager.create("book.epub", len(DATA), hashlib.sha256(DATA).hexdigest())["upload_id"]
+    assert _append(manager, upload_id, 0, DATA[:1000])["offset"] == 1000
+
+    # A new manager has lost the hash state: it is rebuilt from the partial file
+    restarted = UploadManager()
+    assert restarted.get_status(upload_id)["offset"] == 1000
+    status = _append(restarted, upload_id, 1000, DATA[1000:])
+
+    assert status["complete"]
+    assert status["sha256"] == hashlib.sha256(DATA).hexdigest()
+    with open(status["file_path"], "rb") as f:
+        assert f.read() == DATA
+
+
+def test_offset_mismatch_and_oversize(manager):
+    upload_id = manager.create("book.epub", 100)["upload_id"]
+    _append(manager, upload_id, 0, b"x" * 10)
+
+    with pytest.raises(UploadError) as error:
+        manager.open(upload_id, 5)
+    assert error.value.status_code == 409
+
+    with pytest.raises(UploadError) as error:
+        _append(manager, upload_id, 10, b"x" * 91)
+    assert error.value.status_code == 413
+    # Rejected data isn't written, and the upload can be resumed
+    assert manager.get_status(upload_id)["offset"] == 10
+
+
+def test_sha256_mismatch_restarts(manager):
+    upload_id = manager.create("book.epub", 4, "0" * 64)["upload_id"]
+    with pytest.raises(UploadError) as error:
+        _append(manager, upload_id, 0, b"data")
+    assert error.value.status_code == 422
+    assert manager.get_status(upload_id)["offset"] == 0
+
+
+def test_upload_api(manager):
+    client = TestClient(FastAPI(routes=router.routes))
+    upload_id = client.post("/api/upload", json={"filename": "notes.md", "size": len(DATA)}).json()["upload_id"]
+
+    response = client.patch(f"/api/upload/{upload_id}", content=DATA[:500], headers={"Upload-Offset": "0"})
+    assert response.json()["offset"] == 500
+
+    response = client.patch(f"/api/upload/{upload_id}", content=DATA[500:], headers={"Upload-Offset": "0"})
+    assert response.status_code == 409
+
+    response = client.patch(f"/api/upload/{upload_id}", content=DATA[500:], headers={"Upload-Offset": "500"})
+    assert response.json()["complete"]
+    assert client.get(f"/api/upload/{upload_id}").json()["sha256"] == hashlib.sha256(DATA).hexdigest()
+
+
+def test_upload_named_like_staged_metadata(manager):
+    upload_id = manager.create("upload.tmp", 4)["upload_id"]
+    status = _append(manager, upload_id, 0, b"data")
+    assert status["complete"]
+    # Metadata written after completion must not replace the data
+    assert manager.get_status(upload_id)["complete"]
+    with open(status["file_path"], "rb") as f:
+        assert f.read() == b"data"
+
+
+def test_purge_drops_hash_state(manager, monkeypatch):
+    upload_id = manager.create("book.epub", 100)["upload_id"]
+    _append(manager, upload_id, 0, b"x" * 10)
+    assert upload_id in manager._states
+
+    monkeypatch.setattr(settings, "upload_expire_hours", -1)
+    manager.create("other.epub", 100)
+    assert upload_id not in manager._states
@@ -0,0 +1,45 @@
+"""Tests for volume splitting"""
+from core.document_model import BlockDocument, BlockType
+from core.volume_generator import VolumeGenerator
+
+
+def _chars(volume: list[BlockDocument]) -> int:
+    return sum(document.char_count for document in volume)
+
+
+def test_oversized_document_is_split_at_block_boundaries():
+    document = BlockDocument.from_text("\n".join(f"line {number:04d}" for number in range(100)))
+    volumes = list(VolumeGenerator().split([document], "size", 100))
+
+    assert len(volumes) == 10
+    assert all(_chars(volume) <= 100 for volume in volumes)
+    lines = [text for volume in volumes for document in volume for _, _, text in document]
+    assert lines == [f"line {number:04d}" for number in range(100)]
+
+
+def test_oversized_block_is_split_inside():
+    words = " ".join(["word"] * 100)
+    document = BlockDocument()
+    document.add(BlockType.PARAGRAPH, words)
+    document.add(BlockType.PARAGRAPH, "x" * 250)
+    volumes = list(VolumeGenerator().split([document], "size", 100))
+
+    assert all(_chars(volume) <= 100 for volume in volumes)
+    texts = [text for volume in volumes for document in volume for _, _, text in document]
+    assert " ".join(texts[:-3]) == words
+    assert texts[-3:] == ["x" * 100, "x" * 100, "x" * 50]
+
+
+def test_volumes_keep_document_boundaries_when_documents_fit():
+    documents = []
+    for number in range(6):
+        document = BlockDocument()
+        document.add(BlockType.HEADING, f"Chapter {number}", 1)
+        document.add(BlockType.PARAGRAPH, "a" * 30)
+        documents.append(document)
+
+    size_volumes = list(VolumeGenerator().split(documents, "size", 100))
+    assert [len(volume) for volume in size_volumes] == [2, 2, 2]
+
+    chapter_volumes = list(VolumeGenerator().split(documents, "chapter", 100))
+    assert [len(volume) for volume in chapter_volumes] == [1] * 6
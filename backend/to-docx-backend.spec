@@ -28,11 +28,12 @@ a = Analysis(
         'pydantic_settings',
         'python_multipart',
         'docx',
-        'ebooklib',
         'bs4',
         'lxml',
         'lxml.etree',
         'lxml._elementpath',
+        'PIL',
+        'pypdfium2',
         'ffmpeg',
         'dashscope',
         'minio',
@@ -0,0 +1,215 @@
+"""
+Download helpers - Range requests, conditional GET and streamed ZIP bundles
+
+Files are streamed in chunks of `download_chunk_size`, so memory stays
+constant whatever the file size. A bundle is zipped on the fly into the
+response: each chunk is compressed and sent before the next one is read,
+nothing is staged on disk.
+"""
+import os
+import zipfile
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Iterator, Optional
+from urllib.parse import quote
+
+from config import settings
+
+# Already compressed outputs (DOCX and ODT are ZIP archives): stored as is in bundles
+STORED_EXTENSIONS = {".docx", ".odt", ".zip", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp3", ".m4a", ".mp4"}
+
+
+def get_etag(stat: os.stat_result) -> str:
+    """Strong ETag from modification time and size (outputs are replaced, not edited in place)"""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def get_last_modified(stat: os.stat_result) -> str:
+    """Last-Modified header value"""
+    return formatdate(stat.st_mtime, usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Whether an If-None-Match / If-Range list contains the ETag (weak comparison)"""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+def _not_modified_since(header: str, stat: os.stat_result) -> bool:
+    """Whether the file is unchanged since an HTTP date (second precision)"""
+    try:
+        return int(stat.st_mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def is_not_modified(headers, stat: os.stat_result) -> bool:
+    """
+    Whether a conditional GET can be answered with 304 Not Modified
+
+    Args:
+        headers: Request headers
+        stat: File status
+
+    Returns:
+        True if the client's copy is current
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        return _etag_matches(if_none_match, get_etag(stat))
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        return _not_modified_since(if_modified_since, stat)
+    return False
+
+
+def parse_range(headers, stat: os.stat_result) -> Optional[tuple[int, int]]:
+    """
+    Get the byte range requested with a Range header
+
+    Only single ranges are served; multiple ranges, unknown units and an
+    If-Range that no longer matches the file fall back to the full file.
+
+    Args:
+        headers: Request headers
+        stat: File status
+
+    Returns:
+        (first byte, last byte) inclusive, None for the full file
+
+    Raises:
+        ValueError: The range lies outside the file (416)
+    """
+    header = headers.get("range")
+    if not header:
+        return None
+
+    if_range = (headers.get("if-range") or "").strip()
+    if if_range:
+        if if_range.startswith(('"', "W/")):
+            # Only a strong ETag can validate a range
+            if if_range != get_etag(stat):
+                return None
+        elif not _not_modified_since(if_range, stat):
+            return None
+
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    first, dash, last = ranges.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        # Malformed: ignore the header
+        return None
+
+    size = stat.st_size
+    if start is None:
+        # Suffix range: the last N bytes
+        if end is None:
+            return None
+        if end <= 0 or size == 0:
+            raise ValueError(f"Unsatisfiable range: {header}")
+        return max(0, size - end), size - 1
+    if end is not None and start > end:
+        return None
+    if start >= size:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def content_disposition(filename: str) -> str:
+    """Attachment header, with the UTF-8 name for non-ASCII filenames (RFC 6266)"""
+    quoted = quote(filename)
+    if quoted == filename:
+        return f'attachment; filename="{filename}"'
+    return f"attachment; filename*=utf-8''{quoted}"
+
+
+def iter_file(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Read part of a file in chunks
+
+    Args:
+        path: File to read
+        start: First byte
+        end: Last byte, inclusive (end of file if None)
+
+    Yields:
+        Chunks of at most download_chunk_size bytes
+    """
+    chunk_size = settings.download_chunk_size
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            chunk = file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+class _ChunkSink:
+    """Write-only stream collecting what zipfile writes until it is sent"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        """Get and clear the written bytes"""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(files: list[tuple[str, Path]]) -> Iterator[bytes]:
+    """
+    Stream a ZIP archive of several files
+
+    The stream isn't seekable, so sizes and CRCs follow each entry in data
+    descriptors; entries use ZIP64 so bundles may exceed 4GB. Text outputs
+    are deflated, already compressed ones (DOCX, ODT) stored.
+
+    Args:
+        files: (name in the archive, file path)
+
+    Yields:
+        Archive bytes
+    """
+    chunk_size = settings.download_chunk_size
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for name, path in files:
+            info = zipfile.ZipInfo.from_file(path, name)
+            if path.suffix.lower() in STORED_EXTENSIONS:
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, "w", force_zip64=True) as entry, open(path, "rb") as file:
+                while chunk := file.read(chunk_size):
+                    entry.write(chunk)
+                    # The compressor may hold data back: send whatever it produced
+                    if data := sink.take():
+                        yield data
+            # Rest of the entry and its data descriptor
+            if data := sink.take():
+                yield data
+    # Central directory
+    if data := sink.take():
+        yield data
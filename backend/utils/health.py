@@ -0,0 +1,241 @@
+"""
+Health Prober - Background dependency checks for liveness and readiness
+
+Dependencies (MinIO, DashScope, ffmpeg/ffprobe, disk space, conversion
+load) are probed on a background thread every `health_probe_interval`
+seconds. Health endpoints only read the cached report, so polling them
+costs nothing and never blocks on a slow dependency.
+
+Each check reports a status:
+- ok: working
+- degraded: a feature is unavailable (e.g. no ffmpeg: no audio/video
+  conversion) or conversions are slowed down (all workers busy: new ones
+  queue), other conversions still work
+- fail: conversions can't run (e.g. disk full)
+
+The backend is ready when no check fails.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from config import settings
+
+DASHSCOPE_URL = "https://dashscope.aliyuncs.com"
+PROBE_TIMEOUT = 5
+
+# Conversions in progress
+_active_jobs = 0
+_active_jobs_lock = threading.Lock()
+
+
+@contextmanager
+def track_job():
+    """Count a conversion as in progress while the block runs"""
+    global _active_jobs
+
+    with _active_jobs_lock:
+        _active_jobs += 1
+    try:
+        yield
+    finally:
+        with _active_jobs_lock:
+            _active_jobs -= 1
+
+
+def get_active_jobs() -> int:
+    """Number of conversions in progress"""
+    return _active_jobs
+
+
+def _check(status: str, message: str = "", latency_ms: Optional[float] = None, **details) -> dict:
+    """Build a check result"""
+    result = {"status": status, "message": message}
+    if latency_ms is not None:
+        result["latency_ms"] = round(latency_ms, 1)
+    result.update(details)
+    return result
+
+
+class HealthProber:
+    """Probes dependencies periodically and caches the results"""
+
+    def __init__(self):
+        self._report: Optional[dict] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _probe_minio(self) -> dict:
+        """Round trip to the MinIO bucket"""
+        # Never trigger MinIO initialization from here (warm-up does it when configured)
+        if "core.minio_uploader" not in sys.modules:
+            if not (settings.minio_endpoint and settings.minio_access_key):
+                return _check("degraded", "MinIO not configured")
+            return _check("degraded", "MinIO not initialized yet")
+
+        from core.minio_uploader import get_minio_uploader
+
+        client = get_minio_uploader().client
+        if client is None:
+            return _check("degraded", "MinIO client not initialized")
+
+        start = time.perf_counter()
+        try:
+            exists = client.bucket_exists(settings.minio_bucket)
+        except Exception as e:
+            return _check("degraded", f"MinIO unreachable: {e}", (time.perf_counter() - start) * 1000)
+        latency_ms = (time.perf_counter() - start) * 1000
+        if not exists:
+            return _check("degraded", f"Bucket not found: {settings.minio_bucket}", latency_ms)
+        return _check("ok", latency_ms=latency_ms)
+
+    def _probe_dashscope(self) -> dict:
+        """DashScope API key (license or settings) and endpoint reachability"""
+        # 优先使用激活码设置的环境变量
+        if not (os.environ.get("DASHSCOPE_API_KEY") or settings.dashscope_api_key):
+            return _check("degraded", "DashScope API key not configured (activate the software)", configured=False)
+
+        import requests
+
+        start = time.perf_counter()
+        try:
+            # Any HTTP response means the endpoint is reachable
+            requests.head(DASHSCOPE_URL, timeout=PROBE_TIMEOUT, allow_redirects=False)
+        except requests.RequestException as e:
+            return _check("degraded", f"DashScope unreachable: {e}", (time.perf_counter() - start) * 1000, configured=True)
+        return _check("ok", latency_ms=(time.perf_counter() - start) * 1000, configured=True)
+
+    def _probe_executable(self, name: str) -> dict:
+        """An ffmpeg tool is on the path and runs"""
+        executable = name
+        if settings.ffmpeg_path:
+            ffmpeg_path = Path(settings.ffmpeg_path)
+            # Keep ".exe": which() doesn't try PATHEXT for a path with a directory part
+            executable = str(ffmpeg_path.with_name(name + ffmpeg_path.suffix)) if name != "ffmpeg" else settings.ffmpeg_path
+        path = shutil.which(executable)
+        if not path:
+            return _check("degraded", f"{name} not found, audio/video conversion unavailable")
+
+        start = time.perf_counter()
+        try:
+            result = subprocess.run([path, "-version"], capture_output=True, timeout=PROBE_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return _check("degraded", f"{name} failed to run: {e}", path=path)
+        if result.returncode != 0:
+            return _check("degraded", f"{name} exited with code {result.returncode}", path=path)
+        version = result.stdout.decode(errors="ignore").split("\n", 1)[0]
+        return _check("ok", latency_ms=(time.perf_counter() - start) * 1000, path=path, version=version)
+
+    def _probe_disk(self, directory: Path) -> dict:
+        """Free space in a working directory"""
+        try:
+            usage = shutil.disk_usage(directory)
+        except OSError as e:
+            return _check("fail", f"Not accessible: {e}", path=str(directory))
+        free_mb = usage.free / 1024 / 1024
+        if usage.free < settings.health_min_free_bytes:
+            return _check("fail", f"Low disk space: {free_mb:.0f}MB free", path=str(directory), free_mb=round(free_mb))
+        return _check("ok", path=str(directory), free_mb=round(free_mb))
+
+    def _probe_workers(self) -> dict:
+        """Conversions in progress against capacity"""
+        # At least 2 by default: a single core still overlaps I/O-bound conversions
+        capacity = settings.health_max_active_jobs or max(2, os.cpu_count() or 1)
+        active = get_active_jobs()
+        if active >= capacity:
+            # New conversions queue rather than fail: not a reason to take the backend out of rotation
+            return _check("degraded", f"All workers busy ({active}/{capacity})", active=active, capacity=capacity)
+        return _check("ok", active=active, capacity=capacity)
+
+    def probe(self) -> dict:
+        """
+        Run all checks now and cache the report
+
+        Returns:
+            {"ready": bool, "checked_at": float, "duration_ms": float, "checks": {name: check}}
+        """
+        start = time.perf_counter()
+        checks = {}
+        probes = {
+            "minio": self._probe_minio,
+            "dashscope": self._probe_dashscope,
+            "ffmpeg": lambda: self._probe_executable("ffmpeg"),
+            "ffprobe": lambda: self._probe_executable("ffprobe"),
+            "temp_dir": lambda: self._probe_disk(settings.temp_dir),
+            "output_dir": lambda: self._probe_disk(settings.output_dir),
+            "workers": self._probe_workers,
+        }
+        for name, probe in probes.items():
+            try:
+                checks[name] = probe()
+            except Exception as e:
+                logger.exception(f"Health probe {name} failed: {e}")
+                checks[name] = _check("fail", f"Probe error: {e}")
+
+        report = {
+            "ready": all(check["status"] != "fail" for check in checks.values()),
+            "checked_at": time.time(),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "checks": checks,
+        }
+        with self._lock:
+            previous = self._report
+            self._report = report
+
+        # Log state changes only
+        for name, check in checks.items():
+            previous_status = previous["checks"][name]["status"] if previous else "ok"
+            if check["status"] != previous_status:
+                log = logger.info if check["status"] == "ok" else logger.warning
+                log(f"Health check {name}: {previous_status} -> {check['status']} {check['message']}".rstrip())
+        return report
+
+    def get_report(self) -> Optional[dict]:
+        """
+        Get the latest report, with live worker load
+
+        Returns:
+            Report, None before the first probe has finished
+        """
+        with self._lock:
+            report = self._report
+        if report is None:
+            return None
+
+        # Worker load changes between probes and costs nothing to check
+        checks = dict(report["checks"], workers=self._probe_workers())
+        return {
+            **report,
+            "ready": all(check["status"] != "fail" for check in checks.values()),
+            "checks": checks,
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(settings.health_probe_interval)
+
+    def start(self):
+        """Start probing in the background"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop probing"""
+        self._stop.set()
+
+
+# Global prober instance
+health_prober = HealthProber()
@@ -9,6 +9,8 @@ import base64
 import platform
 import subprocess
 import json
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict
@@ -39,9 +41,41 @@ LICENSE_FILE = get_license_file_path()
 logger.info(f"License file path: {LICENSE_FILE}")
 
 
+# 机器码只计算一次（Windows 上需要调用 wmic、getmac）
+_machine_code: Optional[str] = None
+_machine_code_lock = threading.Lock()
+
+# 激活码验证结果缓存: (缓存时间, 结果)
+_license_cache: Optional[tuple] = None
+_license_cache_lock = threading.Lock()
+
+
 def get_machine_code() -> str:
     """
-    获取机器码（基于硬件信息生成唯一标识）
+    获取机器码，首次调用时计算，之后直接返回
+
+    并发的首次调用等待同一次计算。
+
+    Returns:
+        机器码字符串
+    """
+    global _machine_code
+
+    if _machine_code is None:
+        with _machine_code_lock:
+            if _machine_code is None:
+                _machine_code = _compute_machine_code()
+    return _machine_code
+
+
+def start_machine_code_probe():
+    """在后台线程中提前计算机器码（启动时调用）"""
+    threading.Thread(target=get_machine_code, name="machine-code", daemon=True).start()
+
+
+def _compute_machine_code() -> str:
+    """
+    计算机器码（基于硬件信息生成唯一标识）
 
     Returns:
         机器码字符串
@@ -230,6 +264,56 @@ def load_license() -> Optional[str]:
         return None
 
 
+def _get_license_state() -> tuple:
+    """
+    获取机器码和激活码验证结果，在有效期内使用缓存
+
+    激活码文件和 HMAC 校验结果缓存 license_cache_ttl 秒；激活和取消激活时
+    调用 invalidate_activation_cache 立即失效。
+
+    Returns:
+        (机器码, 验证结果；未激活时为None)
+    """
+    from config import settings
+
+    global _license_cache
+
+    cache = _license_cache
+    if cache is not None and time.monotonic() - cache[0] < settings.license_cache_ttl:
+        return cache[1]
+
+    with _license_cache_lock:
+        # 其他线程可能刚刚刷新过
+        cache = _license_cache
+        if cache is not None and time.monotonic() - cache[0] < settings.license_cache_ttl:
+            return cache[1]
+
+        # 获取机器码
+        machine_code = get_machine_code()
+
+        # 加载并验证激活码
+        license_code = load_license()
+        result = verify_license_code(machine_code, license_code) if license_code else None
+
+        # 如果激活码有效，设置API密钥到环境变量
+        if result and result["valid"]:
+            api_key = result.get("api_key", "")
+            if api_key:
+                os.environ["DASHSCOPE_API_KEY"] = api_key
+                logger.info("DASHSCOPE_API_KEY loaded from license")
+
+        _license_cache = (time.monotonic(), (machine_code, result))
+        return machine_code, result
+
+
+def invalidate_activation_cache():
+    """清除激活状态缓存（激活、取消激活后调用）"""
+    global _license_cache
+
+    with _license_cache_lock:
+        _license_cache = None
+
+
 def check_activation() -> Dict[str, any]:
     """
     检查软件激活状态
@@ -245,31 +329,17 @@ def check_activation() -> Dict[str, any]:
     """
     from utils.quota_manager import quota_manager
 
-    # 获取机器码
-    machine_code = get_machine_code()
-
-    # 加载激活码
-    license_code = load_license()
+    machine_code, result = _get_license_state()
 
-    if not license_code:
+    if result is None:
         return {
             "activated": False,
             "machine_code": machine_code,
             "message": "Software not activated"
         }
 
-    # 验证激活码
-    result = verify_license_code(machine_code, license_code)
-
-    # 如果激活码有效，设置API密钥到环境变量
-    if result["valid"]:
-        api_key = result.get("api_key", "")
-        if api_key:
-            os.environ["DASHSCOPE_API_KEY"] = api_key
-            logger.info("DASHSCOPE_API_KEY loaded from license")
-
     if result["valid"]:
-        # 检查额度
+        # 检查额度（额度管理器有自己的缓存，每次都取最新余额）
         quota_info = quota_manager.get_quota_info()
 
         # 检查额度是否用完
@@ -329,6 +399,7 @@ def activate_software(license_code: str) -> Dict[str, any]:
     if result["valid"]:
         # 保存激活码
         if save_license(license_code):
+            invalidate_activation_cache()
             # 保存API KEY到环境变量或配置文件
             api_key = result.get("api_key", "")
             quota = result.get("quota", 0)
@@ -1,12 +1,35 @@
-"""Logging Configuration"""
+"""
+Logging Configuration
+
+Sinks are queue-backed (enqueue=True): the calling thread only formats the
+record and puts it on a queue, a background thread does the writing, so
+slow consoles and disk I/O never hold up a conversion. Records carry the
+request_id / job_id bound with logger.contextualize() (context variables,
+so concurrent jobs don't mix), and repetitive DEBUG messages are
+rate-limited per log statement.
+"""
 import sys
 import os
 import platform
+import threading
+import time
 from pathlib import Path
 from loguru import logger
 
 from config import settings
 
+# Context variables shown in every log line when bound
+CONTEXT_KEYS = ("request_id", "job_id")
+
+CONSOLE_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - {extra[context]}<level>{message}</level>"
+)
+FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {extra[context]}{message}"
+
+# DEBUG and TRACE
+RATE_LIMITED_LEVEL = 10
+
 
 def get_log_directory():
     """获取日志目录路径（使用用户数据目录）"""
@@ -26,16 +49,80 @@ def get_log_directory():
     return log_dir
 
 
+def _add_context(record):
+    """Render the bound request/job IDs as a line prefix"""
+    extra = record["extra"]
+    ids = " ".join(f"{key}={extra[key]}" for key in CONTEXT_KEYS if extra.get(key))
+    extra["context"] = f"[{ids}] " if ids else ""
+
+
+class DebugRateLimiter:
+    """
+    Log filter dropping DEBUG messages beyond a rate per log statement
+
+    A statement (module and line) may log `rate` DEBUG messages per second;
+    the rest are dropped and counted, and the next message let through
+    reports how many were suppressed. Other levels always pass.
+    """
+
+    def __init__(self, rate: int):
+        """
+        Args:
+            rate: DEBUG messages per second per log statement (0 = unlimited)
+        """
+        self.rate = rate
+        # (module, line) -> [window start, messages in window, suppressed]
+        self._windows: dict[tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __call__(self, record) -> bool:
+        if self.rate <= 0 or record["level"].no > RATE_LIMITED_LEVEL:
+            return True
+
+        # Every sink filters the same record: decide once
+        local = self._local
+        if getattr(local, "record", None) is record:
+            return local.allowed
+        allowed = self._allow(record)
+        local.record = record
+        local.allowed = allowed
+        return allowed
+
+    def _allow(self, record) -> bool:
+        key = (record["name"], record["line"])
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= 1:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record["message"] += f" ({suppressed} similar messages suppressed)"
+                return True
+            if window[1] < self.rate:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
 def setup_logger():
     """Setup logger configuration"""
     # Remove default logger
     logger.remove()
 
+    logger.configure(patcher=_add_context)
+    rate_limiter = DebugRateLimiter(settings.log_debug_rate_limit)
+
     # Console logger
     logger.add(
         sys.stdout,
-        colorize=True,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        colorize=not settings.log_json,
+        format=CONSOLE_FORMAT,
+        serialize=settings.log_json,
+        filter=rate_limiter,
+        enqueue=True,
         level="DEBUG" if settings.debug else "INFO"
     )
 
@@ -43,11 +130,15 @@ def setup_logger():
     log_dir = get_log_directory()
 
     logger.add(
-        log_dir / "app_{time:YYYY-MM-DD}.log",
+        log_dir / ("app_{time:YYYY-MM-DD}.jsonl" if settings.log_json else "app_{time:YYYY-MM-DD}.log"),
         rotation="00:00",
         retention="7 days",
         compression="zip",
         encoding="utf-8",
+        format=FILE_FORMAT,
+        serialize=settings.log_json,
+        filter=rate_limiter,
+        enqueue=True,
         level="DEBUG"
     )
 
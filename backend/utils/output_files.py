@@ -0,0 +1,220 @@
+"""
+输出文件命名与原子保存
+Output filename reservation and atomic saves
+
+Names are reserved against an in-memory index of the highest "(N)"
+suffix used per directory and base name, so picking "report(7).docx"
+costs no filesystem probing. Each directory is listed once, on first use,
+to seed the index. The reserved name is claimed with an exclusive create,
+so concurrent jobs (and other processes) never get the same name, and
+content is written to a temporary file that replaces the placeholder
+only when complete.
+
+The index only counts up: a name freed by deleting its file is not handed
+out again while the index remembers a higher suffix. When the indexed name
+turns out to be taken (created by another process, or its entry was
+evicted from the bounded index), names are probed from the lowest suffix
+instead, which does reuse freed names.
+"""
+import itertools
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+# "name(12).ext" -> ("name", "12", ".ext")
+_SUFFIXED_NAME = re.compile(r"^(?P<stem>.*)\((?P<number>\d+)\)(?P<ext>\.[^.]*)?$")
+
+# Temporary files of in-progress saves
+TEMP_PREFIX = ".~"
+TEMP_SUFFIX = ".tmp"
+
+# Give up after probing this many taken names
+MAX_RESERVE_ATTEMPTS = 10000
+
+# Index bounds, least recently used first out (dropped names are found again by probing)
+MAX_INDEXED_DIRECTORIES = 32
+MAX_INDEXED_NAMES = 4096
+
+
+def _split_extension(filename: str) -> tuple[str, str]:
+    """
+    Split a filename into name and extension
+
+    Args:
+        filename: e.g. "report.docx"
+
+    Returns:
+        ("report", ".docx"); extension "" for names without one
+    """
+    stem, dot, ext = filename.rpartition(".")
+    if not dot or not stem:
+        return filename, ""
+    return stem, f".{ext}"
+
+
+class OutputReservation:
+    """
+    A reserved output file
+
+    The final path exists as an empty placeholder until commit() moves the
+    finished temporary file over it. Use as a context manager to commit on
+    success and abort on error.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.temp_path = path.with_name(f"{TEMP_PREFIX}{path.name}.{uuid.uuid4().hex[:8]}{TEMP_SUFFIX}")
+        self._done = False
+
+    def commit(self):
+        """Atomically replace the placeholder with the written temporary file"""
+        os.replace(self.temp_path, self.path)
+        self._done = True
+
+    def abort(self):
+        """Remove the temporary file and release the reserved name"""
+        if self._done:
+            return
+        self.temp_path.unlink(missing_ok=True)
+        self.path.unlink(missing_ok=True)
+        self._done = True
+
+    def __enter__(self) -> "OutputReservation":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+class OutputNameIndex:
+    """Highest suffix used per (directory, base name, extension)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # directory -> {(base name, extension) (case-normalized): highest suffix number}, least recently used first
+        self._directories: OrderedDict[str, OrderedDict[tuple[str, str], int]] = OrderedDict()
+
+    def _key(self, stem: str, ext: str) -> tuple[str, str]:
+        return os.path.normcase(stem), os.path.normcase(ext)
+
+    def _scan(self, directory: Path) -> OrderedDict[tuple[str, str], int]:
+        """List a directory once to find the suffixes already in use"""
+        highest = OrderedDict()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(TEMP_PREFIX):
+                    continue
+                # The name itself is taken...
+                key = self._key(*_split_extension(entry.name))
+                highest.setdefault(key, 0)
+                # ...and so is suffix N of its base name
+                match = _SUFFIXED_NAME.match(entry.name)
+                if match:
+                    key = self._key(match.group("stem"), match.group("ext") or "")
+                    highest[key] = max(highest.get(key, -1), int(match.group("number")))
+        while len(highest) > MAX_INDEXED_NAMES:
+            highest.popitem(last=False)
+        logger.debug(f"Output name index seeded: {directory} ({len(highest)} names)")
+        return highest
+
+    def _get_names(self, directory: Path) -> OrderedDict[tuple[str, str], int]:
+        """Index of a directory, listing it on first use (call with the lock held)"""
+        directory_key = os.path.normcase(str(directory))
+        names = self._directories.get(directory_key)
+        if names is None:
+            names = self._directories[directory_key] = self._scan(directory)
+            if len(self._directories) > MAX_INDEXED_DIRECTORIES:
+                self._directories.popitem(last=False)
+        else:
+            self._directories.move_to_end(directory_key)
+        return names
+
+    def _claim(self, directory: Path, stem: str, ext: str, number: Optional[int] = None) -> int:
+        """
+        Record a suffix as used
+
+        Args:
+            directory: Output directory
+            stem: Base name
+            ext: Extension
+            number: Suffix taken, the next one after the highest if None
+
+        Returns:
+            Suffix number (0 for the name without suffix)
+        """
+        key = self._key(stem, ext)
+        with self._lock:
+            names = self._get_names(directory)
+            highest = names.pop(key, -1)
+            if number is None:
+                number = highest + 1
+            names[key] = max(highest, number)
+            if len(names) > MAX_INDEXED_NAMES:
+                names.popitem(last=False)
+        return number
+
+    def _create(self, directory: Path, stem: str, ext: str, number: int) -> Optional[Path]:
+        """Create the placeholder of a name, None if the name is taken"""
+        path = directory / (f"{stem}{ext}" if number == 0 else f"{stem}({number}){ext}")
+        try:
+            # Exclusive create: fails if anyone else has the name
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return None
+        os.close(fd)
+        return path
+
+    def reserve(self, output_dir: Path, filename: str) -> OutputReservation:
+        """
+        Reserve a unique output filename
+
+        Adds (1), (2), etc. like Windows Explorer if the name is taken.
+
+        Args:
+            output_dir: Output directory (must exist)
+            filename: Desired filename with extension
+
+        Returns:
+            Reservation of the final path
+        """
+        directory = output_dir.resolve()
+        stem, ext = _split_extension(filename)
+
+        path = self._create(directory, stem, ext, self._claim(directory, stem, ext))
+        if path is None:
+            # The index is behind the directory: take the lowest free suffix
+            for number in itertools.islice(itertools.count(), MAX_RESERVE_ATTEMPTS):
+                path = self._create(directory, stem, ext, number)
+                if path is not None:
+                    self._claim(directory, stem, ext, number)
+                    break
+            else:
+                raise FileExistsError(f"Could not reserve an output name for {filename} in {directory}")
+
+        return OutputReservation(path)
+
+    def forget(self, output_dir: Optional[Path] = None):
+        """
+        Drop the index of a directory (or all), so it is listed again on next use
+
+        Args:
+            output_dir: Output directory, all directories if None
+        """
+        with self._lock:
+            if output_dir is None:
+                self._directories.clear()
+            else:
+                self._directories.pop(os.path.normcase(str(output_dir.resolve())), None)
+
+
+# 全局输出命名索引
+output_names = OutputNameIndex()
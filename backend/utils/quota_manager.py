@@ -1,19 +1,64 @@
 """
 额度管理模块
 管理用户的可用转换额度（人民币）
+
+额度保存在 SQLite 账本中（WAL 模式）：
+- account 表保存总额度和已用额度，扣费是单条 UPDATE 的原子累加
+- consumption 表是只追加的扣费记录（任务、时长、费用、时间）
+- reservation 表是进行中任务预占的额度，任务结束时按实际时长扣费（commit）
+  或释放（release），超时未结束的预占自动失效
+- 余额在内存中缓存，通过 PRAGMA data_version 感知其他进程的写入
 """
 import json
 import sys
 import os
 import platform
+import sqlite3
+import threading
+import time
+import uuid
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from loguru import logger
 from datetime import datetime
 
-# 额度数据存储路径 - 使用可写的用户数据目录
-def get_quota_file_path() -> Path:
-    """获取配额文件路径"""
+# 按0.8元/小时计算
+QUOTA_RATE_PER_HOUR = 0.8
+
+# 等待其他进程释放写锁的时间（毫秒）
+BUSY_TIMEOUT_MS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS account (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    api_key TEXT NOT NULL,
+    api_key_hash TEXT NOT NULL,
+    total_quota REAL NOT NULL,
+    used_quota REAL NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    last_updated TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS consumption (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT,
+    duration_seconds REAL NOT NULL,
+    cost REAL NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reservation (
+    id TEXT PRIMARY KEY,
+    job_id TEXT,
+    duration_seconds REAL NOT NULL,
+    amount REAL NOT NULL,
+    created_at TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+# 额度数据存储目录 - 使用可写的用户数据目录
+def get_quota_dir() -> Path:
+    """获取配额数据目录"""
     if getattr(sys, 'frozen', False):
         # 打包后的应用，使用应用数据目录
         if platform.system() == "Windows":
@@ -26,24 +71,125 @@ def get_quota_file_path() -> Path:
         quota_dir = Path(__file__).parent.parent / "config"
 
     quota_dir.mkdir(parents=True, exist_ok=True)
-    return quota_dir / "quota.dat"
+    return quota_dir
 
-QUOTA_FILE = get_quota_file_path()
+
+QUOTA_DB = get_quota_dir() / "quota.db"
 
 
 class QuotaManager:
     """额度管理器"""
 
-    def __init__(self):
-        self.quota_file = QUOTA_FILE
-        logger.info(f"QuotaManager initialized with file: {self.quota_file}")
-        self._ensure_config_dir()
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path or QUOTA_DB
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # 缓存的账户信息和预占 [(额度, 过期时间)]，及其对应的数据库版本
+        self._cached: Optional[Dict] = None
+        self._cached_reservations: List[tuple] = []
+        self._cached_version: Optional[int] = None
+        logger.info(f"QuotaManager initialized with ledger: {self.db_path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开账本（首次使用时建表并迁移旧的 quota.dat），调用方需持有锁"""
+        if self._conn is not None:
+            return self._conn
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # autocommit 模式，事务显式用 BEGIN IMMEDIATE 开启
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.executescript(SCHEMA)
+        self._conn = conn
+        self._migrate_json()
+        return conn
+
+    def _migrate_json(self):
+        """把旧版 quota.dat（JSON）中的额度导入账本，之后改名保留"""
+        legacy_file = self.db_path.with_name("quota.dat")
+        if not legacy_file.exists():
+            return
 
-    def _ensure_config_dir(self):
-        """确保配置目录存在"""
-        self.quota_file.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
 
-    def save_quota(self,api_key: str, total_quota: float) -> bool:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 其他进程可能已经迁移过
+                if self._conn.execute("SELECT 1 FROM account WHERE id = 1").fetchone() is None:
+                    now = datetime.now().isoformat()
+                    self._conn.execute(
+                        "INSERT INTO account (id, api_key, api_key_hash, total_quota, used_quota, created_at, last_updated) "
+                        "VALUES (1, ?, ?, ?, ?, ?, ?)",
+                        (
+                            data.get("api_key", ""),
+                            data.get("api_key_hash", ""),
+                            float(data.get("total_quota", 0)),
+                            float(data.get("used_quota", 0)),
+                            data.get("created_at", now),
+                            data.get("last_updated", now)
+                        )
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            legacy_file.replace(legacy_file.with_name("quota.dat.migrated"))
+            logger.info(f"Quota migrated from {legacy_file} to ledger")
+        except Exception as e:
+            logger.error(f"Failed to migrate quota file {legacy_file}: {e}")
+
+    def _row_to_info(self, row: sqlite3.Row) -> Dict:
+        """账户行转换为额度信息字典（不含预占）"""
+        return {
+            "api_key": row["api_key"],
+            "api_key_hash": row["api_key_hash"],
+            "total_quota": row["total_quota"],
+            "used_quota": row["used_quota"],
+            "remaining_quota": row["total_quota"] - row["used_quota"],
+            "created_at": row["created_at"],
+            "last_updated": row["last_updated"]
+        }
+
+    def _cost(self, duration_seconds: float) -> float:
+        """音视频时长对应的额度（人民币元）"""
+        return duration_seconds / 3600 * QUOTA_RATE_PER_HOUR
+
+    def _load(self) -> Optional[Dict]:
+        """
+        获取账户信息，调用方需持有锁
+
+        数据库未被其他连接修改时直接返回缓存（PRAGMA data_version 只在
+        其他连接提交后变化），否则重新读取。
+        """
+        conn = self._connect()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._cached_version:
+            row = conn.execute("SELECT * FROM account WHERE id = 1").fetchone()
+            self._cached = self._row_to_info(row) if row else None
+            self._cached_reservations = [
+                (amount, expires_at)
+                for amount, expires_at in conn.execute("SELECT amount, expires_at FROM reservation")
+            ]
+            self._cached_version = version
+        return self._cached
+
+    def _get_reserved(self) -> float:
+        """未过期预占的额度合计，调用方需持有锁并已调用 _load"""
+        now = time.time()
+        return sum(amount for amount, expires_at in self._cached_reservations if expires_at > now)
+
+    def _refresh(self):
+        """本连接写入后重新读取缓存，调用方需持有锁"""
+        self._cached_version = None
+        self._load()
+
+    def save_quota(self, api_key: str, total_quota: float) -> bool:
         """
         保存初始额度信息
 
@@ -55,18 +201,22 @@ class QuotaManager:
             bool: 是否保存成功
         """
         try:
-            data = {
-                # 不能直接展示，前三和后4展示出来就行
-                "api_key": api_key [:3] + "************" + api_key[-4:],"api_key_hash": api_key,
-                "total_quota": total_quota,
-                "used_quota": 0.0,
-                "remaining_quota": total_quota,
-                "created_at": datetime.now().isoformat(),
-                "last_updated": datetime.now().isoformat()
-            }
-
-            with open(self.quota_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            now = datetime.now().isoformat()
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO account (id, api_key, api_key_hash, total_quota, used_quota, created_at, last_updated) "
+                    "VALUES (1, ?, ?, ?, 0, ?, ?)",
+                    (
+                        # 不能直接展示，前三和后4展示出来就行
+                        api_key[:3] + "************" + api_key[-4:],
+                        api_key,
+                        total_quota,
+                        now,
+                        now
+                    )
+                )
+                self._refresh()
 
             logger.info(f"Quota saved successfully: {total_quota} yuan")
             return True
@@ -82,52 +232,75 @@ class QuotaManager:
             dict: 额度信息或None
         """
         try:
-            if not self.quota_file.exists():
-                return None
-
-            with open(self.quota_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            return data
+            with self._lock:
+                info = self._load()
+                if not info:
+                    return None
+                reserved = self._get_reserved()
+            return {
+                **info,
+                "reserved_quota": reserved,
+                "available_quota": info["remaining_quota"] - reserved
+            }
         except Exception as e:
             logger.error(f"Failed to read quota info: {e}")
             return None
 
-    def consume_quota(self, duration_seconds: float) -> Dict[str, any]:
+    def consume_quota(self, duration_seconds: float, job_id: Optional[str] = None) -> Dict[str, any]:
         """
         消耗额度（按0.8元/小时计算）
         允许余额变为负数，但只记录消耗
 
+        扣费和扣费记录在同一个事务中写入，并发任务和多个进程不会丢失更新。
+
         Args:
             duration_seconds: 音频文件的实际时长（秒）
+            job_id: 任务标识，写入扣费记录
 
         Returns:
             dict: {"success": bool, "message": str, "remaining_quota": float}
         """
-        try:
-            quota_info = self.get_quota_info()
-            if not quota_info:
-                return {
-                    "success": False,
-                    "message": "No quota information found, please activate first",
-                    "remaining_quota": 0
-                }
+        return self._consume(duration_seconds, job_id)
 
+    def _consume(self, duration_seconds: float, job_id: Optional[str], reservation_id: Optional[str] = None) -> Dict[str, any]:
+        """扣费并写入扣费记录，同时删除对应的预占（同一事务）"""
+        try:
             # 计算消耗的额度（人民币元）
-            # 按0.8元/小时计算
-            duration_hours = duration_seconds / 3600
-            consumed = duration_hours * 0.8
-
-            # 更新额度（允许余额变为负数）
-            quota_info["used_quota"] += consumed
-            quota_info["remaining_quota"] -= consumed
-            quota_info["last_updated"] = datetime.now().isoformat()
+            consumed = self._cost(duration_seconds)
+            now = datetime.now().isoformat()
+
+            with self._lock:
+                conn = self._connect()
+                # 立即获取写锁，其他进程的扣费排队等待
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # 更新额度（允许余额变为负数）
+                    updated = conn.execute(
+                        "UPDATE account SET used_quota = used_quota + ?, last_updated = ? WHERE id = 1",
+                        (consumed, now)
+                    ).rowcount
+                    if not updated:
+                        conn.execute("ROLLBACK")
+                        return {
+                            "success": False,
+                            "message": "No quota information found, please activate first",
+                            "remaining_quota": 0
+                        }
+
+                    conn.execute(
+                        "INSERT INTO consumption (job_id, duration_seconds, cost, created_at) VALUES (?, ?, ?, ?)",
+                        (job_id, duration_seconds, consumed, now)
+                    )
+                    if reservation_id:
+                        # 预占即使已过期也照常按实际时长扣费
+                        conn.execute("DELETE FROM reservation WHERE id = ?", (reservation_id,))
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                self._refresh()
+                remaining = self._cached["remaining_quota"]
 
-            # 保存更新后的额度
-            with open(self.quota_file, 'w', encoding='utf-8') as f:
-                json.dump(quota_info, f, ensure_ascii=False, indent=2)
-
-            remaining = quota_info["remaining_quota"]
             logger.info(f"Quota consumed: {consumed:.4f} yuan, Remaining: {remaining:.4f} yuan")
 
             return {
@@ -144,10 +317,131 @@ class QuotaManager:
                 "remaining_quota": 0
             }
 
+    def reserve_quota(self, duration_seconds: float, job_id: Optional[str] = None, timeout: Optional[float] = None) -> Dict[str, any]:
+        """
+        按预估时长预占额度（两阶段扣费的第一步）
+
+        可用额度 = 剩余额度 - 其他任务未过期的预占。可用额度不足时预占失败，
+        任务不应开始。任务结束后调用 commit_reservation 按实际时长扣费，
+        失败时调用 release_reservation 释放；进程崩溃留下的预占在超时后失效。
+
+        Args:
+            duration_seconds: 预估的音视频时长（秒），0 表示只要求可用额度大于0
+            job_id: 任务标识
+            timeout: 预占有效期（秒），默认为配置的最短有效期加上音视频时长
+
+        Returns:
+            dict: {"success": bool, "message": str, "reservation_id": str, "reserved": float, "available_quota": float}
+        """
+        from config import settings
+
+        try:
+            amount = self._cost(duration_seconds)
+            if timeout is None:
+                timeout = settings.quota_reservation_timeout + duration_seconds
+            reservation_id = uuid.uuid4().hex
+            now = time.time()
+
+            with self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # 清理超时的预占
+                    expired = conn.execute("DELETE FROM reservation WHERE expires_at <= ?", (now,)).rowcount
+                    if expired:
+                        logger.warning(f"Released {expired} expired quota reservations")
+
+                    row = conn.execute("SELECT total_quota - used_quota FROM account WHERE id = 1").fetchone()
+                    if row is None:
+                        conn.execute("ROLLBACK")
+                        return {
+                            "success": False,
+                            "message": "未找到密钥额度信息，请先激活",
+                            "available_quota": 0
+                        }
+                    reserved = conn.execute("SELECT COALESCE(SUM(amount), 0) FROM reservation").fetchone()[0]
+                    available = row[0] - reserved
+
+                    if available <= 0 or available < amount:
+                        conn.execute("ROLLBACK")
+                        message = (
+                            "API密钥额度已用尽，请联系管理员更新激活码" if available <= 0
+                            else f"额度不足。预计需要: {amount:.4f} 元，可用: {available:.4f} 元"
+                        )
+                        return {
+                            "success": False,
+                            "message": message,
+                            "available_quota": max(available, 0)
+                        }
+
+                    conn.execute(
+                        "INSERT INTO reservation (id, job_id, duration_seconds, amount, created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (reservation_id, job_id, duration_seconds, amount, datetime.now().isoformat(), now + timeout)
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                self._refresh()
+
+            logger.info(f"Quota reserved: {amount:.4f} yuan for {duration_seconds / 60:.2f} minutes, available before: {available:.4f} yuan")
+            return {
+                "success": True,
+                "message": "Quota reserved successfully",
+                "reservation_id": reservation_id,
+                "reserved": amount,
+                "available_quota": available - amount
+            }
+        except Exception as e:
+            logger.error(f"Failed to reserve quota: {e}")
+            return {
+                "success": False,
+                "message": f"Failed to reserve quota: {str(e)}",
+                "available_quota": 0
+            }
+
+    def commit_reservation(self, reservation_id: str, duration_seconds: float, job_id: Optional[str] = None) -> Dict[str, any]:
+        """
+        按实际计费时长扣费并结束预占（两阶段扣费的第二步）
+
+        Args:
+            reservation_id: reserve_quota 返回的预占标识
+            duration_seconds: 实际计费的音视频时长（秒）
+            job_id: 任务标识，写入扣费记录
+
+        Returns:
+            dict: 同 consume_quota
+        """
+        return self._consume(duration_seconds, job_id, reservation_id)
+
+    def release_reservation(self, reservation_id: str) -> bool:
+        """
+        释放预占的额度（任务失败时调用），不扣费
+
+        Args:
+            reservation_id: reserve_quota 返回的预占标识
+
+        Returns:
+            bool: 预占是否存在
+        """
+        try:
+            with self._lock:
+                conn = self._connect()
+                released = conn.execute("DELETE FROM reservation WHERE id = ?", (reservation_id,)).rowcount
+                self._refresh()
+            if released:
+                logger.info(f"Quota reservation released: {reservation_id}")
+            return bool(released)
+        except Exception as e:
+            logger.error(f"Failed to release quota reservation: {e}")
+            return False
+
     def check_quota(self, required_quota: float = 0.0) -> Dict[str, any]:
         """
         检查额度是否充足
 
+        其他任务预占的额度视为已用。
+
         Args:
             required_quota: 需要的额度（人民币元）
 
@@ -163,34 +457,7 @@ class QuotaManager:
                     "message": "未找到密钥额度信息，请先激活"
                 }
 
-            remaining = quota_info["remaining_quota"]
-
-            # 检查密钥是否已失效（额度用尽）
-            if remaining <= 0:
-                return {
-                    "sufficient": False,
-                    "remaining_quota": 0,
-                    "message": "API密钥额度已用尽，请联系管理员更新激活码"
-                }
-
-            # 如果指定了所需额度，检查是否足够
-            if required_quota > 0 and remaining < required_quota:
-                return {
-                    "sufficient": False,
-                    "remaining_quota": remaining,
-                    "message": f"额度不足。所需: {required_quota:.4f} 元，剩余: {remaining:.4f} 元"
-                }
-
-            return {
-                "sufficient": True,
-                "remaining_quota": remaining,
-                "message": "Quota sufficient"
-            }
-        except Exception as e:
-            logger.error
-
-
-            remaining = quota_info["remaining_quota"]
+            remaining = quota_info["available_quota"]
 
             # 检查密钥是否已失效（额度用尽）
             if remaining <= 0:
@@ -221,6 +488,40 @@ class QuotaManager:
                 "message": f"Failed to check quota: {str(e)}"
             }
 
+    def get_consumption_events(self, limit: int = 50) -> List[Dict]:
+        """
+        获取最近的扣费记录
+
+        Args:
+            limit: 最多返回的条数
+
+        Returns:
+            list: 扣费记录，最新的在前
+        """
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT job_id, duration_seconds, cost, created_at FROM consumption ORDER BY id DESC LIMIT ?",
+                    (limit,)
+                ).fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to read consumption events: {e}")
+            return []
+
+    def clear(self) -> bool:
+        """
+        清除额度信息（取消激活时调用），扣费记录保留
+
+        Returns:
+            bool: 是否存在额度信息
+        """
+        with self._lock:
+            conn = self._connect()
+            deleted = conn.execute("DELETE FROM account WHERE id = 1").rowcount
+            self._refresh()
+        return bool(deleted)
+
 
 # 全局额度管理器实例
 quota_manager = QuotaManager()
@@ -0,0 +1,62 @@
+"""
+Startup Timing Report
+记录启动各阶段耗时，用于定位冷启动慢的原因
+
+Import this module first so timings are relative to process start.
+For a per-module breakdown, run `python -X importtime main.py`.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+_start_time = time.perf_counter()
+_lock = threading.Lock()
+_phases: dict[str, float] = {}
+_ready_after: Optional[float] = None
+
+
+@contextmanager
+def measure(phase: str):
+    """
+    Measure the duration of a startup phase
+
+    Args:
+        phase: Phase name shown in the report
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _phases[phase] = time.perf_counter() - start
+
+
+def mark_ready():
+    """Record the time from process start until the server accepts requests"""
+    global _ready_after
+    _ready_after = time.perf_counter() - _start_time
+
+
+def get_startup_report() -> dict:
+    """
+    Get startup timings
+
+    Returns:
+        dict: {"ready_ms": float, "phases_ms": {phase: float}}
+    """
+    with _lock:
+        phases = {name: round(seconds * 1000, 1) for name, seconds in _phases.items()}
+
+    return {
+        "ready_ms": round(_ready_after * 1000, 1) if _ready_after is not None else None,
+        "phases_ms": phases
+    }
+
+
+def format_startup_report() -> str:
+    """Format startup timings as a single log line, slowest phases first"""
+    report = get_startup_report()
+    phases = sorted(report["phases_ms"].items(), key=lambda item: item[1], reverse=True)
+    details = ", ".join(f"{name} {ms:.0f}ms" for name, ms in phases)
+    return f"ready after {report['ready_ms']}ms ({details})"
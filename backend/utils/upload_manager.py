@@ -0,0 +1,313 @@
+"""
+Upload Manager - Chunked, resumable uploads into job scratch directories
+
+An upload is created with its filename and size, then its bytes are sent
+in one or more requests, each starting at the offset acknowledged so far
+(the size of the partial file). A dropped connection keeps everything
+received; the client asks for the offset and continues from there.
+
+The SHA-256 of the content is computed while it is written, so it is
+known as soon as the upload completes without reading the file again.
+The hash state lives in memory; after a restart it is rebuilt once from
+the partial file on the next request.
+"""
+import hashlib
+import json
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from config import settings
+
+META_FILE = "upload.json"
+PART_FILE = "data.part"
+# Dot names can't be upload filenames, so the staged metadata never clashes with the data
+META_TEMP_FILE = ".upload.json.tmp"
+
+
+class UploadError(Exception):
+    """Upload request that can't be served, with its HTTP status"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _UploadState:
+    """Running hash of an upload and the lock of its writer"""
+
+    def __init__(self):
+        self.hasher = hashlib.sha256()
+        self.hashed = 0
+        self.lock = threading.Lock()
+
+
+class UploadWriter:
+    """Appends the body of one request to an upload"""
+
+    def __init__(self, manager: "UploadManager", upload_id: str, meta: dict, state: _UploadState, offset: int):
+        self._manager = manager
+        self._upload_id = upload_id
+        self._meta = meta
+        self._state = state
+        self._file = open(manager.get_upload_dir(upload_id) / PART_FILE, "ab")
+        self.offset = offset
+
+    def write(self, data: bytes):
+        """
+        Append data, hashing it on the way
+
+        Raises:
+            UploadError: 413 if the data goes past the declared size
+        """
+        if self.offset + len(data) > self._meta["size"]:
+            raise UploadError(
+                f"Upload exceeds its declared size of {self._meta['size']} bytes",
+                status_code=413
+            )
+        self._file.write(data)
+        self._state.hasher.update(data)
+        self._state.hashed += len(data)
+        self.offset += len(data)
+
+    def close(self) -> dict:
+        """
+        Finish the request, completing the upload once all bytes are in
+
+        Returns:
+            Upload status
+        """
+        try:
+            self._file.close()
+            if self.offset == self._meta["size"] and not self._meta.get("complete"):
+                self._manager._complete(self._upload_id, self._meta, self._state)
+            return self._manager._status(self._upload_id, self._meta, self.offset)
+        finally:
+            self._state.lock.release()
+
+
+class UploadManager:
+    """Creates, resumes and completes uploads"""
+
+    def __init__(self):
+        self._states: dict[str, _UploadState] = {}
+        self._lock = threading.Lock()
+
+    def get_upload_dir(self, upload_id: str) -> Path:
+        """Scratch directory of an upload"""
+        return settings.temp_dir / "uploads" / upload_id
+
+    def _read_meta(self, upload_id: str) -> dict:
+        # IDs are hex: never let one point outside the uploads directory
+        if not upload_id.isalnum():
+            raise UploadError(f"Upload not found: {upload_id}", status_code=404)
+        try:
+            with open(self.get_upload_dir(upload_id) / META_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError(f"Upload not found: {upload_id}", status_code=404)
+
+    def _write_meta(self, upload_id: str, meta: dict):
+        # Replace atomically so a crash never leaves half a file
+        meta_path = self.get_upload_dir(upload_id) / META_FILE
+        temp_path = meta_path.with_name(META_TEMP_FILE)
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        temp_path.replace(meta_path)
+
+    def _get_offset(self, upload_id: str, meta: dict) -> int:
+        """Bytes received so far"""
+        if meta.get("complete"):
+            return meta["size"]
+        part_path = self.get_upload_dir(upload_id) / PART_FILE
+        return part_path.stat().st_size if part_path.exists() else 0
+
+    def _status(self, upload_id: str, meta: dict, offset: int) -> dict:
+        complete = bool(meta.get("complete"))
+        return {
+            "upload_id": upload_id,
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "offset": offset,
+            "complete": complete,
+            "sha256": meta.get("sha256"),
+            "file_path": str(self.get_upload_dir(upload_id) / meta["filename"]) if complete else None,
+        }
+
+    def _complete(self, upload_id: str, meta: dict, state: _UploadState):
+        """Check the hash and move the data to its final name"""
+        digest = state.hasher.hexdigest()
+        expected = meta.get("expected_sha256")
+        if expected and expected.lower() != digest:
+            # Corrupted: start over
+            (self.get_upload_dir(upload_id) / PART_FILE).unlink(missing_ok=True)
+            with self._lock:
+                self._states.pop(upload_id, None)
+            raise UploadError(f"SHA-256 mismatch: expected {expected}, got {digest}", status_code=422)
+
+        upload_dir = self.get_upload_dir(upload_id)
+        (upload_dir / PART_FILE).replace(upload_dir / meta["filename"])
+        meta["complete"] = True
+        meta["sha256"] = digest
+        self._write_meta(upload_id, meta)
+        with self._lock:
+            self._states.pop(upload_id, None)
+        logger.info(f"Upload {upload_id} complete: {meta['filename']} ({meta['size'] / 1024 / 1024:.2f}MB, sha256 {digest[:12]})")
+
+    def _purge_expired(self):
+        """Delete uploads untouched for upload_expire_hours"""
+        uploads_dir = settings.temp_dir / "uploads"
+        if not uploads_dir.is_dir():
+            return
+        cutoff = time.time() - settings.upload_expire_hours * 3600
+        for upload_dir in uploads_dir.iterdir():
+            try:
+                if upload_dir.is_dir() and upload_dir.stat().st_mtime < cutoff and not any(
+                    path.stat().st_mtime >= cutoff for path in upload_dir.iterdir()
+                ):
+                    shutil.rmtree(upload_dir, ignore_errors=True)
+                    with self._lock:
+                        self._states.pop(upload_dir.name, None)
+                    logger.info(f"Removed expired upload {upload_dir.name}")
+            except OSError as e:
+                logger.warning(f"Failed to check upload {upload_dir.name}: {e}")
+
+    def create(self, filename: str, size: int, sha256: Optional[str] = None) -> dict:
+        """
+        Start an upload
+
+        Args:
+            filename: Original filename (its extension selects the converter)
+            size: Total size in bytes
+            sha256: Expected SHA-256 (hex), checked on completion if given
+
+        Returns:
+            Upload status (offset 0)
+
+        Raises:
+            UploadError: Invalid filename (400), size over max_upload_size (413)
+        """
+        filename = Path(filename.replace("\\", "/")).name
+        if not filename or filename in (META_FILE, PART_FILE) or filename.startswith("."):
+            raise UploadError(f"Invalid filename: {filename}")
+        if size > settings.max_upload_size:
+            raise UploadError(
+                f"File too large: {size} bytes (max {settings.max_upload_size})",
+                status_code=413
+            )
+
+        self._purge_expired()
+
+        upload_id = uuid.uuid4().hex[:16]
+        self.get_upload_dir(upload_id).mkdir(parents=True)
+        meta = {
+            "filename": filename,
+            "size": size,
+            "expected_sha256": sha256,
+            "created_at": time.time(),
+        }
+        self._write_meta(upload_id, meta)
+        (self.get_upload_dir(upload_id) / PART_FILE).touch()
+        logger.info(f"Upload {upload_id} created: {filename} ({size / 1024 / 1024:.2f}MB)")
+
+        status = self._status(upload_id, meta, 0)
+        if size == 0:
+            # Nothing to send
+            context = self.open(upload_id, 0)
+            with context:
+                pass
+            status = context.status
+        return status
+
+    def get_status(self, upload_id: str) -> dict:
+        """
+        Get the progress of an upload
+
+        Raises:
+            UploadError: 404 if unknown
+        """
+        meta = self._read_meta(upload_id)
+        return self._status(upload_id, meta, self._get_offset(upload_id, meta))
+
+    def open(self, upload_id: str, offset: int) -> "_WriterContext":
+        """
+        Open an upload for appending at an offset
+
+        Args:
+            upload_id: Upload ID
+            offset: Offset the client continues from, must be the acknowledged one
+
+        Returns:
+            Context manager yielding an UploadWriter; its status attribute
+            holds the upload status after the block
+
+        Raises:
+            UploadError: 404 unknown, 409 another request is writing, the
+                offset doesn't match or the upload is complete
+        """
+        meta = self._read_meta(upload_id)
+        if meta.get("complete"):
+            raise UploadError("Upload already complete", status_code=409)
+
+        with self._lock:
+            state = self._states.setdefault(upload_id, _UploadState())
+        if not state.lock.acquire(blocking=False):
+            raise UploadError("Another request is uploading this file", status_code=409)
+
+        try:
+            current = self._get_offset(upload_id, meta)
+            if offset != current:
+                raise UploadError(f"Offset mismatch: upload is at {current}", status_code=409)
+
+            if state.hashed != current:
+                # Hash state lost (restart): rebuild it from the partial file
+                state.hasher = hashlib.sha256()
+                state.hashed = 0
+                with open(self.get_upload_dir(upload_id) / PART_FILE, "rb") as f:
+                    while chunk := f.read(settings.upload_buffer_size):
+                        state.hasher.update(chunk)
+                        state.hashed += len(chunk)
+                logger.debug(f"Upload {upload_id}: rebuilt hash state from {state.hashed} bytes")
+
+            writer = UploadWriter(self, upload_id, meta, state, current)
+        except BaseException:
+            state.lock.release()
+            raise
+        return _WriterContext(writer)
+
+    def delete(self, upload_id: str):
+        """
+        Delete an upload and its files
+
+        Raises:
+            UploadError: 404 if unknown
+        """
+        self._read_meta(upload_id)
+        shutil.rmtree(self.get_upload_dir(upload_id), ignore_errors=True)
+        with self._lock:
+            self._states.pop(upload_id, None)
+        logger.info(f"Upload {upload_id} deleted")
+
+
+class _WriterContext:
+    """Closes the writer when the request ends, even if it was interrupted"""
+
+    def __init__(self, writer: UploadWriter):
+        self.writer = writer
+        self.status: Optional[dict] = None
+
+    def __enter__(self) -> UploadWriter:
+        return self.writer
+
+    def __exit__(self, exc_type, exc, tb):
+        self.status = self.writer.close()
+        return False
+
+
+# Global upload manager instance
+upload_manager = UploadManager()
@@ -113,8 +113,9 @@ const PythonBridge = {
       });
 
       // 等待服务器启动，增加重试逻辑
-      const maxRetries = 10;
-      const retryDelay = 1000;
+      // 后端启动时不再执行耗时检查，短间隔轮询以尽快进入可用状态（总等待时间仍为10秒）
+      const maxRetries = 50;
+      const retryDelay = 200;
       let retries = 0;
 
       const waitForBackend = async () => {
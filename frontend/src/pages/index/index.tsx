@@ -125,6 +125,9 @@ const IndexContent = () => {
   const getFileIcon = (type: string) => {
     const iconMap: Record<string, string> = {
       'epub': '📖',
+      'txt': '📄',
+      'md': '📝',
+      'pdf': '📕',
       'mp3': '🎵',
       'wav': '🎵',
       'm4a': '🎵',
@@ -148,7 +151,7 @@ const IndexContent = () => {
         filters: [
           {
             name: '支持的文件',
-            extensions: ['mp3', 'MP3', 'wav', 'WAV', 'm4a', 'M4A','aac', 'AAC',  'mp4', 'MP4', 'avi', 'AVI', 'mov', 'MOV', 'epub', 'EPUB']
+            extensions: ['mp3', 'MP3', 'wav', 'WAV', 'm4a', 'M4A','aac', 'AAC',  'mp4', 'MP4', 'avi', 'AVI', 'mov', 'MOV', 'epub', 'EPUB', 'txt', 'TXT', 'md', 'MD', 'pdf', 'PDF']
           },
           { name: '所有文件', extensions: ['*'] }
         ]
@@ -3,11 +3,15 @@
  */
 import request from './request';
 
+export type OutputFormat = 'docx' | 'md' | 'txt' | 'html' | 'odt';
+
 // API Response Types
 export interface ConvertResponse {
   success: boolean;
   message: string;
   output_file?: string;
+  output_files?: string[];
+  volume_files?: string[];
   content_preview?: string;
 }
 
@@ -37,10 +41,12 @@ export const api = {
    */
   convertFile: (params: {
     file_path: string;
-    output_format: 'docx' | 'md';
+    output_format: OutputFormat | OutputFormat[];
     title?: string;
     output_filename?: string;
     output_dir?: string;
+    volume_mode?: 'none' | 'chapter' | 'size';
+    volume_max_chars?: number;
   }): Promise<ConvertResponse> => {
     return request.post('/api/convert/file', params);
   },